@@ -2,6 +2,9 @@
 ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Event streams are served by ``EventStreamApplication`` on the event loop;
+the stream service of docker-compose runs it with uvicorn and nginx routes
+``/api/events/<pk>/stream`` to it, every other request goes to uwsgi.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -13,4 +16,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'board-app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from event.streams import EventStreamApplication  # noqa: E402
+
+application = EventStreamApplication(django_application)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
+import datetime
 import os
 import environ
 import sys
@@ -50,6 +51,9 @@ INSTALLED_APPS = [
     'core',
     'user',
     'event',
+    'change',
+    'image',
+    'upload',
 ]
 
 REST_FRAMEWORK = {
@@ -80,11 +84,13 @@ ACCOUNT_EMAIL_VERIFICATION = 'none'
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -126,6 +132,36 @@ if '/code/.tox/py38/bin/pytest' in sys.argv:
         }
     }
 
+# Read replicas, given as comma separated database URLs. Tests read the
+# primary through them.
+
+for i, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[]), 1):
+    DATABASES[f'replica{i}'] = dict(
+        env.db_url_config(url), TEST={'MIRROR': 'default'})
+
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds and checked
+# before reuse. With DATABASE_POOL_SIZE, the threads of a worker share a
+# pool of connections instead.
+
+DATABASE_BACKENDS = {
+    'django.db.backends.mysql': 'core.db.backends.mysql',
+    'django.db.backends.sqlite3': 'core.db.backends.sqlite3',
+}
+
+for database in DATABASES.values():
+    database['ENGINE'] = DATABASE_BACKENDS.get(
+        database['ENGINE'], database['ENGINE'])
+    database['CONN_MAX_AGE'] = env.int('DATABASE_CONN_MAX_AGE', default=0)
+    database['CONN_HEALTH_CHECKS'] = env.bool(
+        'DATABASE_CONN_HEALTH_CHECKS', default=True)
+    database['POOL_SIZE'] = env.int('DATABASE_POOL_SIZE', default=0)
+    database['POOL_MAX_AGE'] = env.int('DATABASE_POOL_MAX_AGE', default=300)
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_VIEW_MODULES = ('event.views', 'user.views')
+REPLICA_STICKY_SECONDS = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -173,3 +209,124 @@ STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 AUTH_USER_MODEL = 'core.User'
+
+# Event streams (Server-Sent Events), served by the ASGI application in
+# asgi.py. The database broker relays messages published by the uwsgi
+# workers to the process serving the streams.
+
+EVENT_STREAM_BROKER = env(
+    'EVENT_STREAM_BROKER', default='core.broker.DatabaseBroker')
+EVENT_STREAM_POLL_SECONDS = 0.5
+EVENT_STREAM_HISTORY_SECONDS = 300
+EVENT_STREAM_TIMEOUT = env.int('EVENT_STREAM_TIMEOUT', default=25)
+EVENT_STREAM_HEARTBEAT = 10
+EVENT_STREAM_RETRY = 1000
+
+# Change feed; a gap in the sequence numbers holds back the changes after
+# it for this long in case its transaction is still open
+
+CHANGE_FEED_SETTLE_SECONDS = 30
+
+# Job queue, run by the worker service of docker-compose. Workers refresh
+# the locks of their running jobs every JOB_QUEUE_HEARTBEAT seconds, so
+# only jobs of a dead worker are claimed again after the lock timeout.
+
+JOB_QUEUE_EAGER = False
+JOB_QUEUE_MAX_ATTEMPTS = 5
+JOB_QUEUE_BACKOFF = 10
+JOB_QUEUE_MAX_BACKOFF = 3600
+JOB_QUEUE_LOCK_TIMEOUT = 600
+JOB_QUEUE_HEARTBEAT = 60
+
+# Uploads
+
+FILE_UPLOAD_HANDLERS = ['core.uploadhandlers.BoundedImageUploadHandler']
+UPLOAD_LIMITS = {
+    'image': {'max_bytes': 10 * 2 ** 20, 'max_pixels': 40 * 10 ** 6},
+    'icon': {'max_bytes': 5 * 2 ** 20, 'max_pixels': 16 * 10 ** 6},
+    'default': {'max_bytes': 10 * 2 ** 20, 'max_pixels': None},
+}
+IMAGE_MAX_PIXELS = 40 * 10 ** 6
+
+# Media served by nginx through X-Accel-Redirect
+
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+IMAGE_CACHE_DIR = 'cache'
+IMAGE_CACHE_MAX_BYTES = env.int('IMAGE_CACHE_MAX_BYTES', default=512 * 2 ** 20)
+
+# Media storage (core.storage.S3Storage for an S3-compatible object store)
+
+DEFAULT_FILE_STORAGE = env(
+    'DEFAULT_FILE_STORAGE',
+    default='django.core.files.storage.FileSystemStorage')
+OBJECT_STORAGE_ENDPOINT_URL = env('OBJECT_STORAGE_ENDPOINT_URL', default='')
+OBJECT_STORAGE_PUBLIC_ENDPOINT_URL = env(
+    'OBJECT_STORAGE_PUBLIC_ENDPOINT_URL', default='')
+OBJECT_STORAGE_BUCKET = env('OBJECT_STORAGE_BUCKET', default='board-app')
+OBJECT_STORAGE_REGION = env('OBJECT_STORAGE_REGION', default='us-east-1')
+OBJECT_STORAGE_ACCESS_KEY = env('OBJECT_STORAGE_ACCESS_KEY', default='')
+OBJECT_STORAGE_SECRET_KEY = env('OBJECT_STORAGE_SECRET_KEY', default='')
+OBJECT_STORAGE_URL_EXPIRES = env.int(
+    'OBJECT_STORAGE_URL_EXPIRES', default=3600)
+
+# Upload tickets for files sent straight to the media storage. Attaching
+# a key reads the first UPLOAD_HEADER_BYTES of the file for its dimensions.
+
+UPLOAD_TICKET_EXPIRES = 900
+UPLOAD_HEADER_BYTES = 256 * 2 ** 10
+UPLOAD_INCOMING_DIR = 'incoming'
+UPLOAD_CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+
+# Geocoding (core.geocoders.GSIGeocoder for the GSI address search)
+
+GEOCODER = env('GEOCODER', default='core.geocoders.FixtureGeocoder')
+GEOCODER_FIXTURE = os.path.join(BASE_DIR, 'core', 'fixtures', 'geocoder.json')
+
+# Title autocomplete
+
+AUTOCOMPLETE_REFRESH_SECONDS = 5
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Organizer dashboard
+
+DASHBOARD_UPCOMING_LIMIT = 10
+
+# Related events (rebuilt by the build_related_events command)
+
+RELATED_EVENTS_TOP_K = 10
+
+# Similar events (kept up to date on saves, rebuilt by build_similar_events)
+
+SIMILAR_EVENTS_TOP_K = 10
+SIMILAR_EVENTS_MAX_DF = 5000
+SIMILAR_EVENTS_QUERY_TERMS = 20
+SIMILAR_EVENTS_SHORTLIST = 200
+
+# Trending events. Popularity is stored as log2 of the forward decayed
+# score, which grows by one per half-life since the epoch, so the epoch
+# never has to be moved.
+
+TRENDING_EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_WEIGHTS = {'participant': 1.0, 'comment': 0.5}
+
+# Home timeline. Events of organizers with more followers than the limit
+# are pulled on read instead of fanned out.
+
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_BACKFILL = 20
+TIMELINE_PAGE_SIZE = 20
+
+# Event view counts are buffered per worker and written by a background
+# thread (uwsgi needs enable-threads); a worker that dies loses at most
+# VIEW_COUNT_MAX_PENDING views or VIEW_COUNT_FLUSH_SECONDS of them.
+
+VIEW_COUNT_MAX_PENDING = 100
+VIEW_COUNT_FLUSH_SECONDS = 10
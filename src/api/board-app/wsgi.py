@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'board-app.settings')
 
 application = get_wsgi_application()
+
+import atexit  # noqa: E402
+
+from core.autocomplete import title_index  # noqa: E402
+from core.counters import view_counter  # noqa: E402
+
+title_index.warm_on_boot()
+atexit.register(view_counter.flush_on_exit)
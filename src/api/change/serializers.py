@@ -0,0 +1,11 @@
+from rest_framework import serializers
+
+from core.models import Change
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    """Serializer for Change objects"""
+
+    class Meta:
+        model = Change
+        fields = ('seq', 'model', 'object_id', 'action', 'created_at')
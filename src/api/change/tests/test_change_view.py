@@ -0,0 +1,181 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.timezone import make_aware
+import datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Change, Event, EventComment, Participant
+from core.tasks import geocode_event
+from core.timeline import follow
+
+
+CHANGE_URL = reverse('change:changeList')
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+
+    return Event.objects.create(organizer=user, **default)
+
+
+class ChangeTrackingTests(TestCase):
+    """Test that writes are recorded in the change outbox"""
+
+    def setUp(self):
+        self.user = sample_user(email='test@matsuda.com', password='testpass')
+
+    def test_record_create_update_delete(self):
+        """Test creating, updating and deleting an event is recorded"""
+        event = sample_event(self.user)
+        event.title = 'new title'
+        event.save()
+        event.delete()
+
+        changes = Change.objects.filter(model='event', object_id=event.id)
+        self.assertEqual(
+            [change.action for change in changes],
+            ['create', 'update', 'delete']
+        )
+
+    def test_record_every_tracked_model(self):
+        """Test comments, participants and users are recorded"""
+        event = sample_event(self.user)
+        EventComment.objects.create(
+            event=event, user=self.user, comment='test')
+        Participant.objects.create(event=event, user=self.user)
+
+        models = set(Change.objects.values_list('model', flat=True))
+        self.assertEqual(
+            models, {'user', 'event', 'eventcomment', 'participant'})
+
+    def test_record_bulk_updates(self):
+        """Test rows written by jobs and counters without save are recorded"""
+        organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        event = sample_event(organizer)
+        Event.objects.filter(pk=event.pk).update(address='東京都港区')
+        Change.objects.all().delete()
+
+        geocode_event(event_id=event.id)
+        follow(self.user, organizer)
+
+        self.assertEqual(
+            list(Change.objects.values_list('model', 'object_id', 'action')),
+            [('event', event.id, 'update'), ('user', organizer.id, 'update')]
+        )
+
+    def test_sequence_increases(self):
+        """Test sequence numbers increase monotonically"""
+        sample_event(self.user)
+        sample_event(self.user)
+
+        seqs = list(Change.objects.values_list('seq', flat=True))
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(len(set(seqs)), len(seqs))
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedApiTests(TestCase):
+    """Test the change feed API"""
+
+    def setUp(self):
+        self.user = sample_user(email='test@matsuda.com', password='testpass')
+        self.event = sample_event(self.user)
+        self.client = APIClient()
+
+    def test_retrieve_changes_since(self):
+        """Test retrieving changes after a sequence number"""
+        since = Change.objects.last().seq
+        self.event.title = 'new title'
+        self.event.save()
+
+        res = self.client.get(CHANGE_URL, {'since': since})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        change = Change.objects.last()
+        self.assertJSONEqual(res.content, {
+            'last_seq': change.seq,
+            'next': None,
+            'results': [{
+                'seq': change.seq,
+                'model': 'event',
+                'object_id': self.event.id,
+                'action': 'update',
+                'created_at': res.data['results'][0]['created_at']
+            }]
+        })
+
+    def test_retrieve_changes_pagination(self):
+        """Test following the next link walks through every change"""
+        for count in range(4):
+            sample_event(self.user)
+
+        seqs = []
+        res = self.client.get(CHANGE_URL, {'page_size': 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seqs.extend(change['seq'] for change in res.data['results'])
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            seqs, list(Change.objects.values_list('seq', flat=True)))
+
+    def test_hold_back_changes_after_gap(self):
+        """Test changes after a gap that may still be filled are held back"""
+        since = Change.objects.last().seq
+        for count in range(3):
+            sample_event(self.user)
+        changes = list(Change.objects.filter(seq__gt=since))
+        Change.objects.filter(seq=changes[1].seq).delete()
+
+        with self.settings(CHANGE_FEED_SETTLE_SECONDS=60):
+            res = self.client.get(CHANGE_URL, {'since': since})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [change['seq'] for change in res.data['results']],
+            [changes[0].seq])
+        self.assertEqual(res.data['last_seq'], changes[0].seq)
+        self.assertIsNone(res.data['next'])
+
+    def test_skip_settled_gap(self):
+        """Test a gap older than the settle window is passed over"""
+        since = Change.objects.last().seq
+        for count in range(3):
+            sample_event(self.user)
+        changes = list(Change.objects.filter(seq__gt=since))
+        Change.objects.filter(seq=changes[1].seq).delete()
+        Change.objects.filter(seq__gt=since).update(
+            created_at=timezone.now() - datetime.timedelta(minutes=2))
+
+        with self.settings(CHANGE_FEED_SETTLE_SECONDS=60):
+            res = self.client.get(CHANGE_URL, {'since': since})
+
+        self.assertEqual(
+            [change['seq'] for change in res.data['results']],
+            [change.seq for change in changes if change != changes[1]])
+
+    def test_invalid_since(self):
+        """Test a non numeric since is rejected"""
+        res = self.client.get(CHANGE_URL, {'since': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from change import views
+
+
+app_name = 'change'
+
+urlpatterns = [
+    path('', views.ChangeListView.as_view(), name='changeList'),
+]
@@ -0,0 +1,84 @@
+from rest_framework import generics, status
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.utils import timezone
+
+import datetime
+
+from core.models import Change
+
+from change import serializers
+
+
+def settled_changes(changes, since):
+    """Return the changes up to the first gap that may still be filled
+
+    Sequence numbers are taken when a change is written but become
+    visible only when its transaction commits, so a gap in the numbers
+    is a transaction still open or one rolled back. Changes after a gap
+    are held back until the change following it is
+    CHANGE_FEED_SETTLE_SECONDS old; the gap is then taken for a rollback.
+    """
+    settled_at = timezone.now() - datetime.timedelta(
+        seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+    expected = since + 1
+    for i, change in enumerate(changes):
+        if change.seq != expected and change.created_at > settled_at:
+            return changes[:i]
+        expected = change.seq + 1
+    return changes
+
+
+class ChangeFeedPagination(BasePagination):
+    """Paginate changes by sequence number instead of page offset"""
+    page_size = 100
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.since = int(request.query_params.get('since', 0))
+        page_size = int(
+            request.query_params.get('page_size', self.page_size))
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        page = settled_changes(
+            list(queryset.filter(seq__gt=self.since)[:page_size + 1]),
+            self.since)
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        last_seq = self.page[-1].seq if self.page else self.since
+        next_url = None
+        if self.has_next:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(), 'since', last_seq)
+        return Response({
+            'last_seq': last_seq,
+            'next': next_url,
+            'results': data
+        })
+
+
+class ChangeListView(generics.ListAPIView):
+    """List changes recorded after a sequence number
+
+    Changes are listed in commit order as far as the sequence numbers
+    tell: the list stops at a gap left by a transaction that may still
+    commit, so it cannot slip in below a sequence number a consumer
+    already passed. The guarantee is best effort for transactions left
+    open longer than CHANGE_FEED_SETTLE_SECONDS after a later change was
+    written; their changes can be missed.
+    """
+    pagination_class = ChangeFeedPagination
+    serializer_class = serializers.ChangeSerializer
+    queryset = Change.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
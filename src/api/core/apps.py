@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.utils.module_loading import autodiscover_modules
+from PIL import Image
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import signals  # noqa: F401
+        autodiscover_modules('tasks')
+
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
@@ -0,0 +1,139 @@
+import bisect
+import datetime
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from core.models import Event
+from core.search import normalize
+
+
+class PrefixIndex:
+    """Sorted in-memory array of upcoming event titles for prefix lookup
+
+    Every title is indexed under itself and under each word it contains,
+    so a prefix lookup is a binary search followed by a short scan. The
+    array is loaded once per worker and then brought up to date with the
+    events updated since the last sync, at most every
+    AUTOCOMPLETE_REFRESH_SECONDS, so lookups almost never hit the
+    database. Each sync overlaps the previous one a little, so a write
+    committed just after a sync started is not missed.
+    """
+    overlap = datetime.timedelta(seconds=5)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._entries = {}
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def index_keys(title):
+        """Return the normalized strings a title is found under"""
+        title = normalize(title).strip()
+        words = title.split()
+        return {title} | {' '.join(words[i:]) for i in range(1, len(words))}
+
+    @staticmethod
+    def upcoming():
+        return Event.objects.filter(
+            is_active=True, event_time__gte=timezone.now()
+        ).exclude(status='0')
+
+    def warm(self):
+        """Load the index from the database"""
+        synced_at = timezone.now()
+        rows = self.upcoming().values_list('id', 'title', 'event_time')
+        keys = []
+        entries = {}
+        for event_id, title, event_time in rows.iterator():
+            entry = (title, event_time)
+            entries[event_id] = entry
+            keys.extend((key, event_id) for key in self.index_keys(title))
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._entries = entries
+            self._synced_at = synced_at
+            self._checked_at = time.monotonic()
+
+    def warm_on_boot(self):
+        """Load the index before the worker serves, if the database is up
+
+        The connection is closed again, so workers forked afterwards do
+        not share it.
+        """
+        try:
+            self.warm()
+        except DatabaseError:
+            pass
+        finally:
+            connections.close_all()
+
+    def refresh(self):
+        """Apply the events updated since the last sync and drop past ones"""
+        synced_at = timezone.now()
+        changed = Event.objects.filter(
+            updated_at__gte=self._synced_at - self.overlap
+        ).values_list('id', 'title', 'event_time', 'status', 'is_active')
+        now = timezone.now()
+        with self._lock:
+            for event_id, title, event_time, status, is_active in changed:
+                self._remove(event_id)
+                if is_active and status != '0' and event_time >= now:
+                    self._add(event_id, title, event_time)
+            for event_id in [event_id for event_id, (title, event_time)
+                             in self._entries.items() if event_time < now]:
+                self._remove(event_id)
+            self._synced_at = synced_at
+            self._checked_at = time.monotonic()
+
+    def _add(self, event_id, title, event_time):
+        self._entries[event_id] = (title, event_time)
+        for key in self.index_keys(title):
+            bisect.insort(self._keys, (key, event_id))
+
+    def _remove(self, event_id):
+        entry = self._entries.pop(event_id, None)
+        if entry is None:
+            return
+        for key in self.index_keys(entry[0]):
+            i = bisect.bisect_left(self._keys, (key, event_id))
+            if i < len(self._keys) and self._keys[i] == (key, event_id):
+                del self._keys[i]
+
+    def lookup(self, prefix, limit):
+        """Return up to limit upcoming events whose title has the prefix
+
+        The events taking place soonest come first.
+        """
+        if self._synced_at is None:
+            self.warm()
+        elif (time.monotonic() - self._checked_at >
+                settings.AUTOCOMPLETE_REFRESH_SECONDS):
+            self.refresh()
+
+        prefix = normalize(prefix).strip()
+        now = timezone.now()
+        with self._lock:
+            matches = {}
+            i = bisect.bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+                event_id = self._keys[i][1]
+                title, event_time = self._entries[event_id]
+                if event_time >= now:
+                    matches[event_id] = (event_time, event_id, title)
+                i += 1
+        return [
+            {'id': event_id, 'title': title, 'event_time': event_time}
+            for event_time, event_id, title
+            in heapq.nsmallest(limit, matches.values())
+        ]
+
+
+title_index = PrefixIndex()
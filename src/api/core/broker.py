@@ -0,0 +1,263 @@
+import asyncio
+import datetime
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connection
+from django.db.models import Max
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import StreamMessage
+
+
+logger = logging.getLogger(__name__)
+
+
+Message = namedtuple('Message', ('id', 'channel', 'event', 'data'))
+
+
+def event_channel(event_id):
+    """Return the broker channel name for an event"""
+    return f'event.{event_id}'
+
+
+def format_sse(message):
+    """Encode a message as a Server-Sent Events frame"""
+    data = json.dumps(message.data, ensure_ascii=False)
+    return f'id: {message.id}\nevent: {message.event}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """Queue of messages published to a channel for one subscriber
+
+    Messages can be consumed either from a thread with ``get`` or from
+    an event loop with ``aget``; the latter waits on an asyncio future
+    so that an idle subscriber does not occupy a thread.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self._messages = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self._waiter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def put(self, message):
+        with self._condition:
+            self._messages.append(message)
+            self._condition.notify_all()
+            if self._waiter is not None:
+                loop, future = self._waiter
+                loop.call_soon_threadsafe(self._wake, future)
+
+    @staticmethod
+    def _wake(future):
+        if not future.done():
+            future.set_result(None)
+
+    def get(self, timeout=None):
+        """Return the next message, or None once timeout has elapsed"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._messages, timeout):
+                return None
+            return self._messages.popleft()
+
+    async def aget(self, timeout=None):
+        """Asynchronous counterpart of ``get``"""
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            if self._messages:
+                return self._messages.popleft()
+            future = loop.create_future()
+            self._waiter = (loop, future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._condition:
+            self._waiter = None
+            if self._messages:
+                return self._messages.popleft()
+        return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Publish/subscribe broker living in the current process
+
+    Each channel keeps a short history so that a client reconnecting
+    with ``Last-Event-ID`` receives the messages it missed.
+    """
+
+    def __init__(self, history=100, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._subscriptions = defaultdict(set)
+        self._history = defaultdict(lambda: deque(maxlen=history))
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            message = Message(next(self._ids), channel, event, data)
+            self._history[channel].append(message)
+            subscriptions = list(self._subscriptions[channel])
+        for subscription in subscriptions:
+            subscription.put(message)
+        return message
+
+    def subscribe(self, channel, last_id=None):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            if last_id is not None:
+                for message in self._history[channel]:
+                    if message.id > last_id:
+                        subscription.put(message)
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def close(self):
+        pass
+
+
+class DatabaseBroker(InProcessBroker):
+    """Publish/subscribe broker relaying messages through the database
+
+    Messages are appended to the stream message table, so a process
+    serving streams receives what other processes publish. The first
+    subscription of a process starts a thread that polls the table every
+    EVENT_STREAM_POLL_SECONDS and hands new rows to the subscribers of
+    their channel; processes that only publish never poll. Rows older
+    than EVENT_STREAM_HISTORY_SECONDS are pruned by the polling thread
+    and can no longer be replayed with ``Last-Event-ID``.
+    """
+
+    def __init__(self, history=100, queue_size=100):
+        super().__init__(history, queue_size)
+        self.history = history
+        self._cursor = None
+        self._poller = None
+        self._stopped = threading.Event()
+
+    def publish(self, channel, event, data):
+        row = StreamMessage.objects.create(
+            channel=channel, event=event, data=json.dumps(data))
+        return Message(row.id, channel, event, data)
+
+    def subscribe(self, channel, last_id=None):
+        self.start()
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            if last_id is not None:
+                missed = StreamMessage.objects.filter(
+                    channel=channel, id__gt=last_id, id__lte=self._cursor
+                ).order_by('-id')[:self.history]
+                for row in reversed(missed):
+                    subscription.put(self.message(row))
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    @staticmethod
+    def message(row):
+        return Message(row.id, row.channel, row.event, json.loads(row.data))
+
+    def start(self):
+        """Start the polling thread unless it is running already"""
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._cursor = StreamMessage.objects.aggregate(
+                cursor=Max('id'))['cursor'] or 0
+            self._poller = threading.Thread(target=self.poll, daemon=True)
+            self._poller.start()
+
+    def close(self):
+        """Stop the polling thread"""
+        self._stopped.set()
+        if self._poller is not None:
+            self._poller.join()
+
+    def poll(self):
+        pruned_at = time.monotonic()
+        try:
+            while not self._stopped.wait(settings.EVENT_STREAM_POLL_SECONDS):
+                try:
+                    self.dispatch()
+                    if (time.monotonic() - pruned_at >=
+                            settings.EVENT_STREAM_HISTORY_SECONDS):
+                        self.prune()
+                        pruned_at = time.monotonic()
+                except DatabaseError:
+                    logger.exception('Polling event stream messages failed')
+                    connection.close()
+        finally:
+            connection.close()
+
+    def dispatch(self):
+        """Hand the rows added since the last poll to their subscribers"""
+        rows = list(StreamMessage.objects.filter(
+            id__gt=self._cursor).order_by('id')[:1000])
+        if not rows:
+            return
+        with self._lock:
+            for row in rows:
+                for subscription in self._subscriptions.get(row.channel, ()):
+                    subscription.put(self.message(row))
+            self._cursor = rows[-1].id
+
+    def prune(self):
+        """Delete the rows too old to be replayed"""
+        StreamMessage.objects.filter(
+            created_at__lt=timezone.now() - datetime.timedelta(
+                seconds=settings.EVENT_STREAM_HISTORY_SECONDS)
+        ).delete()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the broker configured by EVENT_STREAM_BROKER"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.EVENT_STREAM_BROKER)()
+        return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'EVENT_STREAM_BROKER':
+        with _broker_lock:
+            if _broker is not None:
+                _broker.close()
+            _broker = None
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from core.rollups import add_views
+
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """In-memory buffer of event views, written to the rollups in batches
+
+    Views are counted per worker and flushed once VIEW_COUNT_MAX_PENDING
+    views are pending or VIEW_COUNT_FLUSH_SECONDS have passed since the
+    last flush, whichever comes first, so a worker that dies loses at
+    most that many views. The first view counted by a process starts a
+    thread that flushes the buffer when the interval runs out, so views
+    are written even when the worker receives no further requests.
+    Views that fail to be written are kept for the next flush.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._total = 0
+        self._flushed_at = time.monotonic()
+        self._flusher = None
+        self._stopped = threading.Event()
+
+    def add(self, event_id):
+        """Count a view of an event, flushing the buffer when it is due"""
+        self.start()
+        with self._lock:
+            self._pending[event_id] += 1
+            self._total += 1
+            due = (self._total >= settings.VIEW_COUNT_MAX_PENDING or
+                   time.monotonic() - self._flushed_at >=
+                   settings.VIEW_COUNT_FLUSH_SECONDS)
+        if due:
+            self.flush()
+
+    def pending(self, event_id):
+        """Return the views of an event not written yet by this worker"""
+        return self._pending.get(event_id, 0)
+
+    def start(self):
+        """Start the flushing thread unless it is running already"""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self.flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        """Stop the flushing thread"""
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+
+    def flush_periodically(self):
+        while True:
+            remaining = (self._flushed_at + settings.VIEW_COUNT_FLUSH_SECONDS -
+                         time.monotonic())
+            if self._stopped.wait(max(remaining, 0.1)):
+                break
+            if (time.monotonic() - self._flushed_at <
+                    settings.VIEW_COUNT_FLUSH_SECONDS):
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing event views failed')
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write the pending views to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._total = 0
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        try:
+            with transaction.atomic():
+                add_views(pending)
+        except DatabaseError:
+            with self._lock:
+                self._pending.update(pending)
+                self._total += sum(pending.values())
+
+    def flush_on_exit(self):
+        """Write the pending views when the worker exits, if possible"""
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def clear(self):
+        """Drop the pending views"""
+        with self._lock:
+            self._pending.clear()
+            self._total = 0
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,7 @@
+from django.db.backends.mysql import base
+
+from core.db.connections import PersistentConnectionMixin
+
+
+class DatabaseWrapper(PersistentConnectionMixin, base.DatabaseWrapper):
+    pass
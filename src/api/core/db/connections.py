@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+
+
+_timing = threading.local()
+
+
+def reset_connect_timing():
+    """Start timing the database connects of the current thread"""
+    _timing.seconds = 0.0
+    _timing.count = 0
+
+
+def connect_timing():
+    """Return the seconds spent and connects made since the last reset"""
+    return getattr(_timing, 'seconds', 0.0), getattr(_timing, 'count', 0)
+
+
+class ConnectionPool:
+    """Per-worker pool of open DB-API connections to one database
+
+    Threads of a threaded or async server check connections out when
+    Django connects and back in when it closes, so connections outlive
+    the threads and requests using them. Idle connections older than
+    max_age seconds, or failing the health check, are closed instead of
+    being handed out.
+    """
+
+    def __init__(self, size, max_age):
+        self.size = size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._idle = deque()
+
+    def acquire(self, connect, is_usable):
+        """Return an idle connection, or a new one from connect()"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, opened_at = self._idle.pop()
+            fresh = (self.max_age is None or
+                     time.monotonic() - opened_at < self.max_age)
+            if fresh and is_usable(connection):
+                return connection, opened_at
+            self.discard(connection)
+        return connect(), time.monotonic()
+
+    def release(self, connection, opened_at):
+        """Return a connection to the pool, or close it if the pool is full"""
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, opened_at))
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, size, max_age):
+    """Return the pool of a database alias in this worker"""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(size, max_age)
+        return _pools[alias]
+
+
+class PersistentConnectionMixin:
+    """Database wrapper reusing connections safely and timing connects
+
+    With CONN_HEALTH_CHECKS, a persistent connection is checked before
+    its first use in each request and replaced if the server dropped it.
+    With POOL_SIZE, connections are taken from and returned to a pool
+    shared by the threads of the worker instead of being opened and
+    closed, and are replaced after POOL_MAX_AGE seconds. The time spent
+    opening connections is recorded for ServerTimingMiddleware.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self._opened_at = None
+
+    @property
+    def pool(self):
+        size = self.settings_dict.get('POOL_SIZE') or 0
+        if size <= 0:
+            return None
+        return get_pool(
+            self.alias, size, self.settings_dict.get('POOL_MAX_AGE'))
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connect = super().get_new_connection
+        pool = self.pool
+        if pool is None:
+            connection = connect(conn_params)
+            self._opened_at = time.monotonic()
+        else:
+            connection, self._opened_at = pool.acquire(
+                lambda: connect(conn_params), self.raw_connection_usable)
+
+        seconds, count = connect_timing()
+        _timing.seconds = seconds + time.perf_counter() - started
+        _timing.count = count + 1
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def raw_connection_usable(self, connection):
+        """Return whether a DB-API connection still works"""
+        current, self.connection = self.connection, connection
+        try:
+            return self.is_usable()
+        finally:
+            self.connection = current
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done and
+                not self.in_atomic_block and
+                self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if not self.get_autocommit():
+                self.connection.rollback()
+        pool.release(self.connection, self._opened_at)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+
+from django.db import models, transaction
+from django.db.models.fields.files import ImageFieldFile
+
+
+def content_digest(content):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    sha256 = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+SHARD_DEPTH = 2
+
+
+def shard_path(directory, filename):
+    """Return the path of a file spread over hashed subdirectories
+
+    The leading characters of the random (uuid or digest) file name pick
+    the subdirectories, e.g. ``ab/cd/abcd1234....jpg``.
+    """
+    stem = os.path.splitext(filename)[0]
+    shards = [stem[i * 2:i * 2 + 2] for i in range(SHARD_DEPTH)]
+    return os.path.join(directory, *shards, filename)
+
+
+def is_sharded(name):
+    """Return whether the file name is laid out by shard_path"""
+    filename = os.path.basename(name)
+    return shard_path(shard_root(name), filename) == name
+
+
+def shard_root(name):
+    """Return the directory the shards of a file name are rooted in"""
+    directory = os.path.dirname(name)
+    for i in range(SHARD_DEPTH):
+        directory = os.path.dirname(directory)
+    return directory
+
+
+def addressed_name(name, digest):
+    """Return the sharded name of a file named by its content digest"""
+    ext = os.path.splitext(name)[1].lower()
+    root = shard_root(name) if is_sharded(name) else os.path.dirname(name)
+    return shard_path(root, f'{digest}{ext}')
+
+
+def is_addressed(name):
+    """Return whether the file name is already a content digest"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return len(stem) == 64 and all(c in '0123456789abcdef' for c in stem)
+
+
+class ContentAddressedFieldFile(ImageFieldFile):
+
+    def save(self, name, content, save=True):
+        """Store the content under its digest unless it is stored already"""
+        from core.models import MediaBlob
+
+        name = self.field.generate_filename(self.instance, name)
+        name = addressed_name(name, content_digest(content))
+        with transaction.atomic():
+            MediaBlob.objects.get_or_create(name=name)
+            MediaBlob.objects.select_for_update().get(name=name)
+            if not self.storage.exists(name):
+                self.storage.save(
+                    name, content, max_length=self.field.max_length)
+
+        self.name = name
+        setattr(self.instance, self.field.name, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+    save.alters_data = True
+
+
+class ContentAddressedImageField(models.ImageField):
+    """ImageField storing files by content hash so duplicates are shared
+
+    References are counted in MediaBlob by the signal receivers in
+    core.signals, and a file is deleted once no row refers to it. As
+    the content of a name never changes, its URL can be cached forever.
+    """
+    attr_class = ContentAddressedFieldFile
@@ -0,0 +1,85 @@
+import math
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_PRECISION = 9
+
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    """Return the geohash of a point"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = ((lng_range, longitude) if even
+                                else (lat_range, latitude))
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Return the height and width in degrees of a geohash cell"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return the latitude and longitude ranges around a circle"""
+    dlat = radius_km / KM_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlng = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return ((max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)),
+            (longitude - dlng, longitude + dlng))
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """Return geohash prefixes of the cells that cover a circle
+
+    The longest precision whose cells are at least as large as the
+    radius is chosen, so the cell of the centre and its eight neighbours
+    always contain the whole circle. None is returned for circles too
+    large for any cell.
+    """
+    (south, north), (west, east) = bounding_box(
+        latitude, longitude, radius_km)
+    dlat, dlng = north - latitude, east - longitude
+    for precision in range(MAX_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if height >= dlat and width >= dlng:
+            break
+    else:
+        return None
+
+    prefixes = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            lat = min(max(latitude + i * height, -90.0), 90.0)
+            lng = (longitude + j * width + 180.0) % 360.0 - 180.0
+            prefixes.add(encode(lat, lng, precision))
+    return sorted(prefixes)
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Return the great-circle distance between two points"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = (math.sin(dphi / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
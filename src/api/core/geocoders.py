@@ -0,0 +1,63 @@
+import json
+import urllib.parse
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.search import normalize
+
+
+class Geocoder:
+    """Turn a free-text address into a latitude and longitude"""
+
+    def geocode(self, address):
+        """Return (latitude, longitude) of an address, or None"""
+        raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def load_fixture(path):
+    with open(path, encoding='utf-8') as f:
+        return {normalize(address): tuple(point)
+                for address, point in json.load(f).items()}
+
+
+class FixtureGeocoder(Geocoder):
+    """Offline geocoder looking addresses up in a JSON fixture
+
+    The longest fixture address the given address starts with wins, so
+    a fixture of wards and cities covers the streets within them.
+    """
+
+    def __init__(self, path=None):
+        self.points = load_fixture(path or settings.GEOCODER_FIXTURE)
+
+    def geocode(self, address):
+        address = normalize(address).replace(' ', '')
+        matches = [key for key in self.points if address.startswith(key)]
+        if not matches:
+            return None
+        return self.points[max(matches, key=len)]
+
+
+class GSIGeocoder(Geocoder):
+    """Geocoder backed by the address search of the GSI of Japan"""
+    url = 'https://msearch.gsi.go.jp/address-search/AddressSearch'
+    timeout = 10
+
+    def geocode(self, address):
+        query = urllib.parse.urlencode({'q': address})
+        with urllib.request.urlopen(
+                f'{self.url}?{query}', timeout=self.timeout) as response:
+            results = json.load(response)
+        if not results:
+            return None
+        longitude, latitude = results[0]['geometry']['coordinates']
+        return latitude, longitude
+
+
+def get_geocoder():
+    """Return the geocoder configured by GEOCODER"""
+    return import_string(settings.GEOCODER)()
@@ -0,0 +1,67 @@
+import base64
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+PLACEHOLDER_SIZE = (4, 4)
+
+RENDITIONS = {
+    'list': (480, 360),
+    'detail': (1200, 900),
+    'avatar': (128, 128),
+}
+
+
+def rendition_name(name, rendition):
+    """Return the file name of a rendition stored next to the original"""
+    root, ext = os.path.splitext(name)
+    return f'{root}_{rendition}.jpg'
+
+
+def open_image(f, alpha=False):
+    """Open an image file upright and in RGB
+
+    Transparent pixels are flattened onto white, unless alpha is set and
+    the image is kept in RGBA for formats that can store transparency.
+    """
+    image = Image.open(f)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        if alpha:
+            return image
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def generate_renditions(fieldfile, renditions):
+    """Write the given renditions of a field file to its storage"""
+    storage = fieldfile.storage
+    with storage.open(fieldfile.name, 'rb') as f:
+        image = open_image(f)
+    for rendition in renditions:
+        thumbnail = ImageOps.fit(
+            image, RENDITIONS[rendition], method=Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, 'JPEG', quality=85, optimize=True)
+
+        name = rendition_name(fieldfile.name, rendition)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(buffer.getvalue()))
+    return image
+
+
+def placeholder(image):
+    """Return a few-pixel PNG data URI standing in for an image"""
+    thumbnail = image.copy()
+    thumbnail.thumbnail(PLACEHOLDER_SIZE, Image.BOX)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, 'PNG', optimize=True)
+    data = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f'data:image/png;base64,{data}'
@@ -0,0 +1,148 @@
+import datetime
+import json
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Job
+
+
+_registry = {}
+
+
+def job(func=None, *, name=None, max_attempts=None):
+    """Register a function so that it can be enqueued as a job
+
+    The function receives the keyword arguments given to ``enqueue``,
+    which must be JSON serializable.
+    """
+    def register(func):
+        func.job_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts or settings.JOB_QUEUE_MAX_ATTEMPTS
+        _registry[func.job_name] = func
+        return func
+
+    if func is None:
+        return register
+    return register(func)
+
+
+def enqueue(func, delay=0, **kwargs):
+    """Add a call of a registered job to the queue
+
+    The job row is written in the current transaction, so the job only
+    becomes visible to workers once the caller commits. With
+    JOB_QUEUE_EAGER the job runs immediately instead.
+    """
+    if settings.JOB_QUEUE_EAGER:
+        func(**kwargs)
+        return None
+
+    return Job.objects.create(
+        name=func.job_name,
+        payload=json.dumps(kwargs),
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay)
+    )
+
+
+def enqueue_unique(func, **kwargs):
+    """Enqueue a job unless the same call is already queued or running
+
+    Return the new job, or None when an identical one is pending.
+    """
+    if not settings.JOB_QUEUE_EAGER and Job.objects.filter(
+            name=func.job_name, payload=json.dumps(kwargs),
+            status__in=('0', '1')).exists():
+        return None
+    return enqueue(func, **kwargs)
+
+
+def backoff(attempts):
+    """Return the delay in seconds before retrying a failed attempt"""
+    delay = settings.JOB_QUEUE_BACKOFF * 2 ** (attempts - 1)
+    return min(delay, settings.JOB_QUEUE_MAX_BACKOFF)
+
+
+def claim(limit):
+    """Lock up to limit runnable jobs for the current worker
+
+    Candidates are read with SELECT ... FOR UPDATE SKIP LOCKED where the
+    database supports it; each one is then claimed with a conditional
+    update, so two workers never claim a job at once. A running job is
+    claimed again once its lock is JOB_QUEUE_LOCK_TIMEOUT seconds old,
+    so workers must keep the locks of their jobs fresh with
+    ``heartbeat``, or a job outliving the timeout runs twice.
+    """
+    now = timezone.now()
+    expired = now - datetime.timedelta(seconds=settings.JOB_QUEUE_LOCK_TIMEOUT)
+    runnable = Job.objects.filter(
+        Q(status='0', run_at__lte=now) | Q(status='1', locked_at__lt=expired)
+    ).order_by('run_at')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            runnable = runnable.select_for_update(skip_locked=True)
+        candidates = list(
+            runnable.values_list('id', 'status', 'locked_at')[:limit])
+
+        claimed = []
+        for job_id, job_status, locked_at in candidates:
+            updated = Job.objects.filter(
+                id=job_id, status=job_status, locked_at=locked_at).update(
+                    status='1', locked_at=now, attempts=F('attempts') + 1)
+            if updated:
+                claimed.append(job_id)
+    return claimed
+
+
+def heartbeat(job_ids):
+    """Refresh the locks of running jobs so they are not claimed again"""
+    return Job.objects.filter(id__in=job_ids, status='1').update(
+        locked_at=timezone.now())
+
+
+def run(job_id):
+    """Run a claimed job and record its outcome"""
+    job = Job.objects.get(pk=job_id)
+    try:
+        func = _registry[job.name]
+        func(**json.loads(job.payload))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = '3'
+        else:
+            job.status = '0'
+            job.run_at = timezone.now() + datetime.timedelta(
+                seconds=backoff(job.attempts))
+    else:
+        job.status = '2'
+    job.locked_at = None
+    job.save()
+    return job
+
+
+def run_in_worker(job_id):
+    """Run a job from a worker thread or process"""
+    close_old_connections()
+    try:
+        return run(job_id).status
+    finally:
+        close_old_connections()
+
+
+def run_pending(limit=100):
+    """Run runnable jobs in the current thread until none is left"""
+    count = 0
+    while count < limit:
+        job_ids = claim(min(10, limit - count))
+        if not job_ids:
+            break
+        for job_id in job_ids:
+            run(job_id)
+        count += len(job_ids)
+    return count
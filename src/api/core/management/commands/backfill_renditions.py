@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import enqueue
+from core.tasks import IMAGE_FIELDS, needs_renditions, render_image
+
+
+class Command(BaseCommand):
+    help = 'Generate renditions of existing event images and user icons'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--enqueue', action='store_true',
+                            help='Queue the work for run_worker instead')
+
+    def handle(self, *args, **options):
+        for field, info in IMAGE_FIELDS.items():
+            model, name, rendered = info.model, info.name, info.rendered
+            queryset = model.objects.exclude(**{name: ''}).exclude(
+                **{f'{name}__isnull': True}).order_by('pk')
+            last_pk = 0
+            count = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk).only(
+                    'pk', name, rendered, info.placeholder
+                )[:options['batch_size']])
+                if not batch:
+                    break
+                for instance in batch:
+                    if not needs_renditions(instance, field):
+                        continue
+                    if options['enqueue']:
+                        enqueue(render_image, field=field, pk=instance.pk)
+                    else:
+                        try:
+                            render_image(field=field, pk=instance.pk)
+                        except (OSError, ValueError) as e:
+                            self.stderr.write(f'{field} {instance.pk}: {e}')
+                            continue
+                    count += 1
+                last_pk = batch[-1].pk
+            self.stdout.write(f'{field}: {count} images processed')
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import RelatedEvent
+from core.recommendations import related_events, store_rankings
+
+
+class Command(BaseCommand):
+    help = 'Compute the events most often joined along with each event'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.RELATED_EVENTS_TOP_K)
+        parser.add_argument('--max-pairs', type=int, default=5000000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        rows = related_events(
+            options['top_k'], options['max_pairs'], options['batch_size'])
+        count = store_rankings(
+            RelatedEvent, 'related', rows, options['batch_size'])
+        self.stdout.write(f'{count} related events stored')
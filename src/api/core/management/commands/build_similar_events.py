@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import SimilarEvent
+from core.recommendations import store_rankings
+from core.similarity import similar_events
+
+
+class Command(BaseCommand):
+    help = 'Compute the events with the closest text to each event'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.SIMILAR_EVENTS_TOP_K)
+        parser.add_argument('--max-pairs', type=int, default=5000000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        rows = similar_events(
+            options['top_k'], options['max_pairs'], options['batch_size'])
+        count = store_rankings(
+            SimilarEvent, 'similar', rows, options['batch_size'])
+        self.stdout.write(f'{count} similar events stored')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.jobs import enqueue
+from core.models import Event
+from core.tasks import geocode_event
+
+
+class Command(BaseCommand):
+    help = 'Queue geocoding of events whose coordinates are out of date'
+
+    def handle(self, *args, **options):
+        count = 0
+        for event_id in Event.objects.exclude(
+                address=F('geocoded_address')).values_list(
+                    'pk', flat=True).iterator():
+            enqueue(geocode_event, event_id=event_id)
+            count += 1
+        self.stdout.write(f'{count} events queued')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Event
+from core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recount the participants and comments of every event'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Event.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        count = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                rebuild_rollups(batch)
+            count += len(batch)
+            last_pk = batch[-1]
+        self.stdout.write(f'{count} event rollups rebuilt')
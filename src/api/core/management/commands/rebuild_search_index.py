@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Event
+from core.search import index_event
+
+
+class Command(BaseCommand):
+    help = 'Index the text of existing events for search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Event.objects.order_by('pk').only(
+            'pk', 'title', 'description', 'address', 'is_active')
+        last_pk = 0
+        count = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                for event in batch:
+                    index_event(event)
+            count += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(f'{count} events indexed')
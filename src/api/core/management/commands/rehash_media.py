@@ -0,0 +1,62 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.fields import addressed_name, content_digest, is_addressed
+from core.images import RENDITIONS, rendition_name
+from core.jobs import enqueue
+from core.models import MediaBlob, record_changes
+from core.tasks import IMAGE_FIELDS, render_image
+
+
+class Command(BaseCommand):
+    help = 'Move existing media files to content addressed names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for field, info in IMAGE_FIELDS.items():
+            model, name, rendered = info.model, info.name, info.rendered
+            storage = model._meta.get_field(name).storage
+            queryset = model.objects.exclude(**{name: ''}).exclude(
+                **{f'{name}__isnull': True}).order_by('pk')
+            last_pk = 0
+            count = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk).values_list(
+                    'pk', name)[:options['batch_size']])
+                if not batch:
+                    break
+                for pk, old_name in batch:
+                    if is_addressed(old_name):
+                        continue
+                    if not storage.exists(old_name):
+                        self.stderr.write(f'{field} {pk}: {old_name} missing')
+                        continue
+                    self.rehash(storage, model, pk, name, rendered, old_name)
+                    enqueue(render_image, field=field, pk=pk)
+                    count += 1
+                last_pk = batch[-1][0]
+            self.stdout.write(f'{field}: {count} files rehashed')
+
+    def rehash(self, storage, model, pk, name, rendered, old_name):
+        with storage.open(old_name, 'rb') as f:
+            content = File(f)
+            new_name = addressed_name(old_name, content_digest(content))
+            with transaction.atomic():
+                MediaBlob.objects.get_or_create(name=new_name)
+                MediaBlob.objects.select_for_update().get(name=new_name)
+                if not storage.exists(new_name):
+                    storage.save(new_name, content)
+                updated = model.objects.filter(
+                    pk=pk, **{name: old_name}).update(
+                        **{name: new_name, rendered: ''})
+                if updated:
+                    MediaBlob.acquire(new_name)
+                    record_changes(model, [pk])
+
+        if updated and not model.objects.filter(**{name: old_name}).exists():
+            storage.delete(old_name)
+            for rendition in RENDITIONS:
+                storage.delete(rendition_name(old_name, rendition))
@@ -0,0 +1,71 @@
+import signal
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--pool', choices=('thread', 'process'),
+                            default='thread')
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        concurrency = options['concurrency']
+        if options['pool'] == 'process':
+            # Forked processes must not share the parent's connection
+            connections.close_all()
+            executor = ProcessPoolExecutor(concurrency)
+        else:
+            executor = ThreadPoolExecutor(concurrency)
+
+        pending = {}
+        beaten_at = time.monotonic()
+        with executor:
+            while self.running:
+                if len(pending) < concurrency:
+                    pending.update(
+                        (executor.submit(jobs.run_in_worker, job_id), job_id)
+                        for job_id in jobs.claim(concurrency - len(pending))
+                    )
+                if not pending:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(
+                    pending, timeout=options['poll_interval'],
+                    return_when=FIRST_COMPLETED)
+                for future in done:
+                    del pending[future]
+                    self.stdout.write(f'Job finished: {future.result()}')
+                if (time.monotonic() - beaten_at >=
+                        settings.JOB_QUEUE_HEARTBEAT):
+                    jobs.heartbeat(list(pending.values()))
+                    beaten_at = time.monotonic()
+            while pending:
+                done, _ = wait(pending, timeout=settings.JOB_QUEUE_HEARTBEAT)
+                for future in done:
+                    del pending[future]
+                jobs.heartbeat(list(pending.values()))
+
+    def stop(self, signum, frame):
+        self.stdout.write('Stopping after running jobs finish')
+        self.running = False
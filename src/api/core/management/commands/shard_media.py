@@ -0,0 +1,76 @@
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.fields import is_sharded, shard_path
+from core.images import RENDITIONS, rendition_name
+from core.models import MediaBlob, record_changes
+from core.tasks import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Move flat media files into hashed subdirectories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for field, info in IMAGE_FIELDS.items():
+            model, name, rendered = info.model, info.name, info.rendered
+            storage = model._meta.get_field(name).storage
+            queryset = model.objects.exclude(**{name: ''}).exclude(
+                **{f'{name}__isnull': True}).order_by('pk')
+            last_pk = 0
+            count = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk).values_list(
+                    'pk', name)[:options['batch_size']])
+                if not batch:
+                    break
+                for pk, old_name in batch:
+                    if is_sharded(old_name):
+                        continue
+                    new_name = shard_path(
+                        os.path.dirname(old_name), os.path.basename(old_name))
+                    if self.move(storage, old_name, new_name):
+                        self.rename(model, name, rendered, old_name, new_name)
+                        count += 1
+                    else:
+                        self.stderr.write(f'{field} {pk}: {old_name} missing')
+                last_pk = batch[-1][0]
+            self.stdout.write(f'{field}: {count} files moved')
+
+    def move(self, storage, old_name, new_name):
+        """Move a file and its renditions, resuming an interrupted move"""
+        moves = [(old_name, new_name)] + [
+            (rendition_name(old_name, r), rendition_name(new_name, r))
+            for r in RENDITIONS
+        ]
+        if not storage.exists(old_name) and not storage.exists(new_name):
+            return False
+
+        for source, target in moves:
+            if not storage.exists(source) or storage.exists(target):
+                continue
+            if isinstance(storage, FileSystemStorage):
+                os.makedirs(os.path.dirname(storage.path(target)),
+                            exist_ok=True)
+                os.replace(storage.path(source), storage.path(target))
+            else:
+                with storage.open(source, 'rb') as f:
+                    storage.save(target, f)
+                storage.delete(source)
+        return True
+
+    def rename(self, model, name, rendered, old_name, new_name):
+        """Point every row and the blob at the moved file"""
+        with transaction.atomic():
+            pks = list(model.objects.select_for_update().filter(
+                **{name: old_name}).values_list('pk', flat=True))
+            model.objects.filter(**{name: old_name, rendered: old_name}) \
+                .update(**{name: new_name, rendered: new_name})
+            model.objects.filter(**{name: old_name}).update(**{name: new_name})
+            MediaBlob.objects.filter(name=old_name).update(name=new_name)
+            record_changes(model, pks)
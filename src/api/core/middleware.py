@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+
+from core.db.connections import connect_timing, reset_connect_timing
+from core.routers import use_primary, use_replicas
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaMiddleware:
+    """Read from replicas in safe requests to the REPLICA_VIEW_MODULES
+
+    A response to a write sets a cookie that pins the reads of the client
+    to the primary for REPLICA_STICKY_SECONDS, so users do not miss their
+    own writes while the replicas catch up.
+    """
+    cookie_name = 'primary_until'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary()
+
+        if request.method not in SAFE_METHODS:
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                self.cookie_name, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in SAFE_METHODS and
+                view_func.__module__ in settings.REPLICA_VIEW_MODULES and
+                not self.is_pinned(request)):
+            use_replicas()
+
+    def is_pinned(self, request):
+        """Return whether the client wrote within the sticky window"""
+        try:
+            until = int(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            return False
+        return time.time() < until
+
+
+class ServerTimingMiddleware:
+    """Report the time spent connecting to databases in Server-Timing
+
+    The connect time is given with its share of the whole request, which
+    shows whether persistent or pooled connections would pay off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_connect_timing()
+        started = time.perf_counter()
+        response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        seconds, count = connect_timing()
+        share = seconds / total * 100 if total else 0
+        response['Server-Timing'] = (
+            f'db-connect;dur={seconds * 1000:.1f};'
+            f'desc="{count} connects, {share:.0f}% of request", '
+            f'total;dur={total * 1000:.1f}')
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_auto_20261019_1726'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image_rendered',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='icon_rendered',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
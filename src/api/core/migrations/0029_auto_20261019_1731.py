@@ -0,0 +1,37 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:31
+
+import core.fields
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_auto_20261019_1728'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 't_media_blob',
+            },
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='image',
+            field=core.fields.ContentAddressedImageField(blank=True, null=True, upload_to=core.models.event_image_file_path),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='icon',
+            field=core.fields.ContentAddressedImageField(blank=True, null=True, upload_to=core.models.user_icon_file_path),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:36
+
+import core.fields
+import core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_auto_20261019_1731'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='image',
+            field=core.fields.ContentAddressedImageField(blank=True, db_index=True, null=True, upload_to=core.models.event_image_file_path),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_auto_20261019_1736'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image_placeholder',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='icon_placeholder',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
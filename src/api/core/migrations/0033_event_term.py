@@ -0,0 +1,40 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'ALTER TABLE t_event ADD FULLTEXT INDEX t_event_fulltext '
+            '(title, description, address) WITH PARSER ngram')
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE t_event DROP INDEX t_event_fulltext')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=10)),
+                ('weight', models.IntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='core.Event')),
+            ],
+            options={
+                'db_table': 't_event_term',
+                'unique_together': {('term', 'event')},
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.0.8 on 2026-10-19 08:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_auto_20261019_1753'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_time', 'is_active'], name='t_event_event_t_1e82b9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['fee', 'event_time'], name='t_event_fee_822fe2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'event_time'], name='t_event_status_a02096_idx'),
+        ),
+    ]
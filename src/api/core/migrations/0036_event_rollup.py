@@ -0,0 +1,29 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_auto_20261019_1755'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRollup',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='core.Event')),
+                ('participant_count', models.IntegerField(default=0)),
+                ('cancellation_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 't_event_rollup',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_event_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.SmallIntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_events', to='core.Event')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='core.Event')),
+            ],
+            options={
+                'db_table': 't_related_event',
+                'ordering': ['event', 'rank'],
+                'unique_together': {('event', 'rank')},
+            },
+        ),
+    ]
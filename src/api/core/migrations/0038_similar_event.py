@@ -0,0 +1,29 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_related_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.SmallIntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_events', to='core.Event')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_from', to='core.Event')),
+            ],
+            options={
+                'db_table': 't_similar_event',
+                'ordering': ['event', 'rank'],
+                'unique_together': {('event', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_similar_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventrollup',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+    ]
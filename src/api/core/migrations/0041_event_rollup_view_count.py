@@ -0,0 +1,18 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventrollup',
+            name='view_count',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
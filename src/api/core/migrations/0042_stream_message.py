@@ -0,0 +1,30 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_event_rollup_view_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamMessage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('channel', models.CharField(max_length=50)),
+                ('event', models.CharField(max_length=50)),
+                ('data', models.TextField(default='{}')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'db_table': 't_stream_message',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='streammessage',
+            index=models.Index(fields=['channel', 'id'], name='t_stream_me_channel_fec03e_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_stream_message'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['updated_at'], name='t_event_updated_9c1486_idx'),
+        ),
+    ]
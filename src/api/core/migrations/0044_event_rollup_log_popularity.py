@@ -0,0 +1,35 @@
+# Generated by Django 3.0.8 on 2026-10-19 09:55
+
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Log, Power
+
+
+def store_log_popularity(apps, schema_editor):
+    EventRollup = apps.get_model('core', 'EventRollup')
+    EventRollup.objects.update(popularity=Case(
+        When(popularity__gt=0, then=Log(Value(2.0), F('popularity'))),
+        default=Value(-1e9), output_field=FloatField()))
+
+
+def store_linear_popularity(apps, schema_editor):
+    EventRollup = apps.get_model('core', 'EventRollup')
+    EventRollup.objects.update(popularity=Case(
+        When(popularity__gt=-1e9, then=Power(Value(2.0), F('popularity'))),
+        default=Value(0.0), output_field=FloatField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_event_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventrollup',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=-1000000000.0),
+        ),
+        migrations.RunPython(store_log_popularity, store_linear_popularity),
+    ]
@@ -1,6 +1,5 @@
 import uuid
-import os
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
@@ -12,19 +11,41 @@ from django.utils import timezone
 from django.utils.timezone import localtime
 from django.contrib.staticfiles.storage import staticfiles_storage
 
+from core.fields import ContentAddressedImageField, shard_path
+from core.images import RENDITIONS, rendition_name
+
 
 def user_icon_file_path(instance, filename):
     """Generate file path for new user icon"""
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
-    return os.path.join('uploads/user/', filename)
+    return shard_path('uploads/user/', filename)
 
 
 def event_image_file_path(instance, filename):
     """Generate file path for new event image"""
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
-    return os.path.join('uploads/event/', filename)
+    return shard_path('uploads/event/', filename)
+
+
+class ChangeTrackedModel(models.Model):
+    """Model whose writes are appended to the change outbox"""
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """Save the object and record the change in the same transaction"""
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self)
+        adding = self._state.adding
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            Change.objects.using(using).create(
+                model=self._meta.model_name,
+                object_id=self.pk,
+                action=Change.action_for(self, adding)
+            )
 
 
 class UserManager(BaseUserManager):
@@ -58,7 +79,7 @@ class UserManager(BaseUserManager):
         return self._create_user(email, password, **extra_fields)
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(ChangeTrackedModel, AbstractBaseUser, PermissionsMixin):
     """Custom user model that suppors using email instead of username"""
 
     email = models.EmailField(_('email address'), unique=True)
@@ -68,11 +89,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(_('staff status'), default=False)
     is_guide = models.BooleanField(_('guide status'), default=False)
     introduction = models.TextField(blank=True, max_length=1000)
-    icon = models.ImageField(
+    icon = ContentAddressedImageField(
         null=True,
         blank=True,
         upload_to=user_icon_file_path
     )
+    icon_rendered = models.CharField(max_length=100, blank=True)
+    icon_placeholder = models.CharField(max_length=255, blank=True)
+    follower_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(_('created_at'), default=timezone.now)
     updated_at = models.DateTimeField(_('update_at'), auto_now=True)
 
@@ -82,6 +106,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     DEFAULT_ICON_PATH = "/images/no_user_image.png"
+    ICON_RENDITIONS = ('avatar',)
 
     class Meta:
         db_table = 'm_user'
@@ -97,6 +122,20 @@ class User(AbstractBaseUser, PermissionsMixin):
         else:
             return staticfiles_storage.url(self.DEFAULT_ICON_PATH)
 
+    def get_icon_rendition_url(self, rendition):
+        """Return the rendition URL, or the original until it is rendered"""
+        if self.icon and self.icon_rendered == self.icon.name:
+            return self.icon.storage.url(
+                rendition_name(self.icon.name, rendition))
+        return self.get_icon_url
+
+    @property
+    def get_icon_placeholder(self):
+        """Return the placeholder of the current icon, if computed"""
+        if self.icon and self.icon_rendered == self.icon.name:
+            return self.icon_placeholder
+        return ''
+
     def delete(self):
         """Logical delete the user"""
         self.is_active = False
@@ -104,11 +143,18 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self
 
 
-class Event(models.Model):
+class Event(ChangeTrackedModel):
     """Event object"""
     class Meta:
         db_table = 't_event'
         ordering = ['event_time']
+        indexes = [
+            models.Index(fields=['event_time', 'is_active']),
+            models.Index(fields=['fee', 'event_time']),
+            models.Index(fields=['status', 'event_time']),
+            models.Index(fields=['organizer', 'published_at']),
+            models.Index(fields=['updated_at']),
+        ]
 
     STATUS = (
         ('0', 'Private'),
@@ -123,13 +169,20 @@ class Event(models.Model):
         to_field='id',
         on_delete=models.CASCADE
     )
-    image = models.ImageField(
+    image = ContentAddressedImageField(
         null=True,
         blank=True,
+        db_index=True,
         upload_to=event_image_file_path
     )
+    image_rendered = models.CharField(max_length=100, blank=True)
+    image_placeholder = models.CharField(max_length=255, blank=True)
     event_time = models.DateTimeField(null=False)
     address = models.CharField(null=False, max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+    geocoded_address = models.CharField(max_length=255, blank=True)
     fee = models.IntegerField(
         null=False,
         blank=False,
@@ -138,15 +191,26 @@ class Event(models.Model):
                     MaxValueValidator(100000)]
     )
     status = models.CharField(max_length=10, choices=STATUS, default='0')
+    published_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
     DEFAULT_IMAGE_PATH = "/images/no_event_image.png"
+    IMAGE_RENDITIONS = ('list', 'detail')
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        """Save the event, stamping the time it is first published"""
+        if self.status == '1' and self.published_at is None:
+            self.published_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'published_at'}
+        super().save(*args, **kwargs)
+
     @property
     def get_image_url(self):
         if self.image and hasattr(self.image, 'url'):
@@ -154,6 +218,20 @@ class Event(models.Model):
         else:
             return staticfiles_storage.url(self.DEFAULT_IMAGE_PATH)
 
+    def get_image_rendition_url(self, rendition):
+        """Return the rendition URL, or the original until it is rendered"""
+        if self.image and self.image_rendered == self.image.name:
+            return self.image.storage.url(
+                rendition_name(self.image.name, rendition))
+        return self.get_image_url
+
+    @property
+    def get_image_placeholder(self):
+        """Return the placeholder of the current image, if computed"""
+        if self.image and self.image_rendered == self.image.name:
+            return self.image_placeholder
+        return ''
+
     @property
     def get_brief_event_time(self):
         """Return the event time except millisecond"""
@@ -171,7 +249,7 @@ class Event(models.Model):
         return self
 
 
-class EventComment(models.Model):
+class EventComment(ChangeTrackedModel):
     """EventComment to be used for an Event"""
     class Meta:
         db_table = 't_event_comment'
@@ -207,7 +285,7 @@ class EventComment(models.Model):
         return self
 
 
-class Participant(models.Model):
+class Participant(ChangeTrackedModel):
     """Participant to be used for an Event"""
     class Meta:
         db_table = 't_participant'
@@ -241,3 +319,301 @@ class Participant(models.Model):
         self.is_active = False
         self.save()
         return self
+
+
+class EventTerm(models.Model):
+    """Inverted index row holding an n-gram of an event and its weight"""
+    class Meta:
+        db_table = 't_event_term'
+        unique_together = ('term', 'event')
+
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    term = models.CharField(max_length=10)
+    weight = models.IntegerField()
+
+    def __str__(self):
+        return f'{self.term} ({self.weight})'
+
+
+class EventRollup(models.Model):
+    """Participant and comment counts of an event, kept up to date on writes"""
+    class Meta:
+        db_table = 't_event_rollup'
+
+    # Stored popularity of an event without activity, the log of zero
+    NO_POPULARITY = -1e9
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup'
+    )
+    organizer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='event_rollups'
+    )
+    participant_count = models.IntegerField(default=0)
+    cancellation_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    view_count = models.BigIntegerField(default=0)
+    # log2 of the forward decayed score, see core.rollups.decay_exponent
+    popularity = models.FloatField(default=NO_POPULARITY, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.event_id} ({self.participant_count})'
+
+
+class RelatedEvent(models.Model):
+    """Event often joined by the participants of another event"""
+    class Meta:
+        db_table = 't_related_event'
+        ordering = ['event', 'rank']
+        unique_together = ('event', 'rank')
+
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='related_events'
+    )
+    related = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='related_from'
+    )
+    score = models.FloatField()
+    rank = models.SmallIntegerField()
+
+    def __str__(self):
+        return f'{self.event_id} -> {self.related_id} ({self.score:.3f})'
+
+
+class SimilarEvent(models.Model):
+    """Event whose text is close to the text of another event"""
+    class Meta:
+        db_table = 't_similar_event'
+        ordering = ['event', 'rank']
+        unique_together = ('event', 'rank')
+
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='similar_events'
+    )
+    similar = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='similar_from'
+    )
+    score = models.FloatField()
+    rank = models.SmallIntegerField()
+
+    def __str__(self):
+        return f'{self.event_id} -> {self.similar_id} ({self.score:.3f})'
+
+
+class Follow(models.Model):
+    """User following the events of an organizer"""
+    class Meta:
+        db_table = 't_follow'
+        unique_together = ('follower', 'organizer')
+
+    follower = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='following'
+    )
+    organizer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='followers'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.follower_id} -> {self.organizer_id}'
+
+
+class TimelineEntry(models.Model):
+    """Event published by an organizer a user follows, fanned out to them"""
+    class Meta:
+        db_table = 't_timeline_entry'
+        unique_together = ('user', 'event')
+        indexes = [
+            models.Index(fields=['user', 'published_at', 'event']),
+        ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    event = models.ForeignKey(
+        Event,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    published_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user_id} <- {self.event_id}'
+
+
+class Change(models.Model):
+    """Outbox row appended on every write of a change tracked model"""
+    class Meta:
+        db_table = 't_change'
+        ordering = ['seq']
+
+    ACTION = (
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    )
+
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=30)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=10, choices=ACTION)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.seq} {self.action} {self.model} {self.object_id}'
+
+    @staticmethod
+    def action_for(instance, adding):
+        """Return the action recorded for saving the instance"""
+        if adding:
+            return 'create'
+        if not instance.is_active:
+            return 'delete'
+        return 'update'
+
+
+def record_changes(model, object_ids, action='update'):
+    """Append changes of rows written without save() to the outbox
+
+    Call it in the transaction of the QuerySet.update() it records.
+    """
+    Change.objects.bulk_create([
+        Change(model=model._meta.model_name, object_id=object_id,
+               action=action)
+        for object_id in object_ids
+    ])
+
+
+class StreamMessage(models.Model):
+    """Event stream message relayed between processes by the database"""
+    class Meta:
+        db_table = 't_stream_message'
+        indexes = [models.Index(fields=['channel', 'id'])]
+
+    id = models.BigAutoField(primary_key=True)
+    channel = models.CharField(max_length=50)
+    event = models.CharField(max_length=50)
+    data = models.TextField(default='{}')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.id} {self.channel} {self.event}'
+
+
+class Job(models.Model):
+    """Background job waiting in the database queue"""
+    class Meta:
+        db_table = 't_job'
+        ordering = ['run_at']
+        indexes = [models.Index(fields=['status', 'run_at'])]
+
+    STATUS = (
+        ('0', 'Queued'),
+        ('1', 'Running'),
+        ('2', 'Done'),
+        ('3', 'Failed'),
+    )
+
+    name = models.CharField(max_length=255)
+    payload = models.TextField(default='{}')
+    status = models.CharField(max_length=10, choices=STATUS, default='0')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+
+class MediaBlob(models.Model):
+    """Content addressed media file shared by the rows referencing it"""
+    class Meta:
+        db_table = 't_media_blob'
+
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+    @classmethod
+    def acquire(cls, name):
+        """Count a new reference to the file"""
+        blob, created = cls.objects.get_or_create(name=name)
+        cls.objects.filter(pk=blob.pk).update(
+            refcount=models.F('refcount') + 1)
+
+    @classmethod
+    def release(cls, name, storage):
+        """Drop a reference and delete the file once none is left
+
+        Return whether the file was deleted.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return False
+            blob.refcount = max(blob.refcount - 1, 0)
+            if blob.refcount:
+                blob.save()
+                return False
+            blob.delete()
+            storage.delete(name)
+            for rendition in RENDITIONS:
+                storage.delete(rendition_name(name, rendition))
+            return True
+
+
+class Upload(models.Model):
+    """Ticket for a file uploaded straight to the media storage"""
+    class Meta:
+        db_table = 't_upload'
+
+    FIELD = (
+        ('image', 'Event image'),
+        ('icon', 'User icon'),
+    )
+
+    name = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='uploads'
+    )
+    field = models.CharField(max_length=10, choices=FIELD)
+    content_type = models.CharField(max_length=100)
+    size = models.IntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
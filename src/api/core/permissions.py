@@ -1,3 +1,4 @@
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import BasePermission
 from core.models import Event
 
@@ -30,9 +31,10 @@ class IsValidEvent(BasePermission):
 
     def has_permission(self, request, view):
         pk = request.parser_context['kwargs']['pk']
-        is_event_active = Event.objects.get(pk=pk).is_active
-        event_status = Event.objects.get(pk=pk).status
+        event = Event.objects.filter(pk=pk).only('is_active', 'status').first()
+        if event is None:
+            raise NotFound()
 
         return bool(
-            is_event_active and event_status != '0'
+            event.is_active and event.status != '0'
         )
@@ -0,0 +1,143 @@
+from django.db import transaction
+from django.utils import timezone
+import numpy as np
+
+from core.models import Event, Participant
+
+
+def load_participations(batch_size):
+    """Return the user and event ids of every joined participation
+
+    The rows are read in primary key order in batches, so the database
+    never has to hold a cursor over the whole table.
+    """
+    queryset = Participant.objects.filter(
+        status='1', is_active=True
+    ).order_by('pk').values_list('pk', 'user_id', 'event_id')
+    batches = []
+    last_pk = 0
+    while True:
+        batch = np.array(
+            queryset.filter(pk__gt=last_pk)[:batch_size], dtype=np.int64)
+        if not len(batch):
+            break
+        batches.append(batch[:, 1:])
+        last_pk = int(batch[-1, 0])
+    if not batches:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    rows = np.concatenate(batches)
+    return rows[:, 0], rows[:, 1]
+
+
+def recommendable_events():
+    """Return the events that may be suggested: upcoming and published"""
+    return Event.objects.filter(
+        is_active=True, event_time__gte=timezone.now()
+    ).exclude(status='0')
+
+
+def co_participations(users, events, n_events, candidates, max_pairs,
+                      weights=None):
+    """Yield the nonzero co-participation counts of chunks of events
+
+    The counts are the rows of AᵀA, where A is the user × event matrix of
+    participations, restricted to the candidate events. Each chunk of
+    rows is computed by expanding every participation of the chunk into
+    the other participations of the same user, so a chunk is sized to
+    expand into at most max_pairs pairs. Arrays of the row event, the
+    column event and the count are yielded per chunk. With weights, the
+    entries of A are weighted and the products are summed instead.
+    """
+    n_users = int(users.max()) + 1 if len(users) else 0
+    by_user = np.argsort(users, kind='stable')
+    user_events = events[by_user]
+    degree = np.bincount(users, minlength=n_users)
+    user_start = np.cumsum(degree) - degree
+
+    by_event = np.argsort(events, kind='stable')
+    event_size = np.bincount(events, minlength=n_events)
+    event_start = np.concatenate(([0], np.cumsum(event_size)))
+    cost = np.cumsum(
+        np.bincount(events, weights=degree[users], minlength=n_events))
+
+    begin = 0
+    while begin < n_events:
+        spent = cost[begin - 1] if begin else 0
+        end = max(int(np.searchsorted(cost, spent + max_pairs, 'right')),
+                  begin + 1)
+        chunk = by_event[event_start[begin]:event_start[end]]
+        counts = degree[users[chunk]]
+        total = int(counts.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts,
+                                               counts)
+        pairs = np.repeat(user_start[users[chunk]], counts) + offsets
+        targets = np.repeat(events[chunk], counts)
+        others = user_events[pairs]
+        keep = candidates[others] & (others != targets)
+        keys = (targets[keep] - begin) * n_events + others[keep]
+        if weights is None:
+            keys, co = np.unique(keys, return_counts=True)
+        else:
+            products = (np.repeat(weights[chunk], counts) *
+                        weights[by_user[pairs]])
+            keys, inverse = np.unique(keys, return_inverse=True)
+            co = np.bincount(inverse, weights=products[keep])
+        yield keys // n_events + begin, keys % n_events, co
+        begin = end
+
+
+def top_k(targets, others, scores, k):
+    """Return the k best scored entries of every target and their ranks"""
+    order = np.lexsort((others, -scores, targets))
+    targets = targets[order]
+    rank = np.arange(len(targets)) - np.searchsorted(targets, targets)
+    keep = rank < k
+    return order[keep], rank[keep]
+
+
+def related_events(k, max_pairs, batch_size):
+    """Yield the k events most often joined along with each event
+
+    Events are scored by the cosine similarity of their participant
+    sets, and only upcoming published events are suggested. Tuples of
+    event id, related event id, score and rank are yielded.
+    """
+    user_ids, event_ids = load_participations(batch_size)
+    events, event_index = np.unique(event_ids, return_inverse=True)
+    users = np.unique(user_ids, return_inverse=True)[1]
+    n_events = len(events)
+
+    recommendable = recommendable_events().values_list('pk', flat=True)
+    candidates = np.isin(events, np.fromiter(recommendable, np.int64))
+    size = np.bincount(event_index, minlength=n_events)
+
+    for targets, others, co in co_participations(
+            users, event_index, n_events, candidates, max_pairs):
+        scores = co / np.sqrt(size[targets] * size[others])
+        order, rank = top_k(targets, others, scores, k)
+        for i, r in zip(order, rank):
+            yield (int(events[targets[i]]), int(events[others[i]]),
+                   float(scores[i]), int(r))
+
+
+def store_rankings(model, field, rows, batch_size):
+    """Replace the stored rankings of a model with the rows of a build
+
+    The rows are written in one transaction, so readers see either the
+    previous rankings or the new ones. The number of rows is returned.
+    """
+    count = 0
+    with transaction.atomic():
+        model.objects.all().delete()
+        batch = []
+        for event_id, other_id, score, rank in rows:
+            batch.append(model(**{
+                'event_id': event_id, f'{field}_id': other_id,
+                'score': score, 'rank': rank}))
+            if len(batch) == batch_size:
+                model.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
@@ -0,0 +1,171 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import (
+    Case, Count, F, FloatField, IntegerField, Q, Value, When
+)
+from django.db.models.functions import Abs, Greatest, Log, Power
+from django.utils import timezone
+
+from core.models import Event, EventComment, EventRollup, Participant
+
+
+NO_POPULARITY = EventRollup.NO_POPULARITY
+# Scores within this log2 distance of the weight removed count as zero
+REMOVE_MARGIN = 1e-6
+
+
+def decay_exponent(when):
+    """Return the log2 weight of activity at a time in popularity scores
+
+    Popularity is forward decayed: activity is weighted by 2 to the
+    power of how many half-lives after TRENDING_EPOCH it happened, so
+    stored scores never need updating. Ranking by the stored scores
+    equals ranking by scores decayed to any single moment, and decay is
+    applied only on reads. Scores are stored as their log2, which grows
+    by one per half-life, so they never overflow however far the epoch
+    lies behind.
+    """
+    hours = (when - settings.TRENDING_EPOCH).total_seconds() / 3600
+    return hours / settings.TRENDING_HALF_LIFE_HOURS
+
+
+def log_add(a, b):
+    """Return log2(2 ** a + 2 ** b) without leaving log space"""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def decayed_popularity(popularity, now=None):
+    """Return a stored popularity score decayed to a moment"""
+    if popularity <= NO_POPULARITY:
+        return 0.0
+    return 2 ** (popularity - decay_exponent(now or timezone.now()))
+
+
+def participant_counts(status, is_active):
+    """Return the participant and cancellation counts a row adds"""
+    if not is_active:
+        return 0, 0
+    return (1, 0) if status == '1' else (0, 1)
+
+
+def rebuild_rollups(event_ids):
+    """Count the participants and comments of events from scratch"""
+    participants = Participant.objects.filter(
+        event_id__in=event_ids, is_active=True
+    ).values('event_id').annotate(
+        joined=Count('pk', filter=Q(status='1')),
+        canceled=Count('pk', filter=Q(status='0')),
+    ).order_by()
+    comments = EventComment.objects.filter(
+        event_id__in=event_ids, is_active=True
+    ).values('event_id').annotate(count=Count('pk')).order_by()
+
+    counts = {row['event_id']: row for row in participants}
+    comment_counts = {row['event_id']: row['count'] for row in comments}
+
+    popularity = defaultdict(lambda: NO_POPULARITY)
+    weights = {kind: math.log2(weight)
+               for kind, weight in settings.TRENDING_WEIGHTS.items()}
+    for event_id, joined_at in Participant.objects.filter(
+            event_id__in=event_ids, status='1', is_active=True
+    ).values_list('event_id', 'updated_at'):
+        popularity[event_id] = log_add(
+            popularity[event_id],
+            weights['participant'] + decay_exponent(joined_at))
+    for event_id, created_at in EventComment.objects.filter(
+            event_id__in=event_ids, is_active=True
+    ).values_list('event_id', 'created_at'):
+        popularity[event_id] = log_add(
+            popularity[event_id],
+            weights['comment'] + decay_exponent(created_at))
+
+    events = Event.objects.filter(pk__in=event_ids).values_list(
+        'pk', 'organizer_id')
+    for event_id, organizer_id in events:
+        row = counts.get(event_id, {})
+        EventRollup.objects.update_or_create(event_id=event_id, defaults={
+            'organizer_id': organizer_id,
+            'participant_count': row.get('joined', 0),
+            'cancellation_count': row.get('canceled', 0),
+            'comment_count': comment_counts.get(event_id, 0),
+            'popularity': popularity[event_id],
+        })
+
+
+def add_to_rollup(event_id, weight=0.0, added_at=None, removed_at=None,
+                  **deltas):
+    """Add to the counts of an event with a single UPDATE
+
+    Activity of the given popularity weight is added as made at added_at
+    and removed as made at removed_at, so that it weighs what
+    rebuild_rollups gives it; popularity never goes below zero. Moving
+    activity from one time to another takes a second UPDATE. Events
+    created before the rollup table existed have no row yet, so theirs
+    is counted from scratch instead, which includes the write being
+    applied.
+    """
+    updates = {field: F(field) + delta
+               for field, delta in deltas.items() if delta}
+    changes = []
+    if weight and added_at is not None:
+        changes.append((weight, added_at))
+    if weight and removed_at is not None:
+        changes.append((-weight, removed_at))
+    if changes:
+        change, when = changes.pop(0)
+        updates['popularity'] = add_popularity(change, decay_exponent(when))
+    if not updates:
+        return
+    rollups = EventRollup.objects.filter(event_id=event_id)
+    if not rollups.update(**updates):
+        rebuild_rollups([event_id])
+        return
+    for change, when in changes:
+        rollups.update(
+            popularity=add_popularity(change, decay_exponent(when)))
+
+
+def add_popularity(weight, exponent):
+    """Return the expression adding a weight to a stored popularity
+
+    The sum stays in log space: log2(2 ** a + 2 ** b) is taken as
+    max(a, b) + log2(1 + 2 ** -|a - b|) and log2(2 ** a - 2 ** b) as
+    a + log2(1 - 2 ** (b - a)), so no power of two grows large. Removing
+    at least the whole score leaves NO_POPULARITY.
+    """
+    log_weight = math.log2(abs(weight)) + exponent
+    x = Value(log_weight, output_field=FloatField())
+    if weight > 0:
+        return Greatest(F('popularity'), x) + Log(
+            Value(2.0), 1 + Power(Value(2.0), -Abs(F('popularity') - x)))
+    return Case(
+        When(popularity__gt=log_weight + REMOVE_MARGIN,
+             then=F('popularity') + Log(
+                 Value(2.0), 1 - Power(Value(2.0), x - F('popularity')))),
+        default=Value(NO_POPULARITY), output_field=FloatField())
+
+
+def add_views(counts, batch_size=500):
+    """Add buffered view counts of events to their rollups
+
+    Each batch of events is written with a single UPDATE adding the
+    count of every event. Events without a rollup row get one first.
+    """
+    event_ids = list(counts)
+    for i in range(0, len(event_ids), batch_size):
+        batch = event_ids[i:i + batch_size]
+        views = Case(
+            *[When(event_id=event_id, then=Value(counts[event_id]))
+              for event_id in batch],
+            default=Value(0), output_field=IntegerField())
+        rollups = EventRollup.objects.filter(event_id__in=batch)
+        if rollups.update(view_count=F('view_count') + views) < len(batch):
+            stored = set(rollups.values_list('event_id', flat=True))
+            missing = [event_id for event_id in batch
+                       if event_id not in stored]
+            rebuild_rollups(missing)
+            EventRollup.objects.filter(event_id__in=missing).update(
+                view_count=F('view_count') + views)
@@ -0,0 +1,44 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+_state = threading.local()
+
+
+def use_replicas():
+    """Send the reads of the current thread to the replicas"""
+    _state.replicas = True
+    _state.pinned = False
+
+
+def use_primary():
+    """Send the reads of the current thread to the primary again"""
+    _state.replicas = False
+    _state.pinned = False
+
+
+class ReplicaRouter:
+    """Route reads to a random replica where allowed, writes to the primary
+
+    Reads go to replicas only inside use_replicas, and only until the
+    thread writes or opens a transaction on the primary, so a request
+    always sees its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (not settings.DATABASE_REPLICAS or
+                not getattr(_state, 'replicas', False) or
+                getattr(_state, 'pinned', False) or
+                connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
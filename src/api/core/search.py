@@ -0,0 +1,112 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.expressions import RawSQL
+
+from core.models import Event, EventTerm
+
+
+NGRAM_SIZE = 2
+FIELD_WEIGHTS = {'title': 3, 'address': 2, 'description': 1}
+FULLTEXT_COLUMNS = ('title', 'description', 'address')
+
+_word = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Return text folded for matching: NFKC width and case folded"""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text):
+    """Return the n-grams of the words of a text
+
+    Japanese is written without spaces, so words are cut into n-grams
+    like the MySQL ngram parser does rather than split on whitespace.
+    Words shorter than the n-gram size are kept whole.
+    """
+    tokens = []
+    for word in _word.findall(normalize(text)):
+        if len(word) <= NGRAM_SIZE:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i:i + NGRAM_SIZE]
+                      for i in range(len(word) - NGRAM_SIZE + 1))
+    return tokens
+
+
+def event_terms(event):
+    """Return the weighted term frequencies of an event"""
+    weights = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(event, field)):
+            weights[term] += weight
+    return weights
+
+
+def uses_fulltext():
+    """Return whether the database indexes events with FULLTEXT itself"""
+    return connection.vendor == 'mysql'
+
+
+def index_event(event):
+    """Bring the index rows of an event in line with its text
+
+    Only the terms that were added, removed or reweighted are written,
+    so editing an event touches a handful of rows. The rows are kept on
+    MySQL too, where they give the term frequencies of similar events.
+    """
+    weights = event_terms(event) if event.is_active else Counter()
+    stored = dict(EventTerm.objects.filter(
+        event_id=event.pk).values_list('term', 'weight'))
+
+    removed = [term for term in stored if term not in weights]
+    if removed:
+        EventTerm.objects.filter(event_id=event.pk, term__in=removed).delete()
+    for term, weight in weights.items():
+        if term in stored and stored[term] != weight:
+            EventTerm.objects.filter(event_id=event.pk, term=term).update(
+                weight=weight)
+    EventTerm.objects.bulk_create([
+        EventTerm(event_id=event.pk, term=term, weight=weight)
+        for term, weight in weights.items() if term not in stored
+    ])
+
+
+def search_events(queryset, query):
+    """Return the events matching all terms of a query, best first"""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return queryset.none()
+    if uses_fulltext():
+        return fulltext_search(queryset, query)
+
+    document_counts = dict(EventTerm.objects.filter(term__in=terms).values(
+        'term').annotate(count=Count('id')).values_list('term', 'count'))
+    if len(document_counts) < len(terms):
+        return queryset.none()
+
+    total = Event.objects.filter(is_active=True).count()
+    rank = Sum(Case(
+        *[When(search_terms__term=term, then=F('search_terms__weight') *
+               Value(math.log(1 + total / document_counts[term])))
+          for term in terms],
+        output_field=FloatField()
+    ))
+    return queryset.filter(search_terms__term__in=terms).annotate(
+        matched_terms=Count('search_terms'), rank=rank
+    ).filter(matched_terms=len(terms)).order_by('-rank', '-id')
+
+
+def fulltext_search(queryset, query):
+    """Return events matched by the MySQL FULLTEXT ngram index"""
+    words = ' '.join(f'+"{word}"' for word in _word.findall(normalize(query)))
+    match = (f"MATCH ({', '.join(FULLTEXT_COLUMNS)}) "
+             'AGAINST (%s IN BOOLEAN MODE)')
+    return queryset.annotate(
+        rank=RawSQL(match, (words,), output_field=FloatField())
+    ).filter(rank__gt=0).order_by('-rank', '-id')
@@ -0,0 +1,191 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.broker import event_channel, get_broker
+from core.jobs import enqueue
+from core.models import (
+    Event, EventComment, EventRollup, MediaBlob, Participant, User
+)
+from core.rollups import add_to_rollup, participant_counts
+from core.search import index_event
+from core.tasks import (
+    fan_out_event, geocode_event, needs_geocoding, needs_renditions,
+    refresh_similar_events, render_image
+)
+from image.cache import transcode_cache
+
+
+def publish_on_commit(event_id, name, data):
+    """Publish a message to an event channel once the transaction commits"""
+    channel = event_channel(event_id)
+    transaction.on_commit(
+        lambda: get_broker().publish(channel, name, data))
+
+
+@receiver(post_save, sender=EventComment)
+def publish_event_comment(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        publish_on_commit(instance.event_id, 'comment-created', {
+            'id': instance.id,
+            'user': instance.user_id,
+            'first_name': instance.user.first_name,
+            'icon': instance.user.get_icon_rendition_url('avatar'),
+            'comment': instance.comment,
+            'brief_updated_at': instance.get_brief_updated_at,
+        })
+    elif not instance.is_active:
+        publish_on_commit(instance.event_id, 'comment-deleted', {
+            'id': instance.id,
+        })
+
+
+@receiver(post_save, sender=Participant)
+def publish_participant_count(sender, instance, **kwargs):
+    count = Participant.objects.filter(
+        event_id=instance.event_id, status='1', is_active=True).count()
+    publish_on_commit(instance.event_id, 'participant-count-changed', {
+        'participant_count': count,
+    })
+
+
+@receiver(post_save, sender=Event)
+def render_event_image(sender, instance, **kwargs):
+    if needs_renditions(instance, 'event'):
+        enqueue(render_image, field='event', pk=instance.pk)
+
+
+@receiver(post_save, sender=Event)
+def geocode_event_address(sender, instance, **kwargs):
+    if needs_geocoding(instance):
+        enqueue(geocode_event, event_id=instance.pk)
+
+
+@receiver(post_save, sender=Event)
+def index_event_text(sender, instance, update_fields=None, **kwargs):
+    indexed = {'title', 'description', 'address', 'is_active'}
+    if update_fields is None or indexed & set(update_fields):
+        index_event(instance)
+        enqueue(refresh_similar_events, event_id=instance.pk)
+
+
+@receiver(post_init, sender=Event)
+def remember_published_at(sender, instance, **kwargs):
+    instance._stored_published_at = instance.__dict__.get('published_at')
+
+
+@receiver(post_save, sender=Event)
+def fan_out_published_event(sender, instance, **kwargs):
+    if instance.published_at and not instance._stored_published_at:
+        enqueue(fan_out_event, event_id=instance.pk)
+    instance._stored_published_at = instance.published_at
+
+
+@receiver(post_save, sender=Event)
+def create_event_rollup(sender, instance, created, **kwargs):
+    if created:
+        EventRollup.objects.create(
+            event=instance, organizer_id=instance.organizer_id)
+
+
+@receiver(post_init, sender=Participant)
+def remember_participant_state(sender, instance, **kwargs):
+    instance._rollup_state = participant_counts(
+        instance.__dict__.get('status'), instance.__dict__.get('is_active'))
+    instance._stored_updated_at = instance.__dict__.get('updated_at')
+
+
+@receiver(post_save, sender=Participant)
+def count_participant(sender, instance, created, **kwargs):
+    previous = (0, 0) if created else instance._rollup_state
+    current = participant_counts(instance.status, instance.is_active)
+    # A join weighs as of its updated_at, like in rebuild_rollups
+    joined_at = instance.updated_at if current[0] else None
+    left_at = instance._stored_updated_at if previous[0] else None
+    if joined_at == left_at:
+        joined_at = left_at = None
+    add_to_rollup(
+        instance.event_id,
+        weight=settings.TRENDING_WEIGHTS['participant'],
+        added_at=joined_at,
+        removed_at=left_at,
+        participant_count=current[0] - previous[0],
+        cancellation_count=current[1] - previous[1],
+    )
+    instance._rollup_state = current
+    instance._stored_updated_at = instance.updated_at
+
+
+@receiver(post_init, sender=EventComment)
+def remember_comment_state(sender, instance, **kwargs):
+    instance._rollup_state = int(bool(instance.__dict__.get('is_active')))
+    instance._stored_created_at = instance.__dict__.get('created_at')
+
+
+@receiver(post_save, sender=EventComment)
+def count_comment(sender, instance, created, **kwargs):
+    previous = 0 if created else instance._rollup_state
+    current = int(instance.is_active)
+    add_to_rollup(
+        instance.event_id,
+        weight=settings.TRENDING_WEIGHTS['comment'],
+        added_at=instance.created_at if current > previous else None,
+        removed_at=instance._stored_created_at if previous > current else None,
+        comment_count=current - previous,
+    )
+    instance._rollup_state = current
+    instance._stored_created_at = instance.created_at
+
+
+@receiver(post_save, sender=User)
+def render_user_icon(sender, instance, **kwargs):
+    if needs_renditions(instance, 'user'):
+        enqueue(render_image, field='user', pk=instance.pk)
+
+
+MEDIA_FIELDS = {Event: 'image', User: 'icon'}
+
+
+def file_name(value):
+    """Return the file name held by a file field attribute"""
+    return getattr(value, 'name', value) or ''
+
+
+def release_blob(name, storage):
+    """Release a media file, deleting its transcodes along with it"""
+    if MediaBlob.release(name, storage):
+        transcode_cache.discard(name)
+
+
+def remember_media(sender, instance, **kwargs):
+    value = instance.__dict__.get(MEDIA_FIELDS[sender])
+    instance._stored_media = value if isinstance(value, str) else ''
+
+
+def count_media_references(sender, instance, created, **kwargs):
+    field = MEDIA_FIELDS[sender]
+    current = file_name(getattr(instance, field))
+    previous = '' if created else getattr(instance, '_stored_media', '')
+    if current == previous:
+        return
+
+    if current:
+        MediaBlob.acquire(current)
+    if previous:
+        storage = sender._meta.get_field(field).storage
+        release_blob(previous, storage)
+    instance._stored_media = current
+
+
+def release_media(sender, instance, **kwargs):
+    field = MEDIA_FIELDS[sender]
+    name = file_name(instance.__dict__.get(field))
+    if name:
+        release_blob(name, sender._meta.get_field(field).storage)
+
+
+for model in MEDIA_FIELDS:
+    post_init.connect(remember_media, sender=model)
+    post_save.connect(count_media_references, sender=model)
+    post_delete.connect(release_media, sender=model)
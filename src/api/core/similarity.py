@@ -0,0 +1,171 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+import numpy as np
+
+from core.models import Event, EventTerm, SimilarEvent
+from core.recommendations import (
+    co_participations, recommendable_events, top_k
+)
+
+
+def tfidf(documents, terms, weights, df, n_documents):
+    """Return the L2 normalized TF-IDF values of document term entries
+
+    The term frequencies are the field weighted counts of the search
+    index, damped logarithmically, and the inverse document frequency is
+    the one search ranks with.
+    """
+    values = (1 + np.log(weights)) * np.log(1 + n_documents / df[terms])
+    norms = np.sqrt(np.bincount(documents, weights=values ** 2))
+    return values / norms[documents]
+
+
+def load_terms(batch_size):
+    """Return the event ids, term indices and weights of the term index"""
+    queryset = EventTerm.objects.filter(event__is_active=True).order_by(
+        'pk').values_list('pk', 'event_id', 'term', 'weight')
+    vocabulary = {}
+    event_ids, terms, weights = [], [], []
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        for pk, event_id, term, weight in batch:
+            event_ids.append(event_id)
+            terms.append(vocabulary.setdefault(term, len(vocabulary)))
+            weights.append(weight)
+        last_pk = batch[-1][0]
+    return (np.array(event_ids, np.int64), np.array(terms, np.int64),
+            np.array(weights, np.float64))
+
+
+def similar_events(k, max_pairs, batch_size):
+    """Yield the k events with the closest text to each event
+
+    Events are scored by the cosine similarity of their TF-IDF vectors,
+    computed as the chunked product XXᵀ of the event × term matrix.
+    Terms found in more than SIMILAR_EVENTS_MAX_DF events say little
+    about an event and would expand into too many pairs, so they are
+    left out of the product. Only upcoming published events are
+    suggested. Tuples of event id, similar event id, score and rank are
+    yielded.
+    """
+    event_ids, terms, weights = load_terms(batch_size)
+    events, documents = np.unique(event_ids, return_inverse=True)
+    df = np.bincount(terms)
+    values = tfidf(documents, terms, weights, df,
+                   Event.objects.filter(is_active=True).count())
+
+    recommendable = recommendable_events().values_list('pk', flat=True)
+    candidates = np.isin(events, np.fromiter(recommendable, np.int64))
+    keep = df[terms] <= settings.SIMILAR_EVENTS_MAX_DF
+
+    for targets, others, scores in co_participations(
+            terms[keep], documents[keep], len(events), candidates,
+            max_pairs, weights=values[keep]):
+        order, rank = top_k(targets, others, scores, k)
+        for i, r in zip(order, rank):
+            yield (int(events[targets[i]]), int(events[others[i]]),
+                   float(scores[i]), int(r))
+
+
+def shortlist(event_id, weights):
+    """Return the ids of the events sharing the rarest terms of an event"""
+    df = dict(EventTerm.objects.filter(term__in=weights).values(
+        'term').annotate(df=Count('pk')).values_list('term', 'df'))
+    rare = sorted(
+        (term for term in weights
+         if df.get(term, 0) <= settings.SIMILAR_EVENTS_MAX_DF),
+        key=lambda term: (df.get(term, 0), term)
+    )[:settings.SIMILAR_EVENTS_QUERY_TERMS]
+    return list(EventTerm.objects.filter(
+        term__in=rare, event__is_active=True
+    ).exclude(event_id=event_id).values('event_id').annotate(
+        overlap=Sum('weight')
+    ).order_by('-overlap', 'event_id').values_list(
+        'event_id', flat=True)[:settings.SIMILAR_EVENTS_SHORTLIST])
+
+
+def similarities(event_id, others):
+    """Return the cosine similarities of an event to other events"""
+    ids = [event_id] + others
+    rows = EventTerm.objects.filter(event_id__in=ids).values_list(
+        'event_id', 'term', 'weight')
+    df = dict(EventTerm.objects.filter(
+        term__in=EventTerm.objects.filter(event_id__in=ids).values('term')
+    ).values('term').annotate(df=Count('pk')).values_list('term', 'df'))
+
+    vocabulary = {term: i for i, term in enumerate(df)}
+    index = {pk: i for i, pk in enumerate(ids)}
+    documents, terms, weights = (np.array(column) for column in zip(*(
+        (index[pk], vocabulary[term], weight) for pk, term, weight in rows)))
+    df = np.array(list(df.values()), np.float64)
+    values = tfidf(documents, terms, weights, df,
+                   Event.objects.filter(is_active=True).count())
+    values[df[terms] > settings.SIMILAR_EVENTS_MAX_DF] = 0
+
+    vector = np.zeros(len(vocabulary))
+    own = documents == 0
+    vector[terms[own]] = values[own]
+    scores = np.bincount(documents, weights=values * vector[terms],
+                         minlength=len(ids))
+    return {pk: float(scores[i])
+            for pk, i in index.items() if i and scores[i] > 0}
+
+
+def best(k, ranking):
+    """Return the k best entries of a ranking of (score, event id)"""
+    return sorted(ranking, key=lambda entry: (-entry[0], entry[1]))[:k]
+
+
+def update_similar_events(event_id, k):
+    """Recompute the similar events of an event and place it in theirs
+
+    The events sharing the rarest terms of the event are shortlisted
+    through the term index, and their exact similarities are computed
+    from their term rows alone. The event is then merged into the
+    rankings of the shortlisted events and dropped from the rankings
+    of events it is no longer close to. Rankings of events outside the
+    shortlist are left alone until the next full build.
+    """
+    weights = dict(EventTerm.objects.filter(
+        event_id=event_id, event__is_active=True
+    ).values_list('term', 'weight'))
+    scores = {}
+    if weights:
+        others = shortlist(event_id, weights)
+        if others:
+            scores = similarities(event_id, others)
+
+    recommendable = recommendable_events()
+    suggested = set(recommendable.filter(pk__in=list(scores)).values_list(
+        'pk', flat=True))
+    is_suggested = recommendable.filter(pk=event_id).exists()
+
+    stored = defaultdict(list)
+    listing = SimilarEvent.objects.filter(similar_id=event_id).values(
+        'event_id')
+    for owner, similar, score in SimilarEvent.objects.filter(
+            Q(event_id__in=list(scores)) | Q(event_id__in=listing)
+    ).values_list('event_id', 'similar_id', 'score'):
+        stored[owner].append((score, similar))
+
+    rankings = {event_id: best(k, [
+        (score, pk) for pk, score in scores.items() if pk in suggested])}
+    for owner in set(stored) | set(scores):
+        ranking = [entry for entry in stored[owner] if entry[1] != event_id]
+        if is_suggested and owner in scores:
+            ranking.append((scores[owner], event_id))
+        ranking = best(k, ranking)
+        if ranking != best(k, stored[owner]):
+            rankings[owner] = ranking
+
+    SimilarEvent.objects.filter(event_id__in=list(rankings)).delete()
+    SimilarEvent.objects.bulk_create([
+        SimilarEvent(event_id=owner, similar_id=pk, score=score, rank=rank)
+        for owner, ranking in rankings.items()
+        for rank, (score, pk) in enumerate(ranking)
+    ])
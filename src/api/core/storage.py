@@ -0,0 +1,259 @@
+import datetime
+import hashlib
+import hmac
+import mimetypes
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote, urlencode, urlsplit
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.deconstruct import deconstructible
+
+
+def url_window(expires, now=None):
+    """Return the signing time and expiry of a time-limited URL
+
+    The signing time is rounded down to half the lifetime, so the URL of
+    a file stays the same for a while and can be cached by browsers,
+    while it is always valid for at least half of its lifetime.
+    """
+    now = int(time.time() if now is None else now)
+    window = max(expires // 2, 1)
+    signed_at = now - now % window
+    return signed_at, signed_at + expires
+
+
+def sha256_hex(data):
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def sigv4_key(secret_key, datestamp, region, service):
+    """Return the AWS Signature Version 4 signing key of a day"""
+    key = f'AWS4{secret_key}'.encode()
+    for part in (datestamp, region, service, 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return key
+
+
+def presign(method, url, access_key, secret_key, region, expires,
+            timestamp, headers=None, service='s3'):
+    """Return a URL signed with AWS Signature Version 4 query parameters
+
+    Any headers given are signed too, and the request made to the URL
+    must send them with the same values.
+    """
+    parts = urlsplit(url)
+    headers = dict(
+        {k.lower(): str(v) for k, v in (headers or {}).items()},
+        host=parts.netloc)
+    signed_headers = ';'.join(sorted(headers))
+    amz_date = datetime.datetime.utcfromtimestamp(timestamp).strftime(
+        '%Y%m%dT%H%M%SZ')
+    scope = f'{amz_date[:8]}/{region}/{service}/aws4_request'
+    query = urlencode(sorted({
+        'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+        'X-Amz-Credential': f'{access_key}/{scope}',
+        'X-Amz-Date': amz_date,
+        'X-Amz-Expires': str(expires),
+        'X-Amz-SignedHeaders': signed_headers,
+    }.items()), quote_via=quote, safe='-_.~')
+
+    canonical_headers = ''.join(
+        f'{k}:{headers[k].strip()}\n' for k in sorted(headers))
+    canonical_request = '\n'.join([
+        method, quote(parts.path, safe='/-_.~'), query,
+        canonical_headers, signed_headers, 'UNSIGNED-PAYLOAD'
+    ])
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, sha256_hex(canonical_request)
+    ])
+    key = sigv4_key(secret_key, amz_date[:8], region, service)
+    signature = hmac.new(
+        key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return f'{url}?{query}&X-Amz-Signature={signature}'
+
+
+@deconstructible
+class S3Storage(Storage):
+    """Storage in an S3-compatible object store
+
+    Every request to the store is made with a short-lived presigned URL,
+    and file URLs are presigned GET URLs, so clients download media from
+    the store directly and API nodes share media without a shared disk.
+    """
+    timeout = 30
+    request_expires = 60
+
+    def __init__(self, endpoint_url=None, bucket=None, region=None,
+                 access_key=None, secret_key=None, public_endpoint_url=None,
+                 url_expires=None):
+        self.endpoint_url = (
+            endpoint_url or settings.OBJECT_STORAGE_ENDPOINT_URL).rstrip('/')
+        self.public_endpoint_url = (
+            public_endpoint_url or
+            settings.OBJECT_STORAGE_PUBLIC_ENDPOINT_URL or
+            self.endpoint_url).rstrip('/')
+        self.bucket = bucket or settings.OBJECT_STORAGE_BUCKET
+        self.region = region or settings.OBJECT_STORAGE_REGION
+        self.access_key = access_key or settings.OBJECT_STORAGE_ACCESS_KEY
+        self.secret_key = secret_key or settings.OBJECT_STORAGE_SECRET_KEY
+        self.url_expires = url_expires or settings.OBJECT_STORAGE_URL_EXPIRES
+
+    def object_url(self, name, endpoint_url=None):
+        """Return the unsigned path-style URL of an object"""
+        key = quote(name.replace('\\', '/'), safe='/-_.~')
+        return f'{endpoint_url or self.endpoint_url}/{self.bucket}/{key}'
+
+    def presign(self, method, name, expires=None, timestamp=None,
+                endpoint_url=None, headers=None):
+        if timestamp is None:
+            timestamp = time.time()
+        return presign(
+            method, self.object_url(name, endpoint_url), self.access_key,
+            self.secret_key, self.region, expires or self.request_expires,
+            int(timestamp), headers)
+
+    def request(self, method, name, data=None, headers=None):
+        request = urllib.request.Request(
+            self.presign(method, name), data=data, headers=headers or {},
+            method=method)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def head(self, name):
+        """Return the headers of an object, or None if it does not exist"""
+        try:
+            with self.request('HEAD', name) as response:
+                return response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def _open(self, name, mode='rb'):
+        f = tempfile.SpooledTemporaryFile(max_size=2 ** 20)
+        with self.request('GET', name) as response:
+            for chunk in iter(lambda: response.read(64 * 2 ** 10), b''):
+                f.write(chunk)
+        f.seek(0)
+        return File(f, name)
+
+    def read_head(self, name, size):
+        """Return the first size bytes of an object with a range request"""
+        with self.request('GET', name, headers={
+                'Range': f'bytes=0-{size - 1}'}) as response:
+            return response.read(size)
+
+    def _save(self, name, content):
+        content_type, encoding = mimetypes.guess_type(name)
+        content.seek(0)
+        self.request('PUT', name, data=content, headers={
+            'Content-Length': str(content.size),
+            'Content-Type': content_type or 'application/octet-stream',
+        }).close()
+        return name
+
+    def delete(self, name):
+        try:
+            self.request('DELETE', name).close()
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+
+    def exists(self, name):
+        return self.head(name) is not None
+
+    def size(self, name):
+        headers = self.head(name)
+        if headers is None:
+            raise FileNotFoundError(name)
+        return int(headers['Content-Length'])
+
+    def url(self, name, expires=None):
+        signed_at, expires_at = url_window(expires or self.url_expires)
+        return self.presign(
+            'GET', name, expires_at - signed_at, signed_at,
+            self.public_endpoint_url)
+
+
+def local_signature(method, name, expires_at, content_type='', size=''):
+    return salted_hmac(
+        'core.storage.local_signature',
+        f'{method}:{name}:{expires_at}:{content_type}:{size}').hexdigest()
+
+
+def presign_local(method, name, expires_at, content_type='', size=''):
+    """Return a URL of the signed media view for a local file"""
+    name = name.replace('\\', '/')
+    query = urlencode({
+        'expires': expires_at,
+        'signature': local_signature(
+            method, name, expires_at, content_type, size),
+    })
+    return f"{reverse('image:signedMedia', args=[name])}?{query}"
+
+
+def verify_local(method, name, expires_at, signature, content_type='',
+                 size=''):
+    """Return whether a signed local URL is authentic and not expired"""
+    try:
+        expires_at = int(expires_at)
+    except (TypeError, ValueError):
+        return False
+    if expires_at < time.time():
+        return False
+    return constant_time_compare(signature or '', local_signature(
+        method, name, expires_at, content_type, size))
+
+
+@deconstructible
+class LocalObjectStorage(FileSystemStorage):
+    """Local stand-in for S3Storage with signed, time-limited URLs
+
+    Files are kept under MEDIA_ROOT and their URLs point to the signed
+    media view, which checks the signature and expiry before sending
+    the file like the object store would.
+    """
+
+    def __init__(self, url_expires=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url_expires = url_expires or settings.OBJECT_STORAGE_URL_EXPIRES
+
+    def url(self, name, expires=None):
+        signed_at, expires_at = url_window(expires or self.url_expires)
+        return presign_local('GET', name, expires_at)
+
+
+def read_head(storage, name, size):
+    """Return the first size bytes of a file without reading the rest"""
+    if isinstance(storage, S3Storage):
+        return storage.read_head(name, size)
+    with storage.open(name, 'rb') as f:
+        return f.read(size)
+
+
+def signs_urls(storage):
+    """Return whether a storage hands out signed URLs of its own"""
+    return isinstance(storage, (S3Storage, LocalObjectStorage))
+
+
+def upload_url(storage, name, content_type, size, expires):
+    """Return a signed URL to PUT a file of the given type and size to
+
+    The type and size are part of the signature, so the storage refuses
+    a file other than the one announced.
+    """
+    if isinstance(storage, S3Storage):
+        return storage.presign(
+            'PUT', name, expires, endpoint_url=storage.public_endpoint_url,
+            headers={'Content-Length': size, 'Content-Type': content_type})
+    if isinstance(storage, FileSystemStorage):
+        return presign_local(
+            'PUT', name, int(time.time()) + expires, content_type, size)
+    raise NotImplementedError(
+        f'{storage.__class__.__name__} does not accept direct uploads')
@@ -0,0 +1,98 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+
+from core.images import (
+    generate_renditions, open_image, placeholder, rendition_name
+)
+from core.geo import encode
+from core.geocoders import get_geocoder
+from core.jobs import job
+from core.models import Event, User, record_changes
+from core.similarity import update_similar_events
+from core.timeline import fan_out
+
+
+ImageFieldInfo = namedtuple(
+    'ImageFieldInfo', ('model', 'name', 'rendered', 'placeholder',
+                       'renditions'))
+
+IMAGE_FIELDS = {
+    'event': ImageFieldInfo(Event, 'image', 'image_rendered',
+                            'image_placeholder', Event.IMAGE_RENDITIONS),
+    'user': ImageFieldInfo(User, 'icon', 'icon_rendered',
+                           'icon_placeholder', User.ICON_RENDITIONS),
+}
+
+
+def needs_renditions(instance, field):
+    """Return whether the image of the field has not been rendered yet"""
+    info = IMAGE_FIELDS[field]
+    fieldfile = getattr(instance, info.name)
+    return bool(fieldfile) and (
+        getattr(instance, info.rendered) != fieldfile.name or
+        not getattr(instance, info.placeholder)
+    )
+
+
+@job
+def render_image(field, pk):
+    """Generate the renditions and placeholder of an image"""
+    info = IMAGE_FIELDS[field]
+    instance = info.model.objects.filter(pk=pk).first()
+    if instance is None or not needs_renditions(instance, field):
+        return
+
+    fieldfile = getattr(instance, info.name)
+    storage = fieldfile.storage
+    names = [rendition_name(fieldfile.name, r) for r in info.renditions]
+    if not all(storage.exists(name) for name in names):
+        generate_renditions(fieldfile, info.renditions)
+
+    # The first rendition is the smallest one to read the colors from
+    with storage.open(names[0], 'rb') as f:
+        value = placeholder(open_image(f))
+    with transaction.atomic():
+        if info.model.objects.filter(
+                pk=pk, **{info.name: fieldfile.name}).update(
+                    **{info.rendered: fieldfile.name,
+                       info.placeholder: value}):
+            record_changes(info.model, [pk])
+
+
+def needs_geocoding(event):
+    """Return whether the coordinates of an event are out of date"""
+    return event.address != event.geocoded_address
+
+
+@job
+def geocode_event(event_id):
+    """Store the coordinates of the address of an event"""
+    event = Event.objects.filter(pk=event_id).only(
+        'address', 'geocoded_address').first()
+    if event is None or not needs_geocoding(event):
+        return
+
+    point = get_geocoder().geocode(event.address)
+    latitude, longitude = point or (None, None)
+    with transaction.atomic():
+        if Event.objects.filter(pk=event_id, address=event.address).update(
+            latitude=latitude,
+            longitude=longitude,
+            geohash=encode(latitude, longitude) if point else '',
+            geocoded_address=event.address
+        ):
+            record_changes(Event, [event_id])
+
+
+@job
+def refresh_similar_events(event_id):
+    """Update the similar events of an event and of its neighbours"""
+    update_similar_events(event_id, settings.SIMILAR_EVENTS_TOP_K)
+
+
+@job
+def fan_out_event(event_id):
+    """Add a newly published event to the timelines of the followers"""
+    fan_out(event_id)
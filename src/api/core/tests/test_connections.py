@@ -0,0 +1,123 @@
+from django.db import connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+
+from core.db.backends.sqlite3.base import DatabaseWrapper
+from core.db.connections import ConnectionPool, connect_timing
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_reuse_released_connection(self):
+        """Test a released connection is handed out again"""
+        pool = ConnectionPool(size=1, max_age=None)
+        connection, opened_at = pool.acquire(FakeConnection, lambda c: True)
+        pool.release(connection, opened_at)
+
+        self.assertIs(pool.acquire(FakeConnection, lambda c: True)[0],
+                      connection)
+
+    def test_discard_unusable_and_expired_connections(self):
+        """Test broken or old connections are closed, not handed out"""
+        for max_age, usable in ((None, False), (0, True)):
+            pool = ConnectionPool(size=1, max_age=max_age)
+            connection, opened_at = pool.acquire(
+                FakeConnection, lambda c: True)
+            pool.release(connection, opened_at)
+
+            self.assertIsNot(
+                pool.acquire(FakeConnection, lambda c: usable)[0],
+                connection)
+            self.assertTrue(connection.closed)
+
+    def test_close_beyond_pool_size(self):
+        """Test connections released to a full pool are closed"""
+        pool = ConnectionPool(size=1, max_age=None)
+        first = pool.acquire(FakeConnection, lambda c: True)
+        second = pool.acquire(FakeConnection, lambda c: True)
+        pool.release(*first)
+        pool.release(*second)
+
+        self.assertFalse(first[0].closed)
+        self.assertTrue(second[0].closed)
+
+
+class DatabaseWrapperTests(TestCase):
+    """Test persistent and pooled connections to a SQLite file"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def wrapper(self, **params):
+        settings_dict = dict(
+            connections['default'].settings_dict,
+            NAME=os.path.join(self.directory, 'db.sqlite3'),
+            CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True, POOL_SIZE=0)
+        settings_dict.update(params)
+        wrapper = DatabaseWrapper(settings_dict, alias='persistent')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_persistent_connection_reused(self):
+        """Test a usable connection is kept across requests"""
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        connection = wrapper.connection
+
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, connection)
+
+    def test_dropped_connection_replaced(self):
+        """Test a connection failing its health check is reopened"""
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        connection = wrapper.connection
+
+        wrapper.close_if_unusable_or_obsolete()
+        with patch.object(wrapper, 'is_usable', return_value=False):
+            wrapper.ensure_connection()
+        self.assertIsNot(wrapper.connection, connection)
+
+    def test_pooled_connection_reused(self):
+        """Test a closed connection goes back to the worker's pool"""
+        wrapper = self.wrapper(CONN_MAX_AGE=0, POOL_SIZE=2)
+        wrapper.ensure_connection()
+        connection = wrapper.connection
+
+        wrapper.close()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, connection)
+
+    def test_connect_timed(self):
+        """Test connects are counted for Server-Timing"""
+        wrapper = self.wrapper()
+        count = connect_timing()[1]
+        wrapper.ensure_connection()
+        self.assertEqual(connect_timing()[1], count + 1)
+
+
+class ServerTimingTests(TestCase):
+
+    def test_server_timing_header(self):
+        """Test responses report the database connect time"""
+        res = self.client.get(reverse('event:eventCalendar'),
+                              {'month': '2026-10'})
+        self.assertRegex(
+            res['Server-Timing'],
+            r'^db-connect;dur=[\d.]+;desc="\d+ connects, \d+% of request", '
+            r'total;dur=[\d.]+$')
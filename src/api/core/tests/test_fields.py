@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import make_aware
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+
+from core.fields import is_addressed
+from core.models import Event, MediaBlob
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_image(color='red'):
+    """Return uploaded PNG image content"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+    }
+    default.update(params)
+    return Event.objects.create(organizer=user, **default)
+
+
+def upload(content, name='flyer.PNG'):
+    return SimpleUploadedFile(name, content, 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedImageFieldTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@matsuda.com', 'testpass')
+
+    def test_file_named_by_content_hash(self):
+        """Test an uploaded image is stored under its SHA-256 digest"""
+        content = sample_image()
+        event = sample_event(self.user, image=upload(content))
+
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(
+            event.image.name,
+            f'uploads/event/{digest[:2]}/{digest[2:4]}/{digest}.png')
+        self.assertTrue(os.path.exists(event.image.path))
+
+    def test_identical_uploads_deduplicated(self):
+        """Test the same image uploaded twice is stored once"""
+        content = sample_image()
+        first = sample_event(self.user, image=upload(content))
+        files = os.listdir(os.path.dirname(first.image.path))
+        second = sample_event(self.user, image=upload(content))
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name)
+                         .refcount, 2)
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.image.path)), files)
+
+    def test_file_deleted_with_last_reference(self):
+        """Test a shared file is kept until no event refers to it"""
+        content = sample_image()
+        first = sample_event(self.user, image=upload(content))
+        second = sample_event(self.user, image=upload(content))
+        name = first.image.name
+
+        first = Event.objects.get(pk=first.pk)
+        first.image = upload(sample_image('blue'))
+        first.save()
+        self.assertTrue(default_storage.exists(name))
+
+        second = Event.objects.get(pk=second.pk)
+        second.image = ''
+        second.save()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_rehash_media(self):
+        """Test the rehash command moves legacy files to digest names"""
+        content = sample_image()
+        legacy = default_storage.save('uploads/event/legacy.png',
+                                      io.BytesIO(content))
+        event = sample_event(self.user)
+        Event.objects.filter(pk=event.pk).update(image=legacy)
+
+        call_command('rehash_media', stdout=io.StringIO())
+        call_command('rehash_media', stdout=io.StringIO())
+        event.refresh_from_db()
+
+        self.assertTrue(is_addressed(event.image.name))
+        self.assertTrue(default_storage.exists(event.image.name))
+        self.assertFalse(default_storage.exists(legacy))
+        self.assertEqual(
+            MediaBlob.objects.get(name=event.image.name).refcount, 1)
+
+    def test_shard_media(self):
+        """Test the shard command moves flat files and is resumable"""
+        legacy = default_storage.save(
+            'uploads/event/0123abcd.png', io.BytesIO(sample_image()))
+        event = sample_event(self.user)
+        Event.objects.filter(pk=event.pk).update(
+            image=legacy, image_rendered=legacy)
+
+        call_command('shard_media', stdout=io.StringIO())
+        call_command('shard_media', stdout=io.StringIO())
+        event.refresh_from_db()
+
+        self.assertEqual(event.image.name, 'uploads/event/01/23/0123abcd.png')
+        self.assertEqual(event.image_rendered, event.image.name)
+        self.assertTrue(default_storage.exists(event.image.name))
+        self.assertFalse(default_storage.exists(legacy))
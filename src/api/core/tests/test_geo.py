@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase
+
+from core import geo
+
+
+class GeoTests(SimpleTestCase):
+
+    def test_encode(self):
+        """Test points are encoded to their geohash"""
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.encode(35.658034, 139.701636, 5), 'xn76f')
+
+    def test_distance(self):
+        """Test the great-circle distance between two points"""
+        tokyo, osaka = (35.681236, 139.767125), (34.702485, 135.495951)
+        self.assertAlmostEqual(geo.distance_km(*tokyo, *osaka), 403, delta=1)
+
+    def test_covering_prefixes_contain_circle(self):
+        """Test the covering cells contain every point of the circle"""
+        latitude, longitude, radius = 35.658034, 139.701636, 5
+        prefixes = geo.covering_prefixes(latitude, longitude, radius)
+
+        (south, north), (west, east) = geo.bounding_box(
+            latitude, longitude, radius)
+        for lat in (south, latitude, north):
+            for lng in (west, longitude, east):
+                self.assertTrue(any(geo.encode(lat, lng).startswith(prefix)
+                                    for prefix in prefixes))
+        self.assertLessEqual(len(prefixes), 9)
+        self.assertEqual(len(prefixes[0]), 4)
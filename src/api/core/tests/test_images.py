@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import make_aware
+import base64
+import datetime
+import io
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+
+from core import jobs
+from core.images import rendition_name
+from core.models import Event
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_image(name='test.png', size=(800, 600), color='red'):
+    """Return an uploaded PNG image"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+    }
+    default.update(params)
+    return Event.objects.create(organizer=user, **default)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenditionTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@matsuda.com', 'testpass')
+
+    def test_renditions_generated_on_upload(self):
+        """Test uploading an image queues its renditions"""
+        event = sample_event(self.user, image=sample_image())
+        self.assertEqual(
+            event.get_image_rendition_url('list'), event.get_image_url)
+
+        jobs.run_pending()
+        event.refresh_from_db()
+        for rendition, size in (('list', (480, 360)), ('detail', (1200, 900))):
+            path = os.path.join(
+                MEDIA_ROOT, rendition_name(event.image.name, rendition))
+            with Image.open(path) as image:
+                self.assertEqual(image.size, size)
+            self.assertTrue(event.get_image_rendition_url(rendition)
+                            .endswith(f'_{rendition}.jpg'))
+
+    def test_new_image_falls_back_until_rendered(self):
+        """Test a replaced image is served as is until rendered again"""
+        event = sample_event(self.user, image=sample_image())
+        jobs.run_pending()
+        event.refresh_from_db()
+
+        event.image = sample_image(color='blue')
+        event.save()
+        self.assertEqual(
+            event.get_image_rendition_url('list'), event.get_image_url)
+
+    def test_user_icon_avatar(self):
+        """Test user icons get an avatar rendition"""
+        user = get_user_model().objects.create_user(
+            'icon@matsuda.com', 'testpass', icon=sample_image())
+        jobs.run_pending()
+        user.refresh_from_db()
+
+        self.assertTrue(
+            user.get_icon_rendition_url('avatar').endswith('_avatar.jpg'))
+
+    def test_backfill_renditions(self):
+        """Test the backfill command renders existing images"""
+        event = sample_event(self.user, image=sample_image())
+        sample_event(self.user)
+        jobs.claim(10)
+
+        call_command('backfill_renditions', stdout=io.StringIO())
+        event.refresh_from_db()
+        self.assertEqual(event.image_rendered, event.image.name)
+
+    def test_placeholder_computed_with_renditions(self):
+        """Test a tiny placeholder is stored once the image is rendered"""
+        event = sample_event(self.user, image=sample_image(color='blue'))
+        self.assertEqual(event.get_image_placeholder, '')
+
+        jobs.run_pending()
+        event.refresh_from_db()
+        placeholder = event.get_image_placeholder
+        self.assertTrue(placeholder.startswith('data:image/png;base64,'))
+        self.assertLessEqual(len(placeholder), 255)
+
+        data = base64.b64decode(placeholder.split(',', 1)[1])
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertLessEqual(max(image.size), 4)
+            red, green, blue = image.convert('RGB').getpixel((0, 0))
+            self.assertGreater(blue, 200)
+            self.assertLess(max(red, green), 50)
+
+    def test_backfill_placeholder_of_rendered_image(self):
+        """Test the backfill computes placeholders of rendered images"""
+        event = sample_event(self.user, image=sample_image())
+        jobs.run_pending()
+        Event.objects.filter(pk=event.pk).update(image_placeholder='')
+
+        call_command('backfill_renditions', stdout=io.StringIO())
+        event.refresh_from_db()
+        self.assertNotEqual(event.image_placeholder, '')
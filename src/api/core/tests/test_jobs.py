@@ -0,0 +1,109 @@
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+import datetime
+import io
+
+from core import jobs
+from core.models import Job
+
+
+calls = []
+
+
+@jobs.job(name='test.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@jobs.job(name='test.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('failed')
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Test an enqueued job runs once"""
+        job = jobs.enqueue(record, value=1)
+        self.assertEqual(job.status, '0')
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, '2')
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_delayed_job_not_claimed(self):
+        """Test a job is not claimed before its run time"""
+        jobs.enqueue(record, delay=60, value=1)
+
+        self.assertEqual(jobs.claim(10), [])
+
+    def test_claimed_job_not_claimed_again(self):
+        """Test a claimed job is not handed to another worker"""
+        job = jobs.enqueue(record, value=1)
+
+        self.assertEqual(jobs.claim(10), [job.id])
+        self.assertEqual(jobs.claim(10), [])
+
+    @override_settings(JOB_QUEUE_LOCK_TIMEOUT=0)
+    def test_expired_job_claimed_again(self):
+        """Test a job whose worker died is claimed again"""
+        job = jobs.enqueue(record, value=1)
+        jobs.claim(10)
+
+        self.assertEqual(jobs.claim(10), [job.id])
+
+    def test_heartbeat_keeps_job_claimed(self):
+        """Test a running job whose lock is refreshed is not claimed again"""
+        job = jobs.enqueue(record, value=1)
+        jobs.claim(10)
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - datetime.timedelta(days=1))
+
+        self.assertEqual(jobs.heartbeat([job.id]), 1)
+        self.assertEqual(jobs.claim(10), [])
+
+    @override_settings(JOB_QUEUE_BACKOFF=30)
+    def test_failed_job_retried_with_backoff(self):
+        """Test a failed job is rescheduled, then marked failed"""
+        job = jobs.enqueue(fail)
+        jobs.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, '0')
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertGreater(
+            job.run_at, timezone.now() + datetime.timedelta(seconds=25))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, '3')
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOB_QUEUE_EAGER=True)
+    def test_eager_job_runs_immediately(self):
+        """Test jobs run in place when the queue is eager"""
+        self.assertIsNone(jobs.enqueue(record, value=1))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+
+class RunWorkerCommandTests(TransactionTestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_run_worker_once(self):
+        """Test the worker command runs queued jobs and exits"""
+        jobs.enqueue(record, value=1)
+        jobs.enqueue(record, value=2)
+
+        call_command('run_worker', '--once', '--concurrency=1',
+                     stdout=io.StringIO())
+        self.assertEqual(sorted(calls), [1, 2])
@@ -68,7 +68,7 @@ class ModelTests(TestCase):
         mock_uuid.return_value = uuid
         file_path = models.user_icon_file_path(None, 'iconimage.jpg')
 
-        exp_path = f'uploads/user/{uuid}.jpg'
+        exp_path = f'uploads/user/ic/on/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
 
     def test_event_str(self):
@@ -92,7 +92,7 @@ class ModelTests(TestCase):
         mock_uuid.return_value = uuid
         file_path = models.event_image_file_path(None, 'eventimage.jpg')
 
-        exp_path = f'uploads/event/{uuid}.jpg'
+        exp_path = f'uploads/event/ev/en/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
 
     def test_event_comment_str(self):
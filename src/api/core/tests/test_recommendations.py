@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+import numpy as np
+
+from core.recommendations import co_participations, top_k
+
+
+class RecommendationTests(SimpleTestCase):
+
+    def test_co_participations_match_matrix_product(self):
+        """Test the chunked counts equal the off-diagonal entries of AᵀA"""
+        rng = np.random.default_rng(0)
+        matrix = rng.random((40, 15)) < 0.3
+        users, events = np.nonzero(matrix)
+        candidates = rng.random(15) < 0.7
+        expected = matrix.T.astype(int) @ matrix.astype(int)
+        np.fill_diagonal(expected, 0)
+        expected[:, ~candidates] = 0
+
+        for max_pairs in (1, 30, 10 ** 6):
+            counts = np.zeros_like(expected)
+            for targets, others, co in co_participations(
+                    users, events, 15, candidates, max_pairs):
+                counts[targets, others] += co
+            np.testing.assert_array_equal(counts, expected)
+
+    def test_top_k(self):
+        """Test the best scored entries of each target are ranked"""
+        targets = np.array([0, 0, 0, 1, 1])
+        others = np.array([1, 2, 3, 0, 2])
+        scores = np.array([0.2, 0.9, 0.5, 0.1, 0.3])
+
+        order, rank = top_k(targets, others, scores, 2)
+        self.assertEqual(list(others[order]), [2, 3, 2, 0])
+        self.assertEqual(list(rank), [0, 1, 0, 1])
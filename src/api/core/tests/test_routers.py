@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import make_aware
+import datetime
+import os
+import shutil
+import tempfile
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event
+from core.routers import use_primary, use_replicas
+
+CALENDAR_URL = reverse('event:eventCalendar')
+SEARCH_URL = reverse('event:eventSearch')
+
+
+def sample_event(user, **params):
+    """Return a sample event in October 2026"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': make_aware(datetime.datetime(2026, 10, 3, 12)),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event(organizer=user, **default)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    """Test routing reads to a replica held in a second SQLite database"""
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        name = os.path.join(cls.replica_dir, 'replica.sqlite3')
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': name,
+            'TEST': {'NAME': name},
+        }
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        self.organizer = get_user_model().objects.create_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        sample_event(self.organizer).save()
+
+        replica_organizer = get_user_model()(
+            pk=self.organizer.pk, email='guide@matsuda.com', is_guide=True)
+        get_user_model().objects.using('replica').bulk_create(
+            [replica_organizer])
+        Event.objects.using('replica').bulk_create(
+            [sample_event(replica_organizer) for i in range(3)])
+        self.client = APIClient()
+
+    def calendar_count(self):
+        res = self.client.get(CALENDAR_URL, {'month': '2026-10'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['days'][0]['count']
+
+    def test_safe_requests_read_replica(self):
+        """Test safe requests to the listed views read a replica"""
+        self.assertEqual(self.calendar_count(), 3)
+
+    def test_write_pins_client_to_primary(self):
+        """Test a client reads the primary for a while after writing"""
+        self.client.post(SEARCH_URL)
+        self.assertEqual(self.calendar_count(), 1)
+
+        self.client.cookies['primary_until'] = '0'
+        self.assertEqual(self.calendar_count(), 3)
+
+    def test_reads_after_write_use_primary(self):
+        """Test a thread reads its own writes once it has written"""
+        use_replicas()
+        try:
+            self.assertEqual(Event.objects.count(), 3)
+            sample_event(self.organizer).save()
+            self.assertEqual(Event.objects.count(), 2)
+        finally:
+            use_primary()
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test reads go to the primary unless replicas were chosen"""
+        self.assertEqual(Event.objects.count(), 1)
@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http.multipartparser import MultiPartParser
+from django.urls import reverse
+from django.test import TestCase, override_settings
+import io
+import struct
+import tracemalloc
+import zlib
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from core.uploadhandlers import BoundedImageUploadHandler, UploadTooLarge
+
+
+BOUNDARY = 'BoUnDaRy'
+MAX_TRACED_MEMORY = 4 * 2 ** 20
+LIMITS = {
+    'image': {'max_bytes': 64 * 2 ** 20, 'max_pixels': 10 ** 6},
+    'default': {'max_bytes': 64 * 2 ** 20, 'max_pixels': None},
+}
+
+
+def user_url(user_id):
+    """Return user detail URL"""
+    return reverse('user:user-detail', args=[user_id])
+
+
+def png_chunk(kind, data):
+    """Return an encoded PNG chunk"""
+    return (struct.pack('>I', len(data)) + kind + data +
+            struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def bomb_png(width=50000, height=50000):
+    """Return a tiny PNG whose header claims huge dimensions"""
+    header = struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', header) +
+            png_chunk(b'IDAT', zlib.compress(b'\x00' * 1024)) +
+            png_chunk(b'IEND', b''))
+
+
+def sample_png(size=(100, 100)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class MultipartStream:
+    """File-like multipart body generated lazily, chunk by chunk"""
+
+    def __init__(self, field_name, head, size):
+        self.parts = [
+            (f'--{BOUNDARY}\r\nContent-Disposition: form-data; '
+             f'name="{field_name}"; filename="upload.png"\r\n'
+             'Content-Type: image/png\r\n\r\n').encode() + head
+        ]
+        self.padding = size - len(head)
+        self.tail = f'\r\n--{BOUNDARY}--\r\n'.encode()
+        self.length = len(self.parts[0]) + self.padding + len(self.tail)
+
+    def read(self, size=-1):
+        if self.parts:
+            return self.parts.pop()
+        if self.padding > 0:
+            chunk = b'\x00' * min(size if size > 0 else 2 ** 16,
+                                  self.padding)
+            self.padding -= len(chunk)
+            return chunk
+        tail, self.tail = self.tail, b''
+        return tail
+
+
+def parse(field_name, head, size):
+    """Parse a streamed multipart upload with the bounded handler"""
+    stream = MultipartStream(field_name, head, size)
+    meta = {
+        'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+        'CONTENT_LENGTH': str(stream.length),
+    }
+    parser = MultiPartParser(
+        meta, stream, [BoundedImageUploadHandler()], 'utf-8')
+    return parser.parse()
+
+
+@override_settings(UPLOAD_LIMITS=LIMITS)
+class BoundedImageUploadHandlerTests(TestCase):
+
+    def measure(self, func, *args):
+        tracemalloc.start()
+        try:
+            result = func(*args)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, MAX_TRACED_MEMORY)
+        return result
+
+    def test_large_upload_streamed_to_disk(self):
+        """Test a large upload does not grow memory with its size"""
+        size = 32 * 2 ** 20
+        post, files = self.measure(parse, 'file', b'', size)
+
+        self.assertEqual(files['file'].size, size)
+        self.assertTrue(hasattr(files['file'], 'temporary_file_path'))
+
+    def test_valid_image_accepted(self):
+        """Test an image within the limits is accepted"""
+        post, files = parse('image', sample_png(), len(sample_png()))
+
+        self.assertEqual(files['image'].read(), sample_png())
+
+    def test_oversized_upload_rejected(self):
+        """Test an upload over the byte limit is stopped while streaming"""
+        with self.settings(UPLOAD_LIMITS={
+                'default': {'max_bytes': 2 ** 20, 'max_pixels': None}}):
+            with self.assertRaises(UploadTooLarge):
+                self.measure(parse, 'file', b'', 32 * 2 ** 20)
+
+    def test_decompression_bomb_rejected(self):
+        """Test an image with too many pixels is rejected from its header"""
+        with self.assertRaises(ValidationError):
+            self.measure(parse, 'image', bomb_png(), 32 * 2 ** 20)
+
+    def test_not_image_rejected(self):
+        """Test a file that is not an image is rejected"""
+        with self.assertRaises(ValidationError):
+            parse('image', b'not an image', 12)
+
+
+class UploadApiTests(TestCase):
+    """Test uploads through the API are bounded"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@matsuda.com', 'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_upload_bomb_icon(self):
+        """Test uploading a decompression bomb icon is rejected"""
+        icon = SimpleUploadedFile('bomb.png', bomb_png(), 'image/png')
+        res = self.client.patch(
+            user_url(self.user.id), {'icon': icon}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('icon', res.data)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.icon)
+
+    def test_upload_oversized_icon(self):
+        """Test uploading an icon over the byte limit is rejected"""
+        limits = dict(LIMITS, icon={'max_bytes': 1024, 'max_pixels': 10 ** 6})
+        icon = SimpleUploadedFile(
+            'large.png', sample_png((400, 400)), 'image/png')
+        with self.settings(UPLOAD_LIMITS=limits):
+            res = self.client.patch(
+                user_url(self.user.id), {'icon': icon}, format='multipart')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.icon)
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from core.models import Event, Follow, TimelineEntry, User, record_changes
+
+
+def published_events():
+    """Return the events that may appear on timelines"""
+    return Event.objects.filter(
+        is_active=True, published_at__isnull=False).exclude(status='0')
+
+
+def is_pulled(organizer):
+    """Return whether an organizer has too many followers to fan out to"""
+    return organizer.follower_count > settings.TIMELINE_FANOUT_LIMIT
+
+
+def add_entries(user_ids, events):
+    """Add events to the timelines of users, skipping existing entries"""
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(user_id=user_id, event_id=event.pk,
+                      published_at=event.published_at)
+        for user_id in user_ids for event in events
+    ], ignore_conflicts=True)
+
+
+def fan_out(event_id):
+    """Add a published event to the timelines of the organizer's followers
+
+    Followers are read in batches by primary key. Events of organizers
+    with more than TIMELINE_FANOUT_LIMIT followers are not fanned out;
+    their followers pull them when reading their timelines instead.
+    """
+    event = published_events().select_related('organizer').filter(
+        pk=event_id).first()
+    if event is None or is_pulled(event.organizer):
+        return
+
+    followers = Follow.objects.filter(
+        organizer_id=event.organizer_id
+    ).order_by('pk').values_list('pk', 'follower_id')
+    last_pk = 0
+    while True:
+        batch = list(followers.filter(
+            pk__gt=last_pk)[:settings.TIMELINE_FANOUT_BATCH_SIZE])
+        if not batch:
+            break
+        add_entries([follower_id for pk, follower_id in batch], [event])
+        last_pk = batch[-1][0]
+
+
+def follow(follower, organizer):
+    """Follow an organizer and add its latest events to the timeline
+
+    Return whether the organizer was not followed yet.
+    """
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(
+            follower=follower, organizer=organizer)
+        if not created:
+            return False
+        User.objects.filter(pk=organizer.pk).update(
+            follower_count=F('follower_count') + 1)
+        record_changes(User, [organizer.pk])
+        if not is_pulled(organizer):
+            add_entries([follower.pk], published_events().filter(
+                organizer=organizer
+            ).order_by('-published_at', '-id')[:settings.TIMELINE_BACKFILL])
+    return True
+
+
+def unfollow(follower, organizer):
+    """Stop following an organizer and drop its events from the timeline
+
+    Return whether the organizer was followed.
+    """
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            follower=follower, organizer=organizer).delete()
+        if not deleted:
+            return False
+        User.objects.filter(pk=organizer.pk).update(
+            follower_count=F('follower_count') - 1)
+        record_changes(User, [organizer.pk])
+        TimelineEntry.objects.filter(
+            user=follower, event__organizer=organizer).delete()
+    return True
+
+
+def read_timeline(user, before, limit):
+    """Return a page of the timeline of a user, newest first
+
+    The page holds the events published before the (published_at, id)
+    position given, and whether more events follow it. Fanned out
+    entries are a single range of the timeline index; events of pulled
+    organizers are read from the organizer index and merged in.
+    """
+    entries = TimelineEntry.objects.filter(
+        user=user, event__is_active=True
+    ).exclude(event__status='0')
+    pulled = published_events().filter(organizer__in=Follow.objects.filter(
+        follower=user,
+        organizer__follower_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values('organizer_id'))
+    if before is not None:
+        published_at, event_id = before
+        entries = entries.filter(
+            Q(published_at__lt=published_at) |
+            Q(published_at=published_at, event_id__lt=event_id))
+        pulled = pulled.filter(
+            Q(published_at__lt=published_at) |
+            Q(published_at=published_at, id__lt=event_id))
+
+    events = {entry.event_id: entry.event for entry in entries.select_related(
+        'event', 'event__rollup'
+    ).order_by('-published_at', '-event_id')[:limit + 1]}
+    events.update((event.pk, event) for event in pulled.select_related(
+        'rollup').order_by('-published_at', '-id')[:limit + 1])
+
+    page = sorted(events.values(),
+                  key=lambda event: (event.published_at, event.pk),
+                  reverse=True)
+    return page[:limit], len(page) > limit
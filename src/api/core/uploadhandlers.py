@@ -0,0 +1,80 @@
+import io
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import exceptions, status
+from PIL import Image
+
+
+class UploadTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Uploaded file is too large.'
+    default_code = 'upload_too_large'
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to temporary files within per-field limits
+
+    Every upload is written to disk chunk by chunk, so its size never
+    shows up in worker memory. The byte limit is enforced as chunks
+    arrive, and for image fields the dimensions are read from the first
+    bytes of the file, so a decompression bomb is rejected before
+    anything is decoded.
+    """
+    chunk_size = 64 * 2 ** 10
+    header_size = 256 * 2 ** 10
+
+    def new_file(self, field_name, file_name, content_type,
+                 content_length, charset=None, content_type_extra=None):
+        limits = settings.UPLOAD_LIMITS.get(
+            field_name, settings.UPLOAD_LIMITS['default'])
+        self.max_bytes = limits['max_bytes']
+        self.max_pixels = limits['max_pixels']
+        self.received = 0
+        self.header = b'' if self.max_pixels else None
+
+        if content_length is not None and content_length > self.max_bytes:
+            raise self.too_large(field_name)
+        super().new_file(field_name, file_name, content_type, content_length,
+                         charset, content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.file.close()
+            raise self.too_large(self.field_name)
+
+        if self.header is not None:
+            self.header += raw_data[:self.header_size - len(self.header)]
+            self.check_header()
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.header is not None:
+            self.check_header(complete=True)
+        return super().file_complete(file_size)
+
+    def check_header(self, complete=False):
+        """Validate the image dimensions once the header has arrived"""
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width = height = None
+        except (OSError, SyntaxError, ValueError):
+            if complete or len(self.header) >= self.header_size:
+                self.reject('Upload a valid image.')
+            return
+
+        self.header = None
+        if width is None or width * height > self.max_pixels:
+            self.reject('Image dimensions are too large.')
+
+    def reject(self, message):
+        self.file.close()
+        raise exceptions.ValidationError({self.field_name: [message]})
+
+    def too_large(self, field_name):
+        return UploadTooLarge({
+            field_name: [f'Ensure the file is at most {self.max_bytes} bytes.']
+        })
@@ -0,0 +1,68 @@
+from django.db.models import Count, Q
+import django_filters
+
+from core.models import Event
+
+
+FEE_FACETS = {
+    'free': Q(fee=0),
+    'under_1000': Q(fee__gt=0, fee__lt=1000),
+    'under_3000': Q(fee__gte=1000, fee__lt=3000),
+    'over_3000': Q(fee__gte=3000),
+}
+
+
+class EventFilter(django_filters.FilterSet):
+    """Filter events by fee, status and organizer"""
+    fee_min = django_filters.NumberFilter(field_name='fee', lookup_expr='gte')
+    fee_max = django_filters.NumberFilter(field_name='fee', lookup_expr='lte')
+    is_free = django_filters.BooleanFilter(method='filter_is_free')
+    status = django_filters.MultipleChoiceFilter(choices=Event.STATUS)
+    organizer = django_filters.NumberFilter(field_name='organizer')
+
+    class Meta:
+        model = Event
+        fields = ('fee_min', 'fee_max', 'is_free', 'status', 'organizer')
+
+    def filter_is_free(self, queryset, name, value):
+        return queryset.filter(fee=0) if value else queryset.exclude(fee=0)
+
+    def facet_conditions(self):
+        """Return the conditions of the active filters of each facet"""
+        data = self.form.cleaned_data
+        fee = Q()
+        if data.get('fee_min') is not None:
+            fee &= Q(fee__gte=data['fee_min'])
+        if data.get('fee_max') is not None:
+            fee &= Q(fee__lte=data['fee_max'])
+        if data.get('is_free') is not None:
+            fee &= Q(fee=0) if data['is_free'] else ~Q(fee=0)
+        status = Q(status__in=data['status']) if data.get('status') else Q()
+        return fee, status
+
+    def facet_counts(self):
+        """Return the event counts of every facet value in one query
+
+        Each facet is counted under the filters of the other facets only,
+        so the counts tell what choosing another value would return.
+        """
+        queryset = self.queryset
+        if self.form.cleaned_data.get('organizer') is not None:
+            queryset = queryset.filter(
+                organizer=self.form.cleaned_data['organizer'])
+
+        fee, status = self.facet_conditions()
+        aggregates = {
+            f'fee_{key}': Count('pk', filter=condition & status)
+            for key, condition in FEE_FACETS.items()
+        }
+        aggregates.update({
+            f'status_{value}': Count('pk', filter=Q(status=value) & fee)
+            for value, label in Event.STATUS
+        })
+        counts = queryset.aggregate(**aggregates)
+        return {
+            'fee': {key: counts[f'fee_{key}'] for key in FEE_FACETS},
+            'status': {value: counts[f'status_{value}']
+                       for value, label in Event.STATUS},
+        }
@@ -2,6 +2,9 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
 from core.models import EventComment, Participant, Event
+from core.counters import view_counter
+from core.rollups import decayed_popularity
+from upload.serializers import UploadKeyField, UploadKeySerializerMixin
 
 
 class ListCreateEventCommentSerializer(serializers.ModelSerializer):
@@ -11,16 +14,18 @@ class ListCreateEventCommentSerializer(serializers.ModelSerializer):
     )
     first_name = serializers.ReadOnlyField(source="user.first_name")
     icon = serializers.SerializerMethodField()
+    icon_placeholder = serializers.ReadOnlyField(
+        source="user.get_icon_placeholder")
     brief_updated_at = serializers.SerializerMethodField()
 
     class Meta:
         model = EventComment
         fields = ('id', 'event', 'user', 'first_name',
-                  'icon', 'comment', 'brief_updated_at')
+                  'icon', 'icon_placeholder', 'comment', 'brief_updated_at')
 
     def get_icon(self, participant):
         user = get_user_model().objects.get(pk=participant.user_id)
-        return user.get_icon_url
+        return user.get_icon_rendition_url('avatar')
 
     def get_brief_updated_at(sefl, instance):
         return instance.get_brief_updated_at
@@ -32,15 +37,17 @@ class ListCreateParticipantSerializer(serializers.ModelSerializer):
         queryset=get_user_model().objects.all())
     first_name = serializers.ReadOnlyField(source="user.first_name")
     icon = serializers.SerializerMethodField()
+    icon_placeholder = serializers.ReadOnlyField(
+        source="user.get_icon_placeholder")
 
     class Meta:
         model = Participant
-        fields = ('event', 'user', 'first_name', 'icon')
+        fields = ('event', 'user', 'first_name', 'icon', 'icon_placeholder')
         extra_kwargs = {'event': {'write_only': True}}
 
     def get_icon(self, participant):
         user = get_user_model().objects.get(pk=participant.user_id)
-        return user.get_icon_url
+        return user.get_icon_rendition_url('avatar')
 
 
 class UpdateParticipantSerializer(serializers.ModelSerializer):
@@ -51,26 +58,30 @@ class UpdateParticipantSerializer(serializers.ModelSerializer):
         fields = ('status',)
 
 
-class CreateEventSerializer(serializers.ModelSerializer):
+class CreateEventSerializer(UploadKeySerializerMixin,
+                            serializers.ModelSerializer):
     """Serialize for create event"""
+    image_key = UploadKeyField('image', source='image')
 
     class Meta:
         model = Event
         fields = (
-            'id', 'title', 'description', 'organizer', 'image', 'event_time',
-            'address', 'fee', 'status'
+            'id', 'title', 'description', 'organizer', 'image', 'image_key',
+            'event_time', 'address', 'fee', 'status'
         )
         extra_kwargs = {'fee': {'default': 0}, }
 
 
-class UpdateEventSerializer(serializers.ModelSerializer):
+class UpdateEventSerializer(UploadKeySerializerMixin,
+                            serializers.ModelSerializer):
     """Serialize for update event"""
+    image_key = UploadKeyField('image', source='image')
 
     class Meta:
         model = Event
         fields = (
-            'id', 'title', 'description', 'image', 'event_time', 'address',
-            'fee', 'status'
+            'id', 'title', 'description', 'image', 'image_key', 'event_time',
+            'address', 'fee', 'status'
         )
         extra_kwargs = {
             'fee': {'default': 0},
@@ -85,21 +96,22 @@ class RetrieveEventSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
     event_time = serializers.SerializerMethodField()
     brief_updated_at = serializers.SerializerMethodField()
+    view_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = (
             'id', 'title', 'description', 'organizer', 'organizer_first_name',
             'organizer_icon', 'image', 'event_time', 'address', 'fee',
-            'status', 'brief_updated_at'
+            'status', 'brief_updated_at', 'view_count'
         )
 
     def get_organizer_icon(self, event):
         user = get_user_model().objects.get(pk=event.organizer.id)
-        return user.get_icon_url
+        return user.get_icon_rendition_url('avatar')
 
     def get_image(self, event):
-        return event.get_image_url
+        return event.get_image_rendition_url('detail')
 
     def get_event_time(sefl, event):
         return event.get_brief_event_time
@@ -107,22 +119,29 @@ class RetrieveEventSerializer(serializers.ModelSerializer):
     def get_brief_updated_at(sefl, event):
         return event.get_brief_updated_at
 
+    def get_view_count(self, event):
+        rollup = getattr(event, 'rollup', None)
+        stored = rollup.view_count if rollup is not None else 0
+        return stored + view_counter.pending(event.id)
+
 
 class BriefEventSerializer(serializers.ModelSerializer):
     """Serialize for brief event object"""
     image = serializers.SerializerMethodField()
+    image_placeholder = serializers.ReadOnlyField(
+        source="get_image_placeholder")
     event_time = serializers.SerializerMethodField()
     participant_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = (
-            'id', 'title', 'image', 'event_time', 'address',
-            'participant_count'
+            'id', 'title', 'image', 'image_placeholder', 'event_time',
+            'address', 'participant_count'
         )
 
     def get_image(self, event):
-        return event.get_image_url
+        return event.get_image_rendition_url('list')
 
     def get_event_time(self, event):
         return event.get_brief_event_time
@@ -131,3 +150,35 @@ class BriefEventSerializer(serializers.ModelSerializer):
         participant = Participant.objects.filter(
             event_id=event.id, status='1', is_active=True)
         return participant.count()
+
+
+class NearEventSerializer(BriefEventSerializer):
+    """Serialize for brief event object with its distance"""
+    distance = serializers.SerializerMethodField()
+
+    class Meta(BriefEventSerializer.Meta):
+        fields = BriefEventSerializer.Meta.fields + ('distance',)
+
+    def get_distance(self, event):
+        return round(event.distance, 2)
+
+
+class RelatedEventSerializer(BriefEventSerializer):
+    """Serialize for brief event object counted from its rollup"""
+
+    def get_participant_count(self, event):
+        rollup = getattr(event, 'rollup', None)
+        if rollup is None:
+            return super().get_participant_count(event)
+        return rollup.participant_count
+
+
+class TrendingEventSerializer(RelatedEventSerializer):
+    """Serialize for brief event object with its current popularity"""
+    popularity = serializers.SerializerMethodField()
+
+    class Meta(RelatedEventSerializer.Meta):
+        fields = RelatedEventSerializer.Meta.fields + ('popularity',)
+
+    def get_popularity(self, event):
+        return round(decayed_popularity(event.rollup.popularity), 3)
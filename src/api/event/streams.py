@@ -0,0 +1,85 @@
+import asyncio
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.broker import event_channel, format_sse, get_broker
+from core.models import Event
+
+
+STREAM_PATH = re.compile(r'^/api/events/(?P<pk>\d+)/stream$')
+
+
+def is_streamable(pk):
+    """Return whether updates of the event may be streamed"""
+    return Event.objects.filter(
+        pk=pk, is_active=True).exclude(status='0').exists()
+
+
+class EventStreamApplication:
+    """ASGI application serving event streams on the event loop
+
+    Requests for ``/api/events/<pk>/stream`` are answered here and wait
+    on the broker without holding a thread, every other request is
+    passed on to the Django application.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            match = STREAM_PATH.match(scope['path'])
+        if match is None:
+            return await self.application(scope, receive, send)
+
+        pk = int(match.group('pk'))
+        if not await sync_to_async(is_streamable)(pk):
+            await send({'type': 'http.response.start', 'status': 404,
+                        'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        last_id = None
+        for name, value in scope['headers']:
+            if name == b'last-event-id' and value.isdigit():
+                last_id = int(value)
+
+        # Subscribing may query the database to replay missed messages
+        subscription = await sync_to_async(get_broker().subscribe)(
+            event_channel(pk), last_id)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        with subscription as sub:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await self.send_text(
+                send, f'retry: {settings.EVENT_STREAM_RETRY}\n\n')
+            while not disconnected.done():
+                message = await sub.aget(settings.EVENT_STREAM_HEARTBEAT)
+                if disconnected.done():
+                    break
+                if message is None:
+                    await self.send_text(send, ': keep-alive\n\n')
+                else:
+                    await self.send_text(send, format_sse(message))
+        disconnected.cancel()
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def send_text(send, text):
+        await send({'type': 'http.response.body',
+                    'body': text.encode('utf-8'), 'more_body': True})
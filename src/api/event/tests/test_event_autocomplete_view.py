@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+import datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.autocomplete import title_index
+from core.models import Event
+
+AUTOCOMPLETE_URL = reverse('event:eventAutocomplete')
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, days=1, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=days),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+def titles(res):
+    return [suggestion['title'] for suggestion in res.data]
+
+
+class EventAutocompleteApiTests(TestCase):
+    """Test suggesting event titles from the prefix index"""
+
+    def setUp(self):
+        self.user = sample_user(
+            email='test@matsuda.com', password='testpass')
+        self.client = APIClient()
+        sample_event(self.user, days=3, title='Python もくもく会')
+        sample_event(self.user, days=1, title='Pythonで始める機械学習')
+        sample_event(self.user, days=2, title='ボードゲーム会 Python')
+        sample_event(self.user, days=-1, title='Python 過去の会')
+        sample_event(self.user, days=1, title='Python 非公開', status='0')
+        title_index.warm()
+
+    def test_suggest_upcoming_titles(self):
+        """Test upcoming titles with the prefix are suggested soonest first"""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'pyth'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(titles(res), [
+            'Pythonで始める機械学習', 'ボードゲーム会 Python',
+            'Python もくもく会'
+        ])
+        self.assertEqual(set(res.data[0]), {'id', 'title', 'event_time'})
+
+    def test_suggest_limit(self):
+        """Test the number of suggestions can be limited"""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'ｐｙ', 'limit': 1})
+        self.assertEqual(titles(res), ['Pythonで始める機械学習'])
+
+    def test_suggest_without_queries(self):
+        """Test suggestions are served from memory"""
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 'ボード'})
+        self.assertEqual(titles(res), ['ボードゲーム会 Python'])
+
+    @override_settings(AUTOCOMPLETE_REFRESH_SECONDS=-1)
+    def test_index_follows_changes(self):
+        """Test new, renamed and deleted events are picked up"""
+        event = sample_event(self.user, title='Django Girls')
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'django'})
+        self.assertEqual(titles(res), ['Django Girls'])
+
+        event.title = 'Flask Girls'
+        event.save()
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'django'})
+        self.assertEqual(titles(res), [])
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'girls'})
+        self.assertEqual(titles(res), ['Flask Girls'])
+
+        event.is_active = False
+        event.save()
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'flask'})
+        self.assertEqual(titles(res), [])
+
+    def test_invalid_parameters(self):
+        """Test a prefix and a sane limit are required"""
+        for params in ({}, {'q': ' '}, {'q': 'py', 'limit': 'x'},
+                       {'q': 'py', 'limit': 1000}):
+            res = self.client.get(AUTOCOMPLETE_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from django.utils.timezone import make_aware
+import datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event
+
+CALENDAR_URL = reverse('event:eventCalendar')
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, event_time, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': make_aware(event_time),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+class EventCalendarApiTests(TestCase):
+    """Test counting events per day of a month"""
+
+    def setUp(self):
+        self.user = sample_user(
+            email='test@matsuda.com', password='testpass')
+        self.client = APIClient()
+        sample_event(self.user, datetime.datetime(2026, 10, 3, 10))
+        sample_event(self.user, datetime.datetime(2026, 10, 3, 18),
+                     status='0')
+        sample_event(self.user, datetime.datetime(2026, 10, 31, 23, 30))
+        sample_event(self.user, datetime.datetime(2026, 11, 1, 0, 30))
+        sample_event(self.user, datetime.datetime(2026, 9, 30, 23, 59))
+        deleted = sample_event(self.user, datetime.datetime(2026, 10, 5))
+        deleted.is_active = False
+        deleted.save()
+
+    def test_count_events_per_local_day(self):
+        """Test events are counted by their day in Japan time"""
+        with self.assertNumQueries(1):
+            res = self.client.get(CALENDAR_URL, {'month': '2026-10'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertJSONEqual(res.content, {
+            'month': '2026-10',
+            'days': [
+                {'date': '2026-10-03', 'count': 2},
+                {'date': '2026-10-31', 'count': 1},
+            ]
+        })
+
+    def test_count_events_by_status(self):
+        """Test the counts of each day can be split by status"""
+        res = self.client.get(CALENDAR_URL, {'month': '2026-10',
+                                             'by': 'status'})
+
+        self.assertEqual(res.data['days'][0], {
+            'date': '2026-10-03', 'count': 2,
+            'status': {'0': 1, '1': 1, '2': 0},
+        })
+
+    def test_invalid_month(self):
+        """Test a month in YYYY-MM form is required"""
+        for params in ({}, {'month': '2026-13'}, {'month': '2026/10'}):
+            res = self.client.get(CALENDAR_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -96,6 +96,7 @@ class PublicEventCommentApiTests(TestCase):
                 'user': event_comment.user.id,
                 'first_name': event_comment.user.first_name,
                 'icon': event_comment.user.get_icon_url,
+                'icon_placeholder': '',
                 'comment': event_comment.comment,
                 'brief_updated_at': event_comment.get_brief_updated_at
             }
@@ -146,6 +147,7 @@ class PublicEventCommentApiTests(TestCase):
             'user': self.event_comment.user.id,
             'first_name': self.event_comment.user.first_name,
             'icon': self.event_comment.user.get_icon_url,
+            'icon_placeholder': '',
             'comment': self.event_comment.comment,
             'brief_updated_at': self.event_comment.get_brief_updated_at
         }
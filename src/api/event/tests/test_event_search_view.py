@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.test import TestCase
+from django.utils.timezone import make_aware
+import datetime
+import io
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, EventTerm
+from core.search import tokenize
+
+SEARCH_URL = reverse('event:eventSearch')
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+def result_ids(res):
+    return [event['id'] for event in res.data['results']]
+
+
+class TokenizeTests(TestCase):
+
+    def test_tokenize_japanese(self):
+        """Test Japanese text is cut into bigrams"""
+        self.assertEqual(tokenize('東京タワー'),
+                         ['東京', '京タ', 'タワ', 'ワー'])
+
+    def test_tokenize_normalized(self):
+        """Test width and case are folded before tokenizing"""
+        self.assertEqual(tokenize('ＰＹ　ｶﾌｪ'), ['py', 'カフ', 'フェ'])
+
+
+class EventSearchApiTests(TestCase):
+    """Test searching events through the inverted index"""
+
+    def setUp(self):
+        self.user = sample_user(
+            email='test@matsuda.com', password='testpass')
+        self.client = APIClient()
+
+    def test_search_japanese(self):
+        """Test events are found by words within Japanese text"""
+        tower = sample_event(self.user, title='東京タワー見学会')
+        sample_event(self.user, title='大阪城見学会')
+
+        res = self.client.get(SEARCH_URL, {'q': 'タワー'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(result_ids(res), [tower.id])
+        self.assertEqual(res.data['results'][0]['title'], '東京タワー見学会')
+
+    def test_search_requires_all_words(self):
+        """Test only events containing every word are returned"""
+        both = sample_event(self.user, title='東京 もくもく会',
+                            address='東京都渋谷区')
+        sample_event(self.user, title='大阪 もくもく会')
+
+        res = self.client.get(SEARCH_URL, {'q': 'もくもく 東京'})
+        self.assertEqual(result_ids(res), [both.id])
+
+    def test_search_ranked(self):
+        """Test matches in the title rank above matches in the text"""
+        in_description = sample_event(
+            self.user, title='勉強会', description='Python を学びます')
+        in_title = sample_event(self.user, title='Python 勉強会')
+
+        res = self.client.get(SEARCH_URL, {'q': 'python'})
+        self.assertEqual(result_ids(res), [in_title.id, in_description.id])
+
+    def test_search_hides_private_and_deleted_events(self):
+        """Test private and deleted events are not found"""
+        sample_event(self.user, title='非公開の会', status='0')
+        deleted = sample_event(self.user, title='削除された会')
+        deleted.is_active = False
+        deleted.save()
+
+        for query in ('非公開', '削除'):
+            res = self.client.get(SEARCH_URL, {'q': query})
+            self.assertEqual(result_ids(res), [])
+        self.assertFalse(EventTerm.objects.filter(event=deleted).exists())
+
+    def test_search_without_query(self):
+        """Test a query is required"""
+        res = self.client.get(SEARCH_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_edits(self):
+        """Test the index is updated incrementally as events change"""
+        event = sample_event(self.user, title='ボードゲーム会')
+        unchanged = set(EventTerm.objects.filter(
+            event=event, term='te').values_list('id', flat=True))
+
+        event.title = 'カードゲーム会'
+        event.save()
+
+        res = self.client.get(SEARCH_URL, {'q': 'ボード'})
+        self.assertEqual(result_ids(res), [])
+        res = self.client.get(SEARCH_URL, {'q': 'カード'})
+        self.assertEqual(result_ids(res), [event.id])
+        self.assertEqual(unchanged, set(EventTerm.objects.filter(
+            event=event, term='te').values_list('id', flat=True)))
+
+    def test_rebuild_search_index(self):
+        """Test the command indexes events saved without signals"""
+        event = sample_event(self.user, title='ハンズオン')
+        EventTerm.objects.all().delete()
+
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        res = self.client.get(SEARCH_URL, {'q': 'ハンズオン'})
+        self.assertEqual(result_ids(res), [event.id])
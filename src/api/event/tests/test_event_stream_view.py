@@ -0,0 +1,244 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import make_aware
+import asyncio
+import datetime
+import json
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.broker import DatabaseBroker, InProcessBroker
+from core.models import Event, EventComment, Participant
+from event.streams import EventStreamApplication
+
+
+def stream_url(event_id):
+    """Return event stream URL"""
+    return reverse('event:eventStream', args=[event_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+def parse_sse(content):
+    """Return the (event, data) pairs of an SSE body"""
+    messages = []
+    for frame in content.split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in frame.split('\n')
+            if line and not line.startswith(':')
+        )
+        if 'event' in fields:
+            messages.append((fields['event'], json.loads(fields['data'])))
+    return messages
+
+
+class BrokerTests(TestCase):
+    """Test the in-process broker"""
+
+    def test_publish_to_subscriber(self):
+        """Test a subscriber receives messages of its channel only"""
+        broker = InProcessBroker()
+        with broker.subscribe('a') as subscription:
+            broker.publish('b', 'ignored', {})
+            message = broker.publish('a', 'hello', {'x': 1})
+
+            self.assertEqual(subscription.get(timeout=0), message)
+            self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(broker.subscriber_count('a'), 0)
+
+    def test_subscribe_replays_history_after_last_id(self):
+        """Test subscribing with a last id replays the missed messages"""
+        broker = InProcessBroker()
+        first = broker.publish('a', 'one', {})
+        second = broker.publish('a', 'two', {})
+
+        with broker.subscribe('a', last_id=first.id) as subscription:
+            self.assertEqual(subscription.get(timeout=0), second)
+            self.assertIsNone(subscription.get(timeout=0))
+
+    def test_async_get_wakes_on_publish(self):
+        """Test aget is woken by a publish from another thread"""
+        broker = InProcessBroker()
+
+        async def consume():
+            with broker.subscribe('a') as subscription:
+                loop = asyncio.get_running_loop()
+                loop.call_later(
+                    0.01, loop.run_in_executor, None,
+                    broker.publish, 'a', 'hello', {})
+                return await subscription.aget(timeout=5)
+
+        message = asyncio.run(consume())
+        self.assertEqual(message.event, 'hello')
+
+
+@override_settings(EVENT_STREAM_POLL_SECONDS=0.01)
+class DatabaseBrokerTests(TransactionTestCase):
+    """Test the broker relaying messages through the database"""
+
+    def setUp(self):
+        self.publisher = DatabaseBroker()
+        self.broker = DatabaseBroker()
+        self.addCleanup(self.broker.close)
+
+    def test_publish_from_another_broker(self):
+        """Test a subscriber receives what another process publishes"""
+        with self.broker.subscribe('a') as subscription:
+            self.publisher.publish('b', 'ignored', {})
+            message = self.publisher.publish('a', 'hello', {'x': 1})
+
+            self.assertEqual(subscription.get(timeout=5), message)
+            self.assertIsNone(subscription.get(timeout=0.05))
+
+    def test_subscribe_replays_history_after_last_id(self):
+        """Test subscribing with a last id replays the stored messages"""
+        with self.broker.subscribe('a') as subscription:
+            first = self.publisher.publish('a', 'one', {})
+            second = self.publisher.publish('a', 'two', {})
+            self.assertEqual(subscription.get(timeout=5), first)
+            self.assertEqual(subscription.get(timeout=5), second)
+
+        with self.broker.subscribe('a', last_id=first.id) as subscription:
+            self.assertEqual(subscription.get(timeout=0), second)
+            self.assertIsNone(subscription.get(timeout=0.05))
+
+
+@override_settings(EVENT_STREAM_TIMEOUT=0)
+class EventStreamApiTests(TransactionTestCase):
+    """Test the event stream API"""
+
+    def setUp(self):
+        self.user = sample_user(
+            email='test@matsuda.com',
+            password='testpass',
+            first_name='test'
+        )
+        self.event = sample_event(self.user)
+        self.client = APIClient()
+
+        broker = override_settings(
+            EVENT_STREAM_BROKER='core.broker.InProcessBroker')
+        broker.enable()
+        self.addCleanup(broker.disable)
+
+    def read_stream(self, event_id, last_id=0):
+        res = self.client.get(
+            stream_url(event_id), HTTP_LAST_EVENT_ID=str(last_id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        return b''.join(res.streaming_content).decode('utf-8')
+
+    def test_stream_comment_created_and_deleted(self):
+        """Test streaming comment creation and deletion"""
+        comment = EventComment.objects.create(
+            event=self.event, user=self.user, comment='hello')
+        comment.delete()
+
+        messages = parse_sse(self.read_stream(self.event.id))
+        self.assertEqual(
+            [name for name, data in messages],
+            ['comment-created', 'comment-deleted']
+        )
+        self.assertEqual(messages[0][1]['comment'], 'hello')
+        self.assertEqual(messages[1][1], {'id': comment.id})
+
+    def test_stream_participant_count_changed(self):
+        """Test streaming participant count changes"""
+        participant = Participant.objects.create(
+            event=self.event, user=self.user)
+        participant.status = '0'
+        participant.save()
+
+        messages = parse_sse(self.read_stream(self.event.id))
+        counts = [data['participant_count'] for name, data in messages
+                  if name == 'participant-count-changed']
+        self.assertEqual(counts, [1, 0])
+
+    def test_not_stream_private_event(self):
+        """Test streaming a private event is forbidden"""
+        event = sample_event(self.user, status='0')
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.get(stream_url(event.id))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_not_stream_missing_event(self):
+        """Test streaming an event that does not exist is not found"""
+        res = self.client.get(stream_url(self.event.id + 1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def run_asgi_stream(self):
+        """Stream the event through the ASGI application until a comment
+        is created and return the messages sent"""
+        async def fallback(scope, receive, send):
+            raise AssertionError('stream request reached Django')
+
+        sent = []
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': f'/api/events/{self.event.id}/stream',
+            'headers': [],
+        }
+        application = EventStreamApplication(fallback)
+
+        async def run():
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+                if b'comment-created' in message.get('body', b''):
+                    disconnect.set()
+
+            task = asyncio.ensure_future(application(scope, receive, send))
+            await asyncio.sleep(0.1)
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: EventComment.objects.create(
+                    event=self.event, user=self.user, comment='hi'))
+            await asyncio.wait_for(task, 15)
+
+        asyncio.run(run())
+        return sent
+
+    @override_settings(EVENT_STREAM_HEARTBEAT=0.1)
+    def test_asgi_stream(self):
+        """Test the ASGI application streams broker messages"""
+        sent = self.run_asgi_stream()
+        self.assertEqual(sent[0]['status'], 200)
+        body = b''.join(m.get('body', b'') for m in sent).decode('utf-8')
+        self.assertIn('comment-created', body)
+
+    @override_settings(EVENT_STREAM_BROKER='core.broker.DatabaseBroker',
+                       EVENT_STREAM_POLL_SECONDS=0.01,
+                       EVENT_STREAM_HEARTBEAT=0.1)
+    def test_asgi_stream_database_broker(self):
+        """Test the ASGI application streams with the database broker"""
+        sent = self.run_asgi_stream()
+        self.assertEqual(sent[0]['status'], 200)
+        body = b''.join(m.get('body', b'') for m in sent).decode('utf-8')
+        self.assertIn('comment-created', body)
@@ -13,7 +13,9 @@ import datetime
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core.counters import view_counter
 from core.models import Event
+from event.filters import EventFilter
 
 EVENT_URL = reverse('event:event-list')
 
@@ -73,6 +75,7 @@ class PublicParticipantApiTests(TestCase):
     """Test that publcly available participant API"""
 
     def setUp(self):
+        view_counter.clear()
         self.organizer = sample_user(
             email='testorganaizer@matsuda.com',
             password='testpass'
@@ -101,6 +104,7 @@ class PublicParticipantApiTests(TestCase):
                 'id': self.first_event.id,
                 'title': self.first_event.title,
                 'image': self.first_event.get_image_url,
+                'image_placeholder': '',
                 'event_time': self.first_event.event_time,
                 'address': self.first_event.address,
                 'participant_count': 0
@@ -108,6 +112,7 @@ class PublicParticipantApiTests(TestCase):
                 'id': self.second_event.id,
                 'title': self.second_event.title,
                 'image': self.second_event.get_image_url,
+                'image_placeholder': '',
                 'event_time': self.second_event.event_time,
                 'address': self.second_event.address,
                 'participant_count': 0
@@ -117,7 +122,16 @@ class PublicParticipantApiTests(TestCase):
             "count": 2,
             "next": None,
             "previous": None,
-            "results": expected_json_dict_list
+            "results": expected_json_dict_list,
+            "facets": {
+                "fee": {
+                    "free": 0,
+                    "under_1000": 2,
+                    "under_3000": 0,
+                    "over_3000": 0
+                },
+                "status": {"0": 2, "1": 0, "2": 0}
+            }
         }
         self.assertJSONEqual(res.content, expected_json)
 
@@ -185,6 +199,64 @@ class PublicParticipantApiTests(TestCase):
         res = self.client.get(EVENT_URL, {'start': today})
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_filter_event_list(self):
+        """Test filtering events by fee, status and organizer"""
+        other = sample_user(email='other@matsuda.com', password='testpass')
+        free_event = sample_event(organizer=self.organizer, fee=0)
+        Event.objects.filter(pk=free_event.pk).update(status='1')
+        expensive_event = sample_event(organizer=other, fee=3000)
+        today = datetime.date.today()
+        tomorrow = today + timedelta(days=1)
+        params = {'start': today, 'end': tomorrow}
+
+        def result_ids(**filters):
+            res = self.client.get(EVENT_URL, dict(params, **filters))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return {event['id'] for event in res.data['results']}
+
+        self.assertEqual(result_ids(fee_min=600, fee_max=3000),
+                         {self.second_event.id, expensive_event.id})
+        self.assertEqual(result_ids(is_free='true'), {free_event.id})
+        self.assertEqual(result_ids(status='1'), {free_event.id})
+        self.assertEqual(result_ids(organizer=other.id),
+                         {expensive_event.id})
+
+    def test_event_list_facets(self):
+        """Test facets are counted under the filters of other facets"""
+        free_event = sample_event(organizer=self.organizer, fee=0)
+        Event.objects.filter(pk=free_event.pk).update(status='1')
+        today = datetime.date.today()
+        tomorrow = today + timedelta(days=1)
+
+        res = self.client.get(EVENT_URL, {
+            'start': today, 'end': tomorrow, 'status': '0', 'fee_max': 600})
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['facets'], {
+            'fee': {'free': 0, 'under_1000': 2, 'under_3000': 0,
+                    'over_3000': 0},
+            'status': {'0': 1, '1': 1, '2': 0},
+        })
+
+    def test_event_list_facets_in_one_query(self):
+        """Test all facets are counted by a single aggregate query"""
+        today = datetime.date.today()
+        filterset = EventFilter(
+            {'status': ['0', '1'], 'fee_min': 100},
+            queryset=Event.objects.filter(
+                event_time__date__gte=today, is_active=True))
+        self.assertTrue(filterset.is_valid())
+
+        with self.assertNumQueries(1):
+            filterset.facet_counts()
+
+    def test_not_retrieving_events_by_invalid_filter(self):
+        """Test not retrieving events by invalid filter values"""
+        today = datetime.date.today()
+        res = self.client.get(
+            EVENT_URL, {'start': today, 'end': today, 'status': '9'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_retrieve_event_success(self):
         """Test retrieving event"""
         url = detail_url(self.second_event.id)
@@ -206,7 +278,8 @@ class PublicParticipantApiTests(TestCase):
             'address': event.address,
             'fee': event.fee,
             'status': event.status,
-            'brief_updated_at': event.get_brief_updated_at
+            'brief_updated_at': event.get_brief_updated_at,
+            'view_count': 1
         }
         self.assertJSONEqual(res.content, expected_json_dict)
 
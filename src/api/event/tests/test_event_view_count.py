@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
+import datetime
+import time
+
+from rest_framework.test import APIClient
+
+from core.counters import ViewCounter, view_counter
+from core.models import Event, EventRollup
+
+
+def detail_url(event_id):
+    """Return event detail URL"""
+    return reverse('event:event-detail', args=[event_id])
+
+
+def dashboard_url(user_id):
+    """Return user dashboard URL"""
+    return reverse('user:user-dashboard', args=[user_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=1),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+def stored_views(event):
+    return EventRollup.objects.get(event=event).view_count
+
+
+@override_settings(VIEW_COUNT_MAX_PENDING=3, VIEW_COUNT_FLUSH_SECONDS=3600)
+class EventViewCountTests(TestCase):
+    """Test counting event views with a write-behind buffer"""
+
+    def setUp(self):
+        view_counter.clear()
+        self.organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.event = sample_event(self.organizer)
+        self.other = sample_event(self.organizer)
+        self.client = APIClient()
+
+    def test_views_buffered_until_due(self):
+        """Test views are written in one batch once enough are pending"""
+        self.client.get(detail_url(self.event.id))
+        res = self.client.get(detail_url(self.event.id))
+
+        self.assertEqual(res.data['view_count'], 2)
+        self.assertEqual(stored_views(self.event), 0)
+
+        res = self.client.get(detail_url(self.other.id))
+
+        self.assertEqual(res.data['view_count'], 1)
+        self.assertEqual(stored_views(self.event), 2)
+        self.assertEqual(stored_views(self.other), 1)
+
+    def test_flush_after_interval(self):
+        """Test pending views are written once the interval has passed"""
+        with override_settings(VIEW_COUNT_FLUSH_SECONDS=0):
+            self.client.get(detail_url(self.event.id))
+        self.assertEqual(stored_views(self.event), 1)
+
+    def test_flush_creates_missing_rollups(self):
+        """Test views of events without a rollup row are kept"""
+        EventRollup.objects.filter(event=self.event).delete()
+        view_counter.add(self.event.id)
+        view_counter.flush()
+        self.assertEqual(stored_views(self.event), 1)
+
+    def test_failed_flush_keeps_views(self):
+        """Test views are kept for the next flush when writing fails"""
+        view_counter.add(self.event.id)
+        with patch('core.counters.add_views', side_effect=DatabaseError):
+            view_counter.flush()
+        self.assertEqual(view_counter.pending(self.event.id), 1)
+
+        view_counter.flush()
+        self.assertEqual(stored_views(self.event), 1)
+
+    def test_dashboard_view_count(self):
+        """Test the dashboard sums the written views"""
+        for i in range(3):
+            self.client.get(detail_url(self.event.id))
+        self.client.force_authenticate(self.organizer)
+
+        res = self.client.get(dashboard_url(self.organizer.id))
+
+        self.assertEqual(res.data['view_count'], 3)
+        self.assertEqual(
+            {event['id']: event['view_count']
+             for event in res.data['upcoming_events']},
+            {self.event.id: 3, self.other.id: 0})
+
+
+@override_settings(VIEW_COUNT_MAX_PENDING=100, VIEW_COUNT_FLUSH_SECONDS=0.2)
+class EventViewCountFlushTests(TransactionTestCase):
+    """Test the background flush of buffered event views"""
+
+    def setUp(self):
+        self.organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.event = sample_event(self.organizer)
+        self.counter = ViewCounter()
+
+    def tearDown(self):
+        self.counter.close()
+
+    def test_idle_worker_flushes(self):
+        """Test pending views are written without further views"""
+        self.counter.add(self.event.id)
+        self.assertEqual(stored_views(self.event), 0)
+
+        deadline = time.monotonic() + 5
+        while not stored_views(self.event) and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        self.assertEqual(self.counter.pending(self.event.id), 0)
+        self.assertEqual(stored_views(self.event), 1)
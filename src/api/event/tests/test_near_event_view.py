@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from django.utils.timezone import make_aware
+import datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Event
+
+NEAR_URL = reverse('event:nearEvent')
+SHIBUYA = {'lat': 35.658034, 'lng': 139.701636}
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': make_aware(datetime.datetime(2026, 10, 24, 13)),
+        'address': '東京都渋谷区渋谷2-21-1',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+def result_ids(res):
+    return [event['id'] for event in res.data['results']]
+
+
+class NearEventApiTests(TestCase):
+    """Test listing events near a point"""
+
+    def setUp(self):
+        self.user = sample_user(
+            email='test@matsuda.com', password='testpass')
+        self.client = APIClient()
+
+    def test_geocode_event(self):
+        """Test the coordinates of an event are filled from its address"""
+        event = sample_event(self.user)
+        jobs.run_pending()
+
+        event.refresh_from_db()
+        self.assertAlmostEqual(event.latitude, 35.658034)
+        self.assertAlmostEqual(event.longitude, 139.701636)
+        self.assertTrue(event.geohash.startswith('xn76f'))
+
+        event.address = '大阪府大阪市北区梅田3-1-1'
+        event.save()
+        jobs.run_pending()
+        event.refresh_from_db()
+        self.assertTrue(event.geohash.startswith('xn0m'))
+
+    def test_unknown_address(self):
+        """Test events at addresses the geocoder does not know are kept"""
+        event = sample_event(self.user, address='どこか')
+        jobs.run_pending()
+
+        event.refresh_from_db()
+        self.assertIsNone(event.latitude)
+        self.assertEqual(event.geohash, '')
+        self.assertEqual(event.geocoded_address, 'どこか')
+
+    def test_events_within_radius(self):
+        """Test events within the radius are listed nearest first"""
+        shibuya = sample_event(self.user)
+        shinjuku = sample_event(self.user, address='東京都新宿区西新宿2-8-1')
+        sample_event(self.user, address='神奈川県横浜市中区')
+        sample_event(self.user, address='大阪府大阪市北区梅田3-1-1')
+        sample_event(self.user, status='0')
+        jobs.run_pending()
+
+        res = self.client.get(NEAR_URL, SHIBUYA)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(result_ids(res), [shibuya.id, shinjuku.id])
+        self.assertEqual(res.data['results'][0]['distance'], 0)
+        self.assertAlmostEqual(
+            res.data['results'][1]['distance'], 4.0, delta=0.1)
+
+        res = self.client.get(NEAR_URL, dict(SHIBUYA, radius=1))
+        self.assertEqual(result_ids(res), [shibuya.id])
+
+    def test_events_within_dates(self):
+        """Test nearby events can be limited to a date range"""
+        weekend = sample_event(self.user)
+        sample_event(self.user, event_time=make_aware(
+            datetime.datetime(2026, 10, 27, 19)))
+        jobs.run_pending()
+
+        res = self.client.get(NEAR_URL, dict(
+            SHIBUYA, start='2026-10-24', end='2026-10-25'))
+        self.assertEqual(result_ids(res), [weekend.id])
+
+    def test_invalid_parameters(self):
+        """Test invalid points and radii are rejected"""
+        for params in ({}, {'lat': 35}, dict(SHIBUYA, radius=500),
+                       dict(SHIBUYA, lat=95), dict(SHIBUYA, start='x')):
+            res = self.client.get(NEAR_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
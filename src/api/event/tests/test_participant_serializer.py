@@ -70,12 +70,14 @@ class ParticipantSerializerApiTests(TestCase):
             {
                 'user': self.organizer_user.id,
                 'first_name': self.organizer_user.first_name,
-                'icon': '/static/images/no_user_image.png'
+                'icon': '/static/images/no_user_image.png',
+                'icon_placeholder': ''
             },
             {
                 'user': self.participant_user.id,
                 'first_name': self.participant_user.first_name,
-                'icon': '/static/images/no_user_image.png'
+                'icon': '/static/images/no_user_image.png',
+                'icon_placeholder': ''
             }
         ]
         self.assertEqual(serializer.data, expected_dict_list)
@@ -99,7 +101,8 @@ class ParticipantSerializerApiTests(TestCase):
         expected_dict = {
             'user': new_participant.id,
             'first_name': new_participant.first_name,
-            'icon': '/static/images/no_user_image.png'
+            'icon': '/static/images/no_user_image.png',
+            'icon_placeholder': ''
         }
         self.assertEqual(serializer.data, expected_dict)
 
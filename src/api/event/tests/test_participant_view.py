@@ -101,7 +101,8 @@ class PublicParticipantApiTests(TestCase):
             expected_json_dict = {
                 'user': participant.user.id,
                 'first_name': participant.user.first_name,
-                'icon': participant.user.get_icon_url
+                'icon': participant.user.get_icon_url,
+                'icon_placeholder': ''
             }
             expected_json_dict_list.append(expected_json_dict)
 
@@ -118,7 +119,8 @@ class PublicParticipantApiTests(TestCase):
         expected_json_dict_list = [{
             'user': self.participant_one.user.id,
             'first_name': self.participant_one.user.first_name,
-            'icon': self.participant_one.user.get_icon_url
+            'icon': self.participant_one.user.get_icon_url,
+            'icon_placeholder': ''
         }]
         self.assertJSONEqual(res.content, expected_json_dict_list)
 
@@ -134,7 +136,8 @@ class PublicParticipantApiTests(TestCase):
         expected_json_dict_list = [{
             'user': self.participant_one.user.id,
             'first_name': self.participant_one.user.first_name,
-            'icon': self.participant_one.user.get_icon_url
+            'icon': self.participant_one.user.get_icon_url,
+            'icon_placeholder': ''
         }]
         self.assertJSONEqual(res.content, expected_json_dict_list)
 
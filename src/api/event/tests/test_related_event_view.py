@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+import datetime
+import io
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, Participant, RelatedEvent
+
+
+def related_url(event_id):
+    """Return related event URL"""
+    return reverse('event:relatedEvent', args=[event_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, days=1, **params):
+    """Create and return a sample event some days from now"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=days),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+def build_related_events():
+    call_command('build_related_events', stdout=io.StringIO())
+
+
+class RelatedEventApiTests(TestCase):
+    """Test listing the events joined along with an event"""
+
+    def setUp(self):
+        self.organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.users = [
+            sample_user(email=f'user{i}@matsuda.com', password='testpass')
+            for i in range(4)
+        ]
+        self.event = sample_event(self.organizer)
+        self.client = APIClient()
+
+    def join(self, event, users):
+        for user in users:
+            Participant.objects.create(event=event, user=user)
+
+    def test_related_events_ranked(self):
+        """Test events sharing more participants rank first"""
+        close = sample_event(self.organizer, days=2)
+        far = sample_event(self.organizer, days=3)
+        sample_event(self.organizer, days=4)
+        self.join(self.event, self.users[:3])
+        self.join(close, self.users[:3])
+        self.join(far, self.users[2:])
+        build_related_events()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(related_url(self.event.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['id'] for event in res.data],
+                         [close.id, far.id])
+        self.assertEqual(res.data[0]['participant_count'], 3)
+
+    def test_related_events_hide_past_and_private_events(self):
+        """Test only upcoming published events are suggested"""
+        past = sample_event(self.organizer, days=-1)
+        private = sample_event(self.organizer, status='0')
+        for event in (self.event, past, private):
+            self.join(event, self.users[:2])
+        build_related_events()
+
+        res = self.client.get(related_url(self.event.id))
+        self.assertEqual(res.data, [])
+        self.assertEqual(
+            RelatedEvent.objects.filter(related__in=[past, private]).count(),
+            0)
+
+    def test_related_events_ignore_cancellations(self):
+        """Test cancelled participations do not relate events"""
+        other = sample_event(self.organizer, days=2)
+        self.join(self.event, self.users[:1])
+        Participant.objects.create(
+            event=other, user=self.users[0], status='0')
+        build_related_events()
+
+        res = self.client.get(related_url(self.event.id))
+        self.assertEqual(res.data, [])
+
+    def test_build_replaces_previous_ranking(self):
+        """Test rebuilding drops relations that no longer hold"""
+        other = sample_event(self.organizer, days=2)
+        self.join(self.event, self.users[:1])
+        self.join(other, self.users[:1])
+        build_related_events()
+        Participant.objects.get(event=other, user=self.users[0]).delete()
+        build_related_events()
+
+        self.assertFalse(RelatedEvent.objects.exists())
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+import datetime
+import io
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Event, SimilarEvent
+
+
+def similar_url(event_id):
+    """Return similar event URL"""
+    return reverse('event:similarEvent', args=[event_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, title, days=1, **params):
+    """Create and return a sample event some days from now"""
+    default = {
+        'description': '',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=days),
+        'address': '',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, title=title, **default)
+
+
+class SimilarEventApiTests(TestCase):
+    """Test listing the events with the closest text to an event"""
+
+    def setUp(self):
+        self.user = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.event = sample_event(
+            self.user, 'Python もくもく会', description='Django で開発します')
+        self.client = APIClient()
+
+    def similar_ids(self, event):
+        res = self.client.get(similar_url(event.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [similar['id'] for similar in res.data]
+
+    def test_similar_events_ranked(self):
+        """Test events sharing more of the text rank first"""
+        close = sample_event(
+            self.user, 'Python もくもく会', description='Flask で開発します')
+        far = sample_event(self.user, 'Python 入門')
+        sample_event(self.user, '東京タワー見学')
+        jobs.run_pending()
+
+        self.assertEqual(self.similar_ids(self.event), [close.id, far.id])
+
+    def test_new_event_joins_existing_rankings(self):
+        """Test a new event is suggested from the events it resembles"""
+        jobs.run_pending()
+        self.assertEqual(self.similar_ids(self.event), [])
+
+        new = sample_event(self.user, 'Django もくもく会')
+        jobs.run_pending()
+
+        self.assertEqual(self.similar_ids(self.event), [new.id])
+        self.assertEqual(self.similar_ids(new), [self.event.id])
+
+    def test_edited_event_leaves_rankings(self):
+        """Test an event is dropped where its new text no longer matches"""
+        other = sample_event(self.user, 'Python もくもく会')
+        jobs.run_pending()
+        self.assertEqual(self.similar_ids(self.event), [other.id])
+
+        other.title = '東京タワー見学'
+        other.save()
+        jobs.run_pending()
+
+        self.assertEqual(self.similar_ids(self.event), [])
+
+    def test_similar_events_hide_past_and_private_events(self):
+        """Test only upcoming published events are suggested"""
+        sample_event(self.user, 'Python もくもく会', days=-1)
+        sample_event(self.user, 'Python もくもく会', status='0')
+        jobs.run_pending()
+
+        self.assertEqual(self.similar_ids(self.event), [])
+        self.assertFalse(SimilarEvent.objects.filter(
+            event=self.event).exists())
+
+    def test_build_matches_incremental_updates(self):
+        """Test the full build ranks events like the incremental updates"""
+        for title in ('Python もくもく会', 'Python 入門', 'Django 勉強会'):
+            sample_event(self.user, title)
+        jobs.run_pending()
+        incremental = list(SimilarEvent.objects.values_list(
+            'event_id', 'similar_id', 'rank'))
+
+        call_command('build_similar_events', stdout=io.StringIO())
+
+        self.assertEqual(
+            incremental,
+            list(SimilarEvent.objects.values_list(
+                'event_id', 'similar_id', 'rank')))
@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
+import datetime
+import io
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, EventComment, EventRollup, Participant
+from core.rollups import decay_exponent, decayed_popularity
+
+TRENDING_URL = reverse('event:trendingEvent')
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, days=1, **params):
+    """Create and return a sample event some days from now"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=days),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+class TrendingEventApiTests(TestCase):
+    """Test listing events by their decayed popularity"""
+
+    def setUp(self):
+        self.organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.users = [
+            sample_user(email=f'user{i}@matsuda.com', password='testpass')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def join(self, event, users):
+        for user in users:
+            Participant.objects.create(event=event, user=user)
+
+    def trending_ids(self):
+        res = self.client.get(TRENDING_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [event['id'] for event in res.data['results']]
+
+    def test_decay_exponent(self):
+        """Test activity weighs twice as much one half-life later"""
+        half_life = datetime.timedelta(
+            hours=settings.TRENDING_HALF_LIFE_HOURS)
+        now = timezone.now()
+        self.assertAlmostEqual(
+            decay_exponent(now + half_life) - decay_exponent(now), 1)
+
+    def test_popularity_far_from_epoch(self):
+        """Test scores stay finite and exact centuries after the epoch"""
+        event = sample_event(self.organizer)
+        later = settings.TRENDING_EPOCH + datetime.timedelta(days=365 * 300)
+
+        with patch('django.utils.timezone.now', return_value=later):
+            self.join(event, self.users)
+            participant = Participant.objects.get(
+                event=event, user=self.users[1])
+            participant.status = '0'
+            participant.save()
+            rollup = EventRollup.objects.get(event=event)
+            self.assertAlmostEqual(
+                decayed_popularity(rollup.popularity, later), 2)
+
+    def test_trending_ranked_by_activity(self):
+        """Test joins and comments raise events in the ranking"""
+        joined = sample_event(self.organizer)
+        commented = sample_event(self.organizer)
+        sample_event(self.organizer)
+        self.join(joined, self.users[:2])
+        self.join(commented, self.users[:1])
+        EventComment.objects.create(
+            event=commented, user=self.users[0], comment='test comment')
+
+        self.assertEqual(self.trending_ids(), [joined.id, commented.id])
+        res = self.client.get(TRENDING_URL)
+        self.assertAlmostEqual(
+            res.data['results'][0]['popularity'], 2, places=2)
+
+    def test_cancellation_lowers_popularity(self):
+        """Test a cancelled join no longer counts"""
+        event = sample_event(self.organizer)
+        self.join(event, self.users[:1])
+        participant = Participant.objects.get(event=event)
+        participant.status = '0'
+        participant.save()
+
+        self.assertEqual(self.trending_ids(), [])
+
+    def assert_popularity_rebuilt(self, event):
+        """Assert the popularity kept up to date equals a rebuilt one"""
+        popularity = EventRollup.objects.get(event=event).popularity
+        call_command('rebuild_rollups', stdout=io.StringIO())
+        self.assertAlmostEqual(
+            EventRollup.objects.get(event=event).popularity, popularity)
+
+    def test_old_cancellation_matches_rebuild(self):
+        """Test cancelling an old join removes the weight it was added at"""
+        event = sample_event(self.organizer)
+        self.join(event, self.users)
+        Participant.objects.filter(event=event).update(
+            updated_at=timezone.now() - datetime.timedelta(hours=72))
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        participant = Participant.objects.get(event=event, user=self.users[0])
+        participant.status = '0'
+        participant.save()
+        self.assert_popularity_rebuilt(event)
+
+        participant = Participant.objects.get(event=event, user=self.users[1])
+        participant.save()
+        self.assert_popularity_rebuilt(event)
+
+    def test_old_comment_deactivation_matches_rebuild(self):
+        """Test deactivating an old comment removes the weight it added"""
+        event = sample_event(self.organizer)
+        for user in self.users:
+            EventComment.objects.create(
+                event=event, user=user, comment='test comment')
+        EventComment.objects.filter(event=event).update(
+            created_at=timezone.now() - datetime.timedelta(hours=72))
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        comment = EventComment.objects.filter(event=event).first()
+        comment.is_active = False
+        comment.save()
+        self.assert_popularity_rebuilt(event)
+
+    def test_older_activity_decays(self):
+        """Test recent activity outweighs more but older activity"""
+        old = sample_event(self.organizer)
+        recent = sample_event(self.organizer)
+        self.join(old, self.users)
+        self.join(recent, self.users[:1])
+        Participant.objects.filter(event=old).update(
+            updated_at=timezone.now() - datetime.timedelta(
+                hours=2 * settings.TRENDING_HALF_LIFE_HOURS))
+
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        self.assertEqual(self.trending_ids(), [recent.id, old.id])
+
+    def test_trending_hides_past_and_private_events(self):
+        """Test only upcoming published events are listed"""
+        past = sample_event(self.organizer, days=-1)
+        private = sample_event(self.organizer, status='0')
+        for event in (past, private):
+            self.join(event, self.users[:1])
+
+        self.assertEqual(self.trending_ids(), [])
@@ -21,5 +21,19 @@ urlpatterns = [
          views.EventCommentView.as_view(), name='eventComment'),
     path('<int:event_id>/comments/<int:comment_id>',
          views.EventCommentView.as_view(), name='deleteComment'),
+    path('<int:pk>/stream',
+         views.EventStreamView.as_view(), name='eventStream'),
+    path('<int:pk>/related',
+         views.RelatedEventView.as_view(), name='relatedEvent'),
+    path('<int:pk>/similar',
+         views.SimilarEventView.as_view(), name='similarEvent'),
+    path('search', views.EventSearchView.as_view(), name='eventSearch'),
+    path('near', views.NearEventView.as_view(), name='nearEvent'),
+    path('calendar', views.EventCalendarView.as_view(),
+         name='eventCalendar'),
+    path('trending', views.TrendingEventView.as_view(),
+         name='trendingEvent'),
+    path('autocomplete', views.EventAutocompleteView.as_view(),
+         name='eventAutocomplete'),
     path('', include(router.urls))
 ]
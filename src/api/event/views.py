@@ -2,16 +2,29 @@ from rest_framework.response import Response
 from rest_framework import generics, viewsets, mixins, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.timezone import localtime, make_aware
 
 import datetime
+import time
 
+from core import geo
+from core.autocomplete import title_index
+from core.broker import event_channel, format_sse, get_broker
+from core.counters import view_counter
 from core.models import EventComment, Participant, Event
 from core.permissions import (
     IsEventAttributeOwnerOnly, IsEventOwnerOnly, IsGuideOnly, IsValidEvent
 )
+from core.rollups import NO_POPULARITY
+from core.search import search_events
 
-from event import serializers
+from event import filters, serializers
 
 
 class EventListSetPagination(PageNumberPagination):
@@ -134,6 +147,250 @@ class EventCommentView(generics.GenericAPIView,
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class EventStreamView(generics.GenericAPIView):
+    """Stream comment and participant updates of an event as SSE
+
+    Deployed, nginx routes this URL to the ASGI application of asgi.py,
+    which waits on the broker without holding a worker. This view serves
+    it under runserver only: the response is closed after
+    EVENT_STREAM_TIMEOUT seconds and the client reconnects with
+    Last-Event-ID.
+    """
+    permission_classes = [IsValidEvent]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            last_id = int(request.META.get('HTTP_LAST_EVENT_ID', ''))
+        except ValueError:
+            last_id = None
+
+        subscription = get_broker().subscribe(
+            event_channel(kwargs['pk']), last_id)
+        response = StreamingHttpResponse(
+            self.stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def stream(self, subscription):
+        heartbeat = settings.EVENT_STREAM_HEARTBEAT
+        deadline = time.monotonic() + settings.EVENT_STREAM_TIMEOUT
+        with subscription:
+            yield f'retry: {settings.EVENT_STREAM_RETRY}\n\n'
+            while True:
+                remaining = deadline - time.monotonic()
+                message = subscription.get(
+                    timeout=max(0, min(heartbeat, remaining)))
+                if message is not None:
+                    yield format_sse(message)
+                elif remaining <= 0:
+                    break
+                else:
+                    yield ': keep-alive\n\n'
+
+
+class EventSearchView(generics.ListAPIView):
+    """Search published events by the words of their text
+
+    Events are ranked by where and how often the words occur, weighted by
+    how rare each word is among all events.
+    """
+    pagination_class = EventListSetPagination
+    serializer_class = serializers.BriefEventSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        events = Event.objects.filter(is_active=True).exclude(status='0')
+        return search_events(events, self.request.query_params['q'])
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('q', '').strip():
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+
+class EventCalendarView(generics.GenericAPIView):
+    """Count the events of each local day of a month
+
+    The counts come from one query grouped by day and status, so a month
+    view does not need to page through the events themselves.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            month = datetime.datetime.strptime(
+                request.query_params['month'], '%Y-%m')
+        except (KeyError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        by_status = request.query_params.get('by') == 'status'
+
+        next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+        rows = Event.objects.filter(
+            is_active=True,
+            event_time__gte=make_aware(month),
+            event_time__lt=make_aware(next_month)
+        ).annotate(
+            day=TruncDate('event_time')
+        ).values('day', 'status').annotate(
+            count=Count('id')
+        ).order_by('day', 'status')
+
+        days = {}
+        for row in rows:
+            day = days.setdefault(row['day'], {
+                'date': row['day'].isoformat(),
+                'count': 0,
+            })
+            day['count'] += row['count']
+            if by_status:
+                day.setdefault('status', {
+                    value: 0 for value, label in Event.STATUS
+                })[row['status']] = row['count']
+        return Response({
+            'month': month.strftime('%Y-%m'),
+            'days': list(days.values())
+        }, status=status.HTTP_200_OK)
+
+
+class EventAutocompleteView(generics.GenericAPIView):
+    """Suggest upcoming event titles starting with the typed prefix
+
+    Suggestions are looked up in the in-memory prefix index, so a
+    keystroke does not query the database.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        prefix = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if not prefix or not 0 < limit <= settings.AUTOCOMPLETE_MAX_LIMIT:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = title_index.lookup(prefix, limit)
+        for suggestion in suggestions:
+            suggestion['event_time'] = localtime(
+                suggestion['event_time']).strftime('%Y-%m-%d %H:%M:%S')
+        return Response(suggestions, status=status.HTTP_200_OK)
+
+
+class NearEventView(generics.ListAPIView):
+    """List published events within a radius of a point, nearest first
+
+    Candidates are read through the geohash index: the cells covering
+    the circle are contiguous ranges of the index, so no scan over all
+    events is needed. Exact distances are computed for the candidates.
+    """
+    pagination_class = EventListSetPagination
+    serializer_class = serializers.NearEventSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    default_radius = 5
+    max_radius = 50
+
+    def list(self, request, *args, **kwargs):
+        query_params = request.query_params
+        try:
+            latitude = float(query_params['lat'])
+            longitude = float(query_params['lng'])
+            radius = float(query_params.get('radius', self.default_radius))
+            start, end = [
+                datetime.datetime.strptime(query_params[key], '%Y-%m-%d')
+                if key in query_params else None
+                for key in ('start', 'end')
+            ]
+        except (KeyError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if (not -90 <= latitude <= 90 or not -180 <= longitude <= 180 or
+                not 0 < radius <= self.max_radius):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        events = Event.objects.filter(is_active=True).exclude(status='0')
+        if start:
+            events = events.filter(event_time__gte=make_aware(start))
+        if end:
+            events = events.filter(event_time__lt=make_aware(
+                end + datetime.timedelta(days=1)))
+
+        page = self.paginate_queryset(
+            self.nearby(events, latitude, longitude, radius))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def nearby(self, events, latitude, longitude, radius):
+        """Return the events within the radius, sorted by distance"""
+        prefixes = geo.covering_prefixes(latitude, longitude, radius)
+        cells = Q()
+        for prefix in prefixes or ():
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+        (south, north), (west, east) = geo.bounding_box(
+            latitude, longitude, radius)
+        candidates = events.filter(cells, latitude__range=(south, north))
+        if -180 <= west and east <= 180:
+            candidates = candidates.filter(longitude__range=(west, east))
+
+        results = []
+        for event in candidates:
+            event.distance = geo.distance_km(
+                latitude, longitude, event.latitude, event.longitude)
+            if event.distance <= radius:
+                results.append(event)
+        results.sort(key=lambda event: (event.distance, event.event_time))
+        return results
+
+
+class RelatedEventView(generics.ListAPIView):
+    """List the upcoming events most often joined along with an event
+
+    The related events are computed offline by the build_related_events
+    command, so this is a single lookup of the stored ranking.
+    """
+    pagination_class = None
+    serializer_class = serializers.RelatedEventSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    ranking = 'related_from'
+
+    def get_queryset(self):
+        return Event.objects.filter(**{
+            f'{self.ranking}__event_id': self.kwargs['pk'],
+            'is_active': True,
+            'event_time__gte': timezone.now(),
+        }).exclude(status='0').select_related('rollup').order_by(
+            f'{self.ranking}__rank')
+
+
+class SimilarEventView(RelatedEventView):
+    """List the upcoming events whose text is closest to an event
+
+    The similar events are kept up to date when events are saved, so
+    new events without participants are suggested too.
+    """
+    ranking = 'similar_from'
+
+
+class TrendingEventView(generics.ListAPIView):
+    """List upcoming published events by their decayed popularity
+
+    Scores are kept on the event rollups as they change, and ranking by
+    the stored scores is the same as ranking by the decayed ones, so the
+    list is read in popularity index order.
+    """
+    pagination_class = EventListSetPagination
+    serializer_class = serializers.TrendingEventSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        return Event.objects.filter(
+            is_active=True,
+            event_time__gte=timezone.now(),
+            rollup__popularity__gt=NO_POPULARITY,
+        ).exclude(status='0').select_related('rollup').order_by(
+            '-rollup__popularity', 'event_time', 'id')
+
+
 class EventViewSet(viewsets.ModelViewSet):
     """Manage Event in the event"""
     pagination_class = EventListSetPagination
@@ -187,11 +444,19 @@ class EventViewSet(viewsets.ModelViewSet):
         except KeyError:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        events = self.get_queryset()
+        filterset = filters.EventFilter(
+            query_params, queryset=self.get_queryset())
+        if not filterset.is_valid():
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        events = filterset.qs
+        facets = filterset.facet_counts()
         page = self.paginate_queryset(events)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+            response.data['facets'] = facets
+            return response
 
         serializer = self.get_serializer(instance=events, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -207,6 +472,7 @@ class EventViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, pk=None):
         event = self.get_object()
+        view_counter.add(event.pk)
         serializer = self.get_serializer(instance=event)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from core.images import RENDITIONS, open_image, rendition_name
+
+
+FORMATS = {
+    'avif': ('AVIF', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+}
+TRANSCODABLE = ('.jpg', '.jpeg', '.png')
+# Served by nginx straight from the cache, so hits never refresh them
+UNEVICTABLE = ('uploads/user/',)
+
+
+def supported_formats():
+    """Return the output formats the installed Pillow can write"""
+    Image.init()
+    return [fmt for fmt, (pil_format, content_type, options)
+            in FORMATS.items() if pil_format in Image.SAVE]
+
+
+def parse_accept(accept):
+    """Return the media types of an Accept header with a non-zero q"""
+    types = set()
+    for item in accept.split(','):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            types.add(media_type.lower())
+    return types
+
+
+def negotiate_format(name, accept):
+    """Return the best transcoding format for a file, or None"""
+    if os.path.splitext(name)[1].lower() not in TRANSCODABLE:
+        return None
+    accepted = parse_accept(accept)
+    for fmt in supported_formats():
+        if FORMATS[fmt][1] in accepted:
+            return fmt
+    return None
+
+
+class TranscodeCache:
+    """Transcoded images on disk, evicted least recently used first
+
+    Files are written by the transcode_image job the first time a format
+    is requested, never while serving a request. Hits refresh the file's
+    modification time, so eviction can order entries by it. Transcodes
+    of user icons are sent by nginx without Django seeing the hits, so
+    they are never evicted and are deleted along with the icon instead.
+    The total size is tracked per process and checked against the
+    directory when the limit is reached, evicting down to the low-water
+    mark to keep directory scans rare.
+    """
+    low_water = 0.8
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roots = {}
+
+    @property
+    def root(self):
+        return os.path.join(settings.MEDIA_ROOT, settings.IMAGE_CACHE_DIR)
+
+    def cache_name(self, name, fmt):
+        """Return the media name of a transcoded file"""
+        root, ext = os.path.splitext(name)
+        return os.path.join(settings.IMAGE_CACHE_DIR, fmt, f'{root}.{fmt}')
+
+    def lookup(self, name, fmt):
+        """Return the media name of the transcoded file if it is cached"""
+        cache_name = self.cache_name(name, fmt)
+        try:
+            os.utime(os.path.join(settings.MEDIA_ROOT, cache_name))
+        except FileNotFoundError:
+            return None
+        return cache_name
+
+    def get(self, name, fmt):
+        """Return the media name of the transcoded file, creating it"""
+        cache_name = self.lookup(name, fmt)
+        if cache_name is not None:
+            return cache_name
+
+        if not default_storage.exists(name):
+            return None
+        cache_name = self.cache_name(name, fmt)
+        size = self.transcode(
+            name, fmt, os.path.join(settings.MEDIA_ROOT, cache_name))
+        if not name.startswith(UNEVICTABLE):
+            self.add(size)
+        return cache_name
+
+    def discard(self, name):
+        """Delete the transcoded files of an image and of its renditions"""
+        names = [name] + [rendition_name(name, r) for r in RENDITIONS]
+        for fmt in FORMATS:
+            for original in names:
+                path = os.path.join(
+                    settings.MEDIA_ROOT, self.cache_name(original, fmt))
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def transcode(self, name, fmt, path):
+        pil_format, content_type, options = FORMATS[fmt]
+        with default_storage.open(name, 'rb') as f:
+            image = open_image(f, alpha=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, pil_format, **options)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+    def add(self, size):
+        with self._lock:
+            total = self._roots.get(self.root)
+            if total is None:
+                total = self.scan_size()
+            else:
+                total += size
+            if total > settings.IMAGE_CACHE_MAX_BYTES:
+                total = self.evict()
+            self._roots[self.root] = total
+
+    def entries(self):
+        for directory, dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                fmt, _, name = os.path.relpath(path, self.root).partition(
+                    os.sep)
+                if name.startswith(UNEVICTABLE):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def scan_size(self):
+        return sum(size for mtime, size, path in self.entries())
+
+    def evict(self):
+        """Delete the least recently used files and return the new total"""
+        entries = sorted(self.entries())
+        total = sum(size for mtime, size, path in entries)
+        target = settings.IMAGE_CACHE_MAX_BYTES * self.low_water
+        for mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+transcode_cache = TranscodeCache()
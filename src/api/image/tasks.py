@@ -0,0 +1,22 @@
+import os
+
+from django.core.files.storage import default_storage
+
+from core.jobs import job
+from core.storage import signs_urls
+from image.cache import TRANSCODABLE, supported_formats, transcode_cache
+
+
+@job
+def transcode_image(name):
+    """Write an image to the transcode cache in every negotiable format
+
+    Nothing is written when media is served from signed object store
+    URLs, which are never negotiated.
+    """
+    if signs_urls(default_storage):
+        return
+    if os.path.splitext(name)[1].lower() not in TRANSCODABLE:
+        return
+    for fmt in supported_formats():
+        transcode_cache.get(name, fmt)
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils.timezone import make_aware
+import datetime
+import os
+import tempfile
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event
+
+
+def media_url(name):
+    """Return media URL"""
+    return reverse('image:serveMedia', args=[name])
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+        'status': '1',
+    }
+    default.update(params)
+    return Event.objects.create(organizer=user, **default)
+
+
+class MediaApiTests(TestCase):
+    """Test media is authorized by Django and sent by nginx"""
+
+    def setUp(self):
+        self.organizer = get_user_model().objects.create_user(
+            'organizer@matsuda.com', 'testpass')
+        self.user = get_user_model().objects.create_user(
+            'test@matsuda.com', 'testpass')
+        self.client = APIClient()
+
+    def assertAccelRedirect(self, res, name):
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected-media/{name}')
+        self.assertFalse(res.streaming)
+        self.assertEqual(res.content, b'')
+
+    def test_public_event_image(self):
+        """Test a published event image is redirected to nginx"""
+        name = 'uploads/event/ab/cd/abcd.jpg'
+        Event.objects.filter(pk=sample_event(self.organizer).pk).update(
+            image=name)
+
+        res = self.client.get(media_url(name))
+        self.assertAccelRedirect(res, name)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_public_event_image_rendition(self):
+        """Test renditions follow the access of their original"""
+        Event.objects.filter(pk=sample_event(self.organizer).pk).update(
+            image='uploads/event/ab/cd/abcd.png')
+
+        res = self.client.get(media_url('uploads/event/ab/cd/abcd_list.jpg'))
+        self.assertAccelRedirect(res, 'uploads/event/ab/cd/abcd_list.jpg')
+
+    def test_private_event_image(self):
+        """Test a private event image is only sent to its organizer"""
+        name = 'uploads/event/ab/cd/abcd.jpg'
+        event = sample_event(self.organizer, status='0')
+        Event.objects.filter(pk=event.pk).update(image=name)
+
+        res = self.client.get(media_url(name))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(self.user)
+        res = self.client.get(media_url(name))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(self.organizer)
+        res = self.client.get(media_url(name))
+        self.assertAccelRedirect(res, name)
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_unknown_event_image(self):
+        """Test an image no event refers to is not served"""
+        res = self.client.get(media_url('uploads/event/ab/cd/none.jpg'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_path_traversal(self):
+        """Test paths leaving the media root are rejected"""
+        res = self.client.get('/media/uploads/../../settings.py')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_file_body_never_read(self):
+        """Test Django answers without opening the file"""
+        with tempfile.TemporaryDirectory() as media_root:
+            name = 'uploads/user/ab/cd/abcd.png'
+            os.makedirs(os.path.join(media_root, 'uploads/user/ab/cd'))
+            with open(os.path.join(media_root, name), 'wb') as f:
+                f.write(b'\x89PNG' + b'\x00' * 1024)
+
+            with override_settings(MEDIA_ROOT=media_root):
+                res = self.client.get(media_url(name))
+
+        self.assertAccelRedirect(res, name)
@@ -0,0 +1,167 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from unittest import skipUnless
+from unittest.mock import patch
+import io
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from image.cache import (
+    negotiate_format, supported_formats, transcode_cache
+)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+requires_webp = skipUnless(
+    'webp' in supported_formats(), 'Pillow cannot write WebP')
+
+
+def media_url(name):
+    """Return media URL"""
+    return reverse('image:serveMedia', args=[name])
+
+
+def sample_icon(name, color='red'):
+    """Save a sample icon to the media storage and return its name"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffer, 'PNG')
+    return default_storage.save(name, buffer)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class NegotiatedImageTests(TestCase):
+    """Test images are transcoded to the format the client accepts"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@matsuda.com', 'testpass')
+        self.client = APIClient()
+
+    @requires_webp
+    def test_negotiate_format(self):
+        """Test choosing the output format from the Accept header"""
+        self.assertEqual(
+            negotiate_format('a.jpg', 'image/webp,*/*'), 'webp')
+        self.assertEqual(
+            negotiate_format('a.png', 'image/avif;q=0,image/webp'), 'webp')
+        self.assertIsNone(negotiate_format('a.jpg', 'image/*'))
+        self.assertIsNone(negotiate_format('a.gif', 'image/webp'))
+
+    @requires_webp
+    def test_transcode_to_webp(self):
+        """Test the image is transcoded by a job and then served from disk"""
+        name = sample_icon('uploads/user/ab/cd/abcd.png')
+
+        with patch('image.cache.open_image') as mock_open_image:
+            res = self.client.get(media_url(name), HTTP_ACCEPT='image/webp')
+            self.client.get(media_url(name), HTTP_ACCEPT='image/webp')
+        mock_open_image.assert_not_called()
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected-media/{name}')
+        self.assertEqual(res['Vary'], 'Accept')
+        self.assertEqual(jobs.run_pending(), 1)
+
+        res = self.client.get(media_url(name), HTTP_ACCEPT='image/webp')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/webp')
+        self.assertEqual(res['Vary'], 'Accept')
+        self.assertEqual(res['X-Accel-Redirect'],
+                         '/protected-media/cache/webp/uploads/user/ab/cd/'
+                         'abcd.webp')
+        path = os.path.join(MEDIA_ROOT, 'cache/webp/uploads/user/ab/cd/'
+                            'abcd.webp')
+        with Image.open(path) as image:
+            self.assertEqual(image.format, 'WEBP')
+
+        with patch('image.cache.open_image') as mock_open_image:
+            res = self.client.get(media_url(name), HTTP_ACCEPT='image/webp')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_open_image.assert_not_called()
+
+    @requires_webp
+    def test_transcode_keeps_transparency(self):
+        """Test transparent images stay transparent when transcoded"""
+        buffer = io.BytesIO()
+        Image.new('RGBA', (64, 64), (255, 0, 0, 0)).save(buffer, 'PNG')
+        name = default_storage.save('uploads/user/ab/cd/alpha.png', buffer)
+
+        cache_name = transcode_cache.get(name, 'webp')
+
+        with Image.open(os.path.join(MEDIA_ROOT, cache_name)) as image:
+            self.assertEqual(image.mode, 'RGBA')
+            self.assertEqual(image.getpixel((0, 0))[3], 0)
+
+    def test_original_without_accept(self):
+        """Test clients accepting no modern format get the original"""
+        name = sample_icon('uploads/user/ab/cd/orig.png')
+
+        res = self.client.get(media_url(name), HTTP_ACCEPT='image/png')
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected-media/{name}')
+        self.assertEqual(res['Content-Type'], 'image/png')
+
+    def test_cache_not_served_directly(self):
+        """Test the cache directory is not reachable by its own URL"""
+        res = self.client.get(media_url('cache/webp/uploads/user/a.webp'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @requires_webp
+    def test_evict_least_recently_used(self):
+        """Test the cache evicts the least recently used files"""
+        names = [sample_icon(f'uploads/event/ab/cd/lru{i}.png')
+                 for i in range(3)]
+        cache_names = []
+        for i, name in enumerate(names):
+            cache_names.append(transcode_cache.get(name, 'webp'))
+            path = os.path.join(MEDIA_ROOT, cache_names[-1])
+            os.utime(path, (i, i))
+        size = os.path.getsize(os.path.join(MEDIA_ROOT, cache_names[0]))
+
+        transcode_cache.get(names[0], 'webp')
+        with self.settings(IMAGE_CACHE_MAX_BYTES=size * 2.5):
+            transcode_cache.get(
+                sample_icon('uploads/event/ab/cd/lru3.png'), 'webp')
+
+        exists = [os.path.exists(os.path.join(MEDIA_ROOT, cache_name))
+                  for cache_name in cache_names]
+        self.assertEqual(exists, [True, False, False])
+
+    @requires_webp
+    def test_icons_not_evicted(self):
+        """Test transcoded icons, served by nginx, are never evicted"""
+        icon = transcode_cache.get(
+            sample_icon('uploads/user/ab/cd/kept.png'), 'webp')
+        size = os.path.getsize(os.path.join(MEDIA_ROOT, icon))
+
+        with self.settings(IMAGE_CACHE_MAX_BYTES=size // 2):
+            transcode_cache.get(
+                sample_icon('uploads/event/ab/cd/evicted.png'), 'webp')
+            transcode_cache.get(
+                sample_icon('uploads/event/ab/cd/evicted2.png'), 'webp')
+
+        self.assertTrue(os.path.exists(os.path.join(MEDIA_ROOT, icon)))
+
+    @requires_webp
+    def test_transcodes_deleted_with_icon(self):
+        """Test replacing an icon deletes its transcoded files"""
+        name = sample_icon('uploads/user/ab/cd/old.png')
+        self.user.icon = name
+        self.user.save()
+        path = os.path.join(
+            MEDIA_ROOT, transcode_cache.get(name, 'webp'))
+
+        self.user.icon = sample_icon('uploads/user/ab/cd/new.png')
+        self.user.save()
+
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils.timezone import make_aware
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+import datetime
+import shutil
+import tempfile
+import time
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def media_url(name):
+    """Return media URL"""
+    return reverse('image:serveMedia', args=[name])
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'event_time': make_aware(datetime.datetime.now()),
+        'address': 'test address',
+        'status': '1',
+    }
+    default.update(params)
+    return Event.objects.create(organizer=user, **default)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT,
+                   DEFAULT_FILE_STORAGE='core.storage.LocalObjectStorage')
+class SignedMediaTests(TestCase):
+    """Test media in the object storage is sent to signed URLs only"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.organizer = get_user_model().objects.create_user(
+            'organizer@matsuda.com', 'testpass')
+        self.client = APIClient()
+        self.name = default_storage.save(
+            'uploads/user/ab/cd/abcd.png', ContentFile(b'\x89PNG'))
+
+    def test_signed_url(self):
+        """Test a file is sent to its signed URL"""
+        url = default_storage.url(self.name)
+        self.assertTrue(url.startswith(f'/media/signed/{self.name}?'))
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'],
+                         f'/protected-media/{self.name}')
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_tampered_url(self):
+        """Test a URL signed for another file is rejected"""
+        url = default_storage.url(self.name)
+        path, query = url.split('?')
+        other = reverse('image:signedMedia', args=['uploads/user/other.png'])
+
+        res = self.client.get(f'{other}?{query}')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(path)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expired_url(self):
+        """Test a signed URL is rejected once it expires"""
+        url = default_storage.url(self.name)
+
+        with patch('core.storage.time.time',
+                   return_value=time.time() + 3600 * 2):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_media_redirected_to_signed_url(self):
+        """Test authorized media requests are redirected to signed URLs"""
+        res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res['Location'], default_storage.url(self.name))
+        self.assertEqual(res['Cache-Control'], 'public, max-age=1800')
+
+    def test_private_event_image_not_redirected(self):
+        """Test hidden event images are not redirected to signed URLs"""
+        name = 'uploads/event/ab/cd/abcd.jpg'
+        event = sample_event(self.organizer, status='0')
+        Event.objects.filter(pk=event.pk).update(image=name)
+
+        res = self.client.get(media_url(name))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(self.organizer)
+        res = self.client.get(media_url(name))
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_image_url_signed(self):
+        """Test event payloads carry signed image URLs"""
+        event = sample_event(self.organizer)
+        Event.objects.filter(pk=event.pk).update(image=self.name)
+        event.refresh_from_db()
+
+        query = parse_qs(urlsplit(event.get_image_url).query)
+        self.assertIn('signature', query)
+        self.assertGreater(int(query['expires'][0]), time.time())
+
+    @override_settings(DEFAULT_FILE_STORAGE=(
+        'django.core.files.storage.FileSystemStorage'))
+    def test_signed_url_needs_object_storage(self):
+        """Test signed URLs are not served from the plain file storage"""
+        res = self.client.get(reverse('image:signedMedia', args=[self.name]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
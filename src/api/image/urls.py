@@ -0,0 +1,11 @@
+from django.urls import path
+
+from image import views
+
+
+app_name = 'image'
+
+urlpatterns = [
+    path('signed/<path:path>', views.signed_media, name='signedMedia'),
+    path('<path:path>', views.serve_media, name='serveMedia'),
+]
@@ -0,0 +1,185 @@
+import mimetypes
+import os
+import posixpath
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import Q
+from django.http import (
+    Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+)
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_safe
+from django.views.static import serve
+
+from core.images import RENDITIONS
+from core.jobs import enqueue_unique
+from core.models import Event
+from core.storage import LocalObjectStorage, signs_urls, verify_local
+from image.cache import (
+    FORMATS, TRANSCODABLE, negotiate_format, transcode_cache
+)
+from image.tasks import transcode_image
+
+
+PUBLIC_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+PRIVATE_CACHE_CONTROL = 'private, max-age=3600'
+
+
+def original_name(name):
+    """Return the original file name prefix of a rendition, or None"""
+    root, ext = os.path.splitext(name)
+    original, _, rendition = root.rpartition('_')
+    if rendition in RENDITIONS:
+        return original
+    return None
+
+
+def event_image_access(user, name):
+    """Return the Cache-Control for an event image, or None if hidden"""
+    original = original_name(name)
+    events = Event.objects.filter(
+        Q(image=name) | Q(image__startswith=f'{original}.')
+        if original else Q(image=name)
+    )
+    public = events.filter(is_active=True).exclude(status='0')
+    if public.exists():
+        return PUBLIC_CACHE_CONTROL
+    if user.is_authenticated and events.filter(organizer=user).exists():
+        return PRIVATE_CACHE_CONTROL
+    return None
+
+
+def accel_redirect(name, cache_control, content_type=None):
+    """Return an empty response telling nginx which file to send"""
+    if content_type is None:
+        content_type, encoding = mimetypes.guess_type(name)
+    response = HttpResponse(
+        content_type=content_type or 'application/octet-stream')
+    response['X-Accel-Redirect'] = (
+        settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(name))
+    response['Cache-Control'] = cache_control
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """Authorize a media file and hand the transfer over to nginx
+
+    Django never reads the file: nginx serves it from an internal
+    location named by the X-Accel-Redirect header.
+    """
+    name = posixpath.normpath(path)
+    if name != path or name.startswith(('.', '/')):
+        raise Http404
+    if name.startswith((settings.IMAGE_CACHE_DIR + '/',
+                        settings.UPLOAD_INCOMING_DIR + '/')):
+        raise Http404
+
+    cache_control = PUBLIC_CACHE_CONTROL
+    if name.startswith('uploads/event/'):
+        cache_control = event_image_access(request.user, name)
+        if cache_control is None:
+            raise Http404
+
+    if signs_urls(default_storage):
+        return signed_redirect(name, cache_control)
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX is None:
+        return serve(request, name, document_root=settings.MEDIA_ROOT)
+
+    if name.startswith('uploads/'):
+        response = negotiated_image(request, name, cache_control)
+        if response is not None:
+            return response
+    return accel_redirect(name, cache_control)
+
+
+def negotiated_image(request, name, cache_control):
+    """Return the image transcoded to the best format the client accepts
+
+    Transcoded files are written by the transcode_image job. Until one
+    is cached, or after it was evicted, the original is sent and the job
+    is queued. nginx sends user icons from the cache itself and only
+    passes the misses on to here.
+    """
+    fmt = negotiate_format(name, request.META.get('HTTP_ACCEPT', ''))
+    cache_name = None
+    if fmt is not None:
+        cache_name = transcode_cache.lookup(name, fmt)
+        if cache_name is None:
+            enqueue_unique(transcode_image, name=name)
+
+    if cache_name is None:
+        response = accel_redirect(name, cache_control)
+    else:
+        response = accel_redirect(
+            cache_name, cache_control, content_type=FORMATS[fmt][1])
+    if os.path.splitext(name)[1].lower() in TRANSCODABLE:
+        response['Vary'] = 'Accept'
+    return response
+
+
+def signed_redirect(name, cache_control):
+    """Return a redirect to the signed URL of a file in the object store
+
+    The redirect may be cached for half the lifetime of the URL, which
+    is the least time it stays valid.
+    """
+    response = HttpResponseRedirect(default_storage.url(name))
+    max_age = default_storage.url_expires // 2
+    visibility = 'public' if cache_control == PUBLIC_CACHE_CONTROL else (
+        'private')
+    response['Cache-Control'] = f'{visibility}, max-age={max_age}'
+    return response
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'PUT'])
+def signed_media(request, path):
+    """Stand in for the object store when media is on the local disk
+
+    Files of LocalObjectStorage are sent to signed GET URLs, and the
+    signed PUT URLs of upload tickets are accepted whenever the media
+    storage is on the local disk.
+    """
+    if request.method == 'PUT':
+        return signed_upload(request, path)
+
+    storage = default_storage
+    expires_at = request.GET.get('expires')
+    if not isinstance(storage, LocalObjectStorage):
+        raise Http404
+    if not verify_local(
+            'GET', path, expires_at, request.GET.get('signature')):
+        return HttpResponseForbidden()
+
+    max_age = max(int(expires_at) - int(time.time()), 0)
+    cache_control = f'private, max-age={max_age}'
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX is None:
+        response = serve(request, path, document_root=storage.location)
+        response['Cache-Control'] = cache_control
+        return response
+    return accel_redirect(path, cache_control)
+
+
+def signed_upload(request, path):
+    """Write the request body to the file a signed PUT URL is for"""
+    storage = default_storage
+    if not isinstance(storage, FileSystemStorage):
+        raise Http404
+    size = request.META.get('CONTENT_LENGTH', '')
+    if not verify_local(
+            'PUT', path, request.GET.get('expires'),
+            request.GET.get('signature'),
+            request.META.get('CONTENT_TYPE', ''), size):
+        return HttpResponseForbidden()
+    if storage.exists(path):
+        return HttpResponse(status=409)
+
+    content = File(request, path)
+    content.size = int(size)
+    storage.save(path, content)
+    return HttpResponse()
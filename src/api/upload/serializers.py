@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+import io
+
+from PIL import Image
+from rest_framework import serializers
+
+from core.jobs import enqueue
+from core.models import Upload
+from core.storage import read_head, upload_url
+from upload.tasks import attach_upload
+
+
+def upload_limits(field):
+    """Return the upload limits of a field"""
+    return settings.UPLOAD_LIMITS.get(field, settings.UPLOAD_LIMITS['default'])
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    """Serializer for the upload ticket object"""
+    key = serializers.ReadOnlyField(source='name')
+    url = serializers.SerializerMethodField()
+    headers = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Upload
+        fields = (
+            'key', 'field', 'content_type', 'size', 'url', 'headers',
+            'expires_at'
+        )
+        read_only_fields = ('expires_at',)
+
+    def validate_content_type(self, value):
+        if value not in settings.UPLOAD_CONTENT_TYPES:
+            raise serializers.ValidationError('Unsupported content type.')
+        return value
+
+    def validate(self, attrs):
+        max_bytes = upload_limits(attrs['field'])['max_bytes']
+        if not 0 < attrs['size'] <= max_bytes:
+            raise serializers.ValidationError({'size': [
+                f'Ensure the file is at most {max_bytes} bytes.'
+            ]})
+        return attrs
+
+    def get_url(self, upload):
+        return upload_url(
+            default_storage, upload.name, upload.content_type, upload.size,
+            settings.UPLOAD_TICKET_EXPIRES)
+
+    def get_headers(self, upload):
+        return {'Content-Type': upload.content_type}
+
+
+class UploadKeyField(serializers.CharField):
+    """Key of an upload ticket, attached as the file sent with it
+
+    Only the size and the image header are checked while validating, so
+    the file body is never read by the API worker. The serializer must
+    mix in UploadKeySerializerMixin, which consumes the ticket and hands
+    the file over to the attach_upload job.
+    """
+    default_error_messages = {
+        'invalid_key': 'Invalid or expired upload key.',
+        'missing': 'The file has not been uploaded yet.',
+        'too_large': 'Ensure the file is at most {max_bytes} bytes.',
+        'invalid_image': 'Upload a valid image.',
+        'too_many_pixels': 'Image dimensions are too large.',
+    }
+
+    def __init__(self, upload_field, **kwargs):
+        kwargs.setdefault('write_only', True)
+        kwargs.setdefault('required', False)
+        self.upload_field = upload_field
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        key = super().to_internal_value(data)
+        upload = Upload.objects.filter(
+            name=key, user=self.context['request'].user,
+            field=self.upload_field, expires_at__gt=timezone.now()
+        ).first()
+        if upload is None:
+            self.fail('invalid_key')
+
+        storage = default_storage
+        if not storage.exists(upload.name):
+            self.fail('missing')
+        limits = upload_limits(self.upload_field)
+        if storage.size(upload.name) > limits['max_bytes']:
+            self.fail('too_large', max_bytes=limits['max_bytes'])
+
+        head = read_head(storage, upload.name, settings.UPLOAD_HEADER_BYTES)
+        self.check_image(io.BytesIO(head), limits['max_pixels'])
+        return upload
+
+    def check_image(self, f, max_pixels):
+        """Validate the image dimensions from the header of the file"""
+        try:
+            with Image.open(f) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.fail('too_many_pixels')
+        except (OSError, SyntaxError, ValueError):
+            self.fail('invalid_image')
+        if max_pixels and width * height > max_pixels:
+            self.fail('too_many_pixels')
+
+
+class UploadKeySerializerMixin:
+    """Attach the files of upload keys once the object is saved
+
+    The tickets are deleted with the save, so a key is attached once,
+    and the files are moved to their content addressed names by the
+    attach_upload job. Until it has run the object keeps its old file.
+    """
+
+    def save(self, **kwargs):
+        uploads = []
+        for key, field in self.fields.items():
+            upload = self.validated_data.get(field.source)
+            if isinstance(field, UploadKeyField) and isinstance(
+                    upload, Upload):
+                del self.validated_data[field.source]
+                uploads.append((key, field.source, upload))
+
+        with transaction.atomic():
+            for key, source, upload in uploads:
+                if not Upload.objects.filter(pk=upload.pk).delete()[0]:
+                    raise serializers.ValidationError({key: [
+                        UploadKeyField.default_error_messages['invalid_key']
+                    ]})
+            instance = super().save(**kwargs)
+            for key, source, upload in uploads:
+                enqueue(attach_upload, model=instance._meta.label,
+                        pk=instance.pk, field=source, name=upload.name)
+        return instance
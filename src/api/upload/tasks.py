@@ -0,0 +1,35 @@
+import os
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from core.jobs import job
+from core.models import Upload
+
+
+@job
+def delete_upload(upload_id):
+    """Delete an expired upload ticket and the file sent with it"""
+    upload = Upload.objects.filter(pk=upload_id).first()
+    if upload is None:
+        return
+    default_storage.delete(upload.name)
+    upload.delete()
+
+
+@job
+def attach_upload(model, pk, field, name):
+    """Store an uploaded file by content hash and attach it to a row
+
+    The file is hashed and moved here rather than in the request that
+    attached its key, then deleted from the incoming directory.
+    """
+    storage = default_storage
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    if instance is not None and storage.exists(name):
+        with storage.open(name, 'rb') as f:
+            getattr(instance, field).save(
+                os.path.basename(name), File(f), save=False)
+        instance.save(update_fields=[field, 'updated_at'])
+    storage.delete(name)
@@ -0,0 +1,203 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+import io
+import shutil
+import tempfile
+
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Event, Job, Upload
+from upload import tasks
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CREATE_UPLOAD_URL = reverse('upload:createUpload')
+CREATE_EVENT_URL = reverse('event:event-list')
+
+
+def user_url(user_id):
+    """Return user detail URL"""
+    return reverse('user:user-detail', args=[user_id])
+
+
+def sample_png(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class UploadApiTests(TestCase):
+    """Test files are uploaded with tickets instead of through the API"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@matsuda.com', 'testpass', is_guide=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_ticket(self, field='icon', data=None):
+        data = data or sample_png()
+        res = self.client.post(CREATE_UPLOAD_URL, {
+            'field': field, 'content_type': 'image/png', 'size': len(data)
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data
+
+    def put(self, ticket, data, content_type='image/png'):
+        return self.client.generic(
+            'PUT', ticket['url'], data, content_type=content_type)
+
+    def upload(self, field='icon', data=None):
+        data = data or sample_png()
+        ticket = self.create_ticket(field, data)
+        res = self.put(ticket, data)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return ticket['key']
+
+    def test_create_ticket(self):
+        """Test a ticket carries a signed URL to upload to"""
+        ticket = self.create_ticket()
+
+        self.assertTrue(ticket['key'].startswith('incoming/'))
+        self.assertTrue(ticket['key'].endswith('.png'))
+        self.assertIn('signature=', ticket['url'])
+        self.assertEqual(ticket['headers'], {'Content-Type': 'image/png'})
+        self.assertTrue(Job.objects.filter(
+            name='upload.tasks.delete_upload').exists())
+
+    def test_create_ticket_unauthorized(self):
+        """Test authentication is required for tickets"""
+        res = APIClient().post(CREATE_UPLOAD_URL, {
+            'field': 'icon', 'content_type': 'image/png', 'size': 10})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_create_ticket_invalid(self):
+        """Test tickets are limited by type and size"""
+        res = self.client.post(CREATE_UPLOAD_URL, {
+            'field': 'icon', 'content_type': 'text/html', 'size': 10})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(CREATE_UPLOAD_URL, {
+            'field': 'icon', 'content_type': 'image/png',
+            'size': 100 * 2 ** 20})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('size', res.data)
+
+    def test_upload_to_signed_url(self):
+        """Test the file is written to the storage under the ticket key"""
+        key = self.upload()
+
+        with default_storage.open(key) as f:
+            self.assertEqual(f.read(), sample_png())
+        res = self.client.get(reverse('image:serveMedia', args=[key]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upload_other_file_rejected(self):
+        """Test the signed URL only accepts the announced file"""
+        ticket = self.create_ticket()
+
+        res = self.put(ticket, sample_png() + b'\x00')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = self.put(ticket, sample_png(), content_type='image/gif')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(default_storage.exists(ticket['key']))
+
+    def test_attach_icon(self):
+        """Test an uploaded icon is attached to the user by its key"""
+        key = self.upload()
+
+        res = self.client.patch(user_url(self.user.id), {'icon_key': key})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(Upload.objects.filter(name=key).exists())
+        jobs.run_pending()
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.icon.name.startswith('uploads/user/'))
+        with self.user.icon.open() as f:
+            self.assertEqual(f.read(), sample_png())
+        self.assertFalse(default_storage.exists(key))
+
+    def test_attach_key_once(self):
+        """Test a key can not be attached again once it is attached"""
+        key = self.upload()
+
+        res = self.client.patch(user_url(self.user.id), {'icon_key': key})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.patch(user_url(self.user.id), {'icon_key': key})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Job.objects.filter(
+            name='upload.tasks.attach_upload').count(), 1)
+
+    def test_attach_event_image(self):
+        """Test an uploaded image is attached to a new event by its key"""
+        key = self.upload('image')
+
+        res = self.client.post(CREATE_EVENT_URL, {
+            'title': 'test title',
+            'description': 'test description',
+            'organizer': self.user.id,
+            'image_key': key,
+            'event_time': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'address': 'test address',
+            'fee': 500,
+            'status': '1',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        jobs.run_pending()
+        event = Event.objects.get(organizer=self.user)
+        self.assertTrue(event.image.name.startswith('uploads/event/'))
+
+    def test_attach_invalid_key(self):
+        """Test keys of other users, fields or missing files are rejected"""
+        other = get_user_model().objects.create_user(
+            'other@matsuda.com', 'testpass')
+        key = self.upload()
+
+        client = APIClient()
+        client.force_authenticate(other)
+        res = client.patch(user_url(other.id), {'icon_key': key})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.patch(user_url(self.user.id), {
+            'icon_key': self.create_ticket()['key']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Upload.objects.filter(name=key).update(expires_at=timezone.now())
+        res = self.client.patch(user_url(self.user.id), {'icon_key': key})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.icon)
+
+    def test_attach_too_many_pixels(self):
+        """Test an uploaded image over the pixel limit is not attached"""
+        key = self.upload(data=sample_png((200, 200)))
+        limits = {
+            'icon': {'max_bytes': 2 ** 20, 'max_pixels': 100 * 100},
+            'default': {'max_bytes': 2 ** 20, 'max_pixels': None},
+        }
+        with self.settings(UPLOAD_LIMITS=limits):
+            res = self.client.patch(
+                user_url(self.user.id), {'icon_key': key})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('icon_key', res.data)
+
+    def test_delete_expired_upload(self):
+        """Test the file of an expired ticket is deleted"""
+        key = self.upload()
+
+        tasks.delete_upload(Upload.objects.get(name=key).id)
+        self.assertFalse(Upload.objects.filter(name=key).exists())
+        self.assertFalse(default_storage.exists(key))
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from upload import views
+
+
+app_name = 'upload'
+
+urlpatterns = [
+    path('', views.UploadView.as_view(), name='createUpload'),
+]
@@ -0,0 +1,36 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.utils import timezone
+
+import datetime
+import uuid
+
+from core.fields import shard_path
+from core.jobs import enqueue
+
+from upload import serializers, tasks
+
+
+class UploadView(generics.CreateAPIView):
+    """Issue a ticket for uploading a file straight to the media storage
+
+    The client PUTs the file to the signed URL of the ticket and then
+    attaches the ticket key to an event or user, so the file body never
+    passes through an API worker.
+    """
+    serializer_class = serializers.UploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        ext = settings.UPLOAD_CONTENT_TYPES[
+            serializer.validated_data['content_type']]
+        upload = serializer.save(
+            user=self.request.user,
+            name=shard_path(
+                settings.UPLOAD_INCOMING_DIR, f'{uuid.uuid4().hex}{ext}'),
+            expires_at=timezone.now() + datetime.timedelta(
+                seconds=settings.UPLOAD_TICKET_EXPIRES)
+        )
+        enqueue(tasks.delete_upload, delay=settings.UPLOAD_TICKET_EXPIRES,
+                upload_id=upload.id)
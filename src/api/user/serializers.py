@@ -1,24 +1,28 @@
 from django.contrib.auth import get_user_model
+from django.utils.timezone import localtime
 
 from rest_framework import serializers
 
-from core.models import Participant, Event
+from core.models import Participant, Event, EventRollup
+from upload.serializers import UploadKeyField, UploadKeySerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(UploadKeySerializerMixin,
+                     serializers.ModelSerializer):
     """Serializer for the users object"""
     icon_url = serializers.SerializerMethodField()
+    icon_key = UploadKeyField('icon', source='icon')
 
     class Meta:
         model = get_user_model()
         fields = (
             'id', 'first_name', 'family_name', 'introduction',
-            'icon_url', 'is_guide', 'icon'
+            'icon_url', 'is_guide', 'icon', 'icon_key'
         )
         extra_kwargs = {'icon': {'write_only': True}}
 
     def get_icon_url(self, user):
-        return user.get_icon_url
+        return user.get_icon_rendition_url('avatar')
 
 
 class UserEmailSerializer(serializers.ModelSerializer):
@@ -32,18 +36,20 @@ class UserEmailSerializer(serializers.ModelSerializer):
 class UserEventsSerializer(serializers.ModelSerializer):
     """Serialize for brief event object"""
     image = serializers.SerializerMethodField()
+    image_placeholder = serializers.ReadOnlyField(
+        source="get_image_placeholder")
     event_time = serializers.SerializerMethodField()
     participant_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = (
-            'id', 'title', 'image', 'event_time', 'address',
-            'participant_count'
+            'id', 'title', 'image', 'image_placeholder', 'event_time',
+            'address', 'participant_count'
         )
 
     def get_image(self, event):
-        return event.get_image_url
+        return event.get_image_rendition_url('list')
 
     def get_event_time(self, event):
         return event.get_brief_event_time
@@ -52,3 +58,40 @@ class UserEventsSerializer(serializers.ModelSerializer):
         participant = Participant.objects.filter(
             event_id=event.id, status='1', is_active=True)
         return participant.count()
+
+
+class DashboardEventSerializer(serializers.ModelSerializer):
+    """Serialize the counts of an organized event"""
+    id = serializers.ReadOnlyField(source='event_id')
+    title = serializers.ReadOnlyField(source='event.title')
+    event_time = serializers.ReadOnlyField(source='event.get_brief_event_time')
+    status = serializers.ReadOnlyField(source='event.status')
+
+    class Meta:
+        model = EventRollup
+        fields = (
+            'id', 'title', 'event_time', 'status', 'participant_count',
+            'cancellation_count', 'comment_count', 'view_count'
+        )
+
+
+class RecommendedEventSerializer(UserEventsSerializer):
+    """Serialize for brief event object counted from its rollup"""
+
+    def get_participant_count(self, event):
+        rollup = getattr(event, 'rollup', None)
+        if rollup is None:
+            return super().get_participant_count(event)
+        return rollup.participant_count
+
+
+class TimelineEventSerializer(RecommendedEventSerializer):
+    """Serialize for brief event object on a timeline"""
+    published_at = serializers.SerializerMethodField()
+
+    class Meta(RecommendedEventSerializer.Meta):
+        fields = RecommendedEventSerializer.Meta.fields + (
+            'organizer', 'published_at')
+
+    def get_published_at(self, event):
+        return localtime(event.published_at).strftime('%Y-%m-%d %H:%M:%S')
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+import datetime
+import io
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, EventComment, EventRollup, Participant
+
+
+def dashboard_url(user_id):
+    """Return user dashboard URL"""
+    return reverse('user:user-dashboard', args=[user_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, days=1, **params):
+    """Create and return a sample event some days from now"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=days),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+class UserDashboardApiTests(TestCase):
+    """Test the organizer dashboard"""
+
+    def setUp(self):
+        self.organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.users = [
+            sample_user(email=f'user{i}@matsuda.com', password='testpass')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def test_dashboard_counts(self):
+        """Test the totals follow joins, cancellations and comments"""
+        event = sample_event(self.organizer)
+        for user in self.users:
+            Participant.objects.create(event=event, user=user, status='1')
+        canceled = Participant.objects.get(event=event, user=self.users[0])
+        canceled.status = '0'
+        canceled.save()
+        comment = EventComment.objects.create(
+            event=event, user=self.users[1], comment='test comment')
+        EventComment.objects.create(
+            event=event, user=self.users[2], comment='test comment')
+        comment.delete()
+
+        res = self.client.get(dashboard_url(self.organizer.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['event_count'], 1)
+        self.assertEqual(res.data['upcoming_event_count'], 1)
+        self.assertEqual(res.data['participant_count'], 2)
+        self.assertEqual(res.data['cancellation_count'], 1)
+        self.assertEqual(res.data['comment_count'], 1)
+        self.assertEqual(res.data['upcoming_events'][0]['id'], event.id)
+        self.assertEqual(res.data['upcoming_events'][0]['comment_count'], 1)
+
+    def test_dashboard_upcoming_events(self):
+        """Test only future active events are listed, soonest first"""
+        later = sample_event(self.organizer, days=7)
+        sooner = sample_event(self.organizer, days=2)
+        past = sample_event(self.organizer, days=-1)
+        Participant.objects.create(event=past, user=self.users[0])
+        deleted = sample_event(self.organizer)
+        deleted.delete()
+
+        res = self.client.get(dashboard_url(self.organizer.id))
+
+        self.assertEqual(
+            [event['id'] for event in res.data['upcoming_events']],
+            [sooner.id, later.id])
+        self.assertEqual(res.data['event_count'], 3)
+        self.assertEqual(res.data['upcoming_event_count'], 2)
+        self.assertEqual(res.data['participant_count'], 1)
+
+    def test_dashboard_queries(self):
+        """Test the dashboard is read from the rollups in fixed queries"""
+        for days in range(1, 6):
+            event = sample_event(self.organizer, days=days)
+            Participant.objects.create(event=event, user=self.users[0])
+
+        with self.assertNumQueries(3):
+            res = self.client.get(dashboard_url(self.organizer.id))
+        self.assertEqual(len(res.data['upcoming_events']), 5)
+
+    def test_dashboard_by_another_user(self):
+        """Test the dashboard is only shown to the organizer"""
+        self.client.force_authenticate(self.users[0])
+
+        res = self.client.get(dashboard_url(self.organizer.id))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_rebuild_rollups(self):
+        """Test the command recounts rollups lost or written without signals"""
+        event = sample_event(self.organizer)
+        Participant.objects.create(event=event, user=self.users[0])
+        Participant.objects.filter(event=event).update(status='0')
+        EventRollup.objects.filter(event=event).delete()
+
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        rollup = EventRollup.objects.get(event=event)
+        self.assertEqual(rollup.organizer, self.organizer)
+        self.assertEqual(rollup.participant_count, 0)
+        self.assertEqual(rollup.cancellation_count, 1)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+import datetime
+import io
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, Participant
+
+
+def recommended_url(user_id):
+    """Return recommended event URL"""
+    return reverse('user:user-recommendedEvents', args=[user_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, days=1, **params):
+    """Create and return a sample event some days from now"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=days),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+class UserRecommendedApiTests(TestCase):
+    """Test recommending events from the events a user joined"""
+
+    def setUp(self):
+        self.organizer = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.user = sample_user(email='test@matsuda.com', password='testpass')
+        self.others = [
+            sample_user(email=f'user{i}@matsuda.com', password='testpass')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def test_recommended_events(self):
+        """Test events related to several joined events rank first"""
+        first = sample_event(self.organizer, days=1)
+        second = sample_event(self.organizer, days=2)
+        both = sample_event(self.organizer, days=3)
+        one = sample_event(self.organizer, days=4)
+        for user in (self.user, *self.others):
+            Participant.objects.create(event=first, user=user)
+        Participant.objects.create(event=second, user=self.user)
+        Participant.objects.create(event=second, user=self.others[0])
+        Participant.objects.create(event=both, user=self.others[0])
+        Participant.objects.create(event=one, user=self.others[1])
+        call_command('build_related_events', stdout=io.StringIO())
+
+        res = self.client.get(recommended_url(self.user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['id'] for event in res.data['results']],
+                         [both.id, one.id])
+
+    def test_recommended_events_without_participations(self):
+        """Test nothing is recommended to a user who joined nothing"""
+        res = self.client.get(recommended_url(self.user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
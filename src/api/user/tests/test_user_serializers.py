@@ -144,6 +144,7 @@ class UserSerializerApiTests(TestCase):
             'id': self.event.id,
             'title': 'test title',
             'image': '/static/images/no_event_image.png',
+            'image_placeholder': '',
             'event_time': '2021-01-18 00:34:39',
             'address': 'test address',
             'participant_count': 0
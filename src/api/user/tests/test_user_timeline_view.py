@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+import datetime
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Event, TimelineEntry
+
+TIMELINE_URL = reverse('user:user-timeline')
+
+
+def follow_url(user_id):
+    """Return user follow URL"""
+    return reverse('user:user-follow', args=[user_id])
+
+
+def sample_user(**params):
+    """Create and return a sample user"""
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_event(user, **params):
+    """Create and return a sample event"""
+    default = {
+        'title': 'test title',
+        'description': 'test description',
+        'image': None,
+        'event_time': timezone.now() + datetime.timedelta(days=1),
+        'address': 'test address',
+        'fee': 500,
+        'status': '1',
+    }
+    default.update(params)
+
+    return Event.objects.create(organizer=user, **default)
+
+
+class UserTimelineApiTests(TestCase):
+    """Test following organizers and reading the home timeline"""
+
+    def setUp(self):
+        self.guide = sample_user(
+            email='guide@matsuda.com', password='testpass', is_guide=True)
+        self.user = sample_user(email='test@matsuda.com', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def timeline_ids(self, url=TIMELINE_URL):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [event['id'] for event in res.data['results']]
+
+    def test_follow(self):
+        """Test following an organizer once"""
+        res = self.client.post(follow_url(self.guide.id))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.post(follow_url(self.guide.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.guide.refresh_from_db()
+        self.assertEqual(self.guide.follower_count, 1)
+
+    def test_follow_bad_request(self):
+        """Test only other users who are guides can be followed"""
+        other = sample_user(email='other@matsuda.com', password='testpass')
+        for user in (self.user, other):
+            res = self.client.post(follow_url(user.id))
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_follow_by_unauthorized_user(self):
+        """Test authentication is required to follow"""
+        self.client.force_authenticate(None)
+        res = self.client.post(follow_url(self.guide.id))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_published_events_fanned_out(self):
+        """Test events published after following reach the timeline"""
+        self.client.post(follow_url(self.guide.id))
+        event = sample_event(self.guide)
+        private = sample_event(self.guide, status='0')
+        jobs.run_pending()
+        self.assertEqual(self.timeline_ids(), [event.id])
+
+        private.status = '1'
+        private.save()
+        jobs.run_pending()
+        self.assertEqual(self.timeline_ids(), [private.id, event.id])
+
+    def test_follow_backfills_timeline(self):
+        """Test the latest events of an organizer appear on following"""
+        event = sample_event(self.guide)
+        jobs.run_pending()
+
+        self.client.post(follow_url(self.guide.id))
+        self.assertEqual(self.timeline_ids(), [event.id])
+
+    def test_unfollow(self):
+        """Test the events of an unfollowed organizer leave the timeline"""
+        self.client.post(follow_url(self.guide.id))
+        sample_event(self.guide)
+        jobs.run_pending()
+
+        res = self.client.delete(follow_url(self.guide.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.timeline_ids(), [])
+        self.guide.refresh_from_db()
+        self.assertEqual(self.guide.follower_count, 0)
+
+    @override_settings(TIMELINE_PAGE_SIZE=2)
+    def test_timeline_keyset_pagination(self):
+        """Test next links walk the timeline without gaps or repeats"""
+        self.client.post(follow_url(self.guide.id))
+        events = [sample_event(self.guide) for i in range(5)]
+        Event.objects.filter(pk__in=[e.pk for e in events]).update(
+            published_at=timezone.now())
+        TimelineEntry.objects.all().delete()
+        jobs.run_pending()
+
+        ids = []
+        url = TIMELINE_URL
+        while url:
+            with self.assertNumQueries(2):
+                res = self.client.get(url)
+            ids.extend(event['id'] for event in res.data['results'])
+            url = res.data['next']
+        self.assertEqual(ids, sorted((e.id for e in events), reverse=True))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_timeline_pulls_popular_organizers(self):
+        """Test events of organizers too popular to fan out are pulled"""
+        self.client.post(follow_url(self.guide.id))
+        event = sample_event(self.guide)
+        jobs.run_pending()
+
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.timeline_ids(), [event.id])
+
+    def test_timeline_bad_cursor(self):
+        """Test a malformed position is rejected"""
+        res = self.client.get(TIMELINE_URL, {'before': 'yesterday'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
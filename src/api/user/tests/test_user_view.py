@@ -131,6 +131,7 @@ class PublicUserApiTests(TestCase):
                     'id': self.event.id,
                     'title': self.event.title,
                     'image': self.event.get_image_url,
+                    'image_placeholder': '',
                     'event_time': self.event.event_time,
                     'address': self.event.address,
                     "participant_count": 1
@@ -170,6 +171,7 @@ class PublicUserApiTests(TestCase):
                     'id': self.event.id,
                     'title': self.event.title,
                     'image': self.event.get_image_url,
+                    'image_placeholder': '',
                     'event_time': self.event.event_time,
                     'address': self.event.address,
                     "participant_count": 1
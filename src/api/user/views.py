@@ -1,11 +1,20 @@
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import (
+    AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
+)
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from core.models import User, Event, Participant
+from core.models import User, Event, EventRollup, Participant
 from core.permissions import IsUserOwnerOnly
+from core.timeline import follow, read_timeline, unfollow
 
 from user import serializers
 
@@ -25,8 +34,10 @@ class UserViewSet(viewsets.GenericViewSet,
         elif self.request.method == 'PATCH' or self.request.method == 'DELETE':
             permission_classes = [IsUserOwnerOnly]
 
-        if self.action == 'email':
+        if self.action == 'email' or self.action == 'dashboard':
             permission_classes = [IsUserOwnerOnly]
+        if self.action == 'follow' or self.action == 'timeline':
+            permission_classes = [IsAuthenticated]
 
         return [permission() for permission in permission_classes]
 
@@ -35,6 +46,8 @@ class UserViewSet(viewsets.GenericViewSet,
             return serializers.UserEmailSerializer
         if self.action == 'organizedEvents' or self.action == 'joinedEvents':
             return serializers.UserEventsSerializer
+        if self.action == 'recommendedEvents':
+            return serializers.RecommendedEventSerializer
         return serializers.UserSerializer
 
     def get_object(self):
@@ -65,6 +78,8 @@ class UserViewSet(viewsets.GenericViewSet,
                     'event_id', flat=True)
             events = Event.objects.filter(
                 id__in=joined_event_ids, status=1, is_active=True)
+        elif self.action == 'recommendedEvents':
+            events = self.recommended_events(user_id)
 
         page = self.paginate_queryset(events)
         if page is not None:
@@ -82,6 +97,94 @@ class UserViewSet(viewsets.GenericViewSet,
     def joinedEvents(self, request, pk=None):
         return self.list(request)
 
+    @action(methods=['get'], detail=True)
+    def recommendedEvents(self, request, pk=None):
+        return self.list(request)
+
+    def recommended_events(self, user_id):
+        """Return upcoming events related to the events a user joined
+
+        The stored related events of every joined event are summed up by
+        their scores in one query.
+        """
+        joined_event_ids = Participant.objects.filter(
+            user=user_id, status='1', is_active=True).values('event_id')
+        return Event.objects.filter(
+            related_from__event_id__in=joined_event_ids,
+            is_active=True,
+            event_time__gte=timezone.now(),
+        ).exclude(status='0').exclude(id__in=joined_event_ids).exclude(
+            organizer=user_id
+        ).annotate(
+            recommendation_score=Sum('related_from__score')
+        ).select_related('rollup').order_by(
+            '-recommendation_score', 'event_time', 'id')
+
+    @action(methods=['get'], detail=True)
+    def dashboard(self, request, pk=None):
+        """Return the totals and upcoming events of an organizer"""
+        user = self.get_object()
+        now = timezone.now()
+        rollups = EventRollup.objects.filter(
+            organizer=user, event__is_active=True)
+        totals = rollups.aggregate(
+            event_count=Count('pk'),
+            upcoming_event_count=Count(
+                'pk', filter=Q(event__event_time__gte=now)),
+            participant_count=Coalesce(Sum('participant_count'), 0),
+            cancellation_count=Coalesce(Sum('cancellation_count'), 0),
+            comment_count=Coalesce(Sum('comment_count'), 0),
+            view_count=Coalesce(Sum('view_count'), 0),
+        )
+        upcoming = rollups.filter(
+            event__event_time__gte=now
+        ).select_related('event').order_by('event__event_time')
+        totals['upcoming_events'] = serializers.DashboardEventSerializer(
+            upcoming[:settings.DASHBOARD_UPCOMING_LIMIT], many=True).data
+        return Response(totals, status=status.HTTP_200_OK)
+
+    @action(methods=['post', 'delete'], detail=True)
+    def follow(self, request, pk=None):
+        organizer = self.get_object()
+        if organizer == request.user or not organizer.is_guide:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'DELETE':
+            unfollow(request.user, organizer)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if follow(request.user, organizer):
+            return Response(status=status.HTTP_201_CREATED)
+        return Response(status=status.HTTP_200_OK)
+
+    @action(methods=['get'], detail=False)
+    def timeline(self, request):
+        """Return the events of the followed organizers, newest first
+
+        Pages are keyset paginated: the next link carries the position
+        of the last event instead of an offset.
+        """
+        before = request.query_params.get('before')
+        if before is not None:
+            published_at, _, event_id = before.rpartition('_')
+            try:
+                before = (parse_datetime(published_at), int(event_id))
+            except ValueError:
+                before = (None, None)
+            if before[0] is None:
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        events, has_next = read_timeline(
+            request.user, before, settings.TIMELINE_PAGE_SIZE)
+        next_url = None
+        if has_next:
+            last = events[-1]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'before',
+                f'{last.published_at.isoformat()}_{last.pk}')
+        serializer = serializers.TimelineEventSerializer(events, many=True)
+        return Response({'next': next_url, 'results': serializer.data},
+                        status=status.HTTP_200_OK)
+
     def update(self, request, *args, **kwargs):
         if 'email' in request.data.keys():
             return Response(status=status.HTTP_400_BAD_REQUEST)